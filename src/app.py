@@ -1,5 +1,25 @@
-from gui.main_menu import run_app
+import os
+
+from pipeline.thread_budget import apply_thread_budget
 
 
 if __name__ == "__main__":
+    # Antes de cargar los modelos: TensorFlow lee sus hilos al inicializarse
+    apply_thread_budget()
+
+    # Métricas opcionales: METRICS_PORT=9100 python src/app.py
+    if os.environ.get("METRICS_PORT"):
+        from monitoring.metrics import start_metrics_server
+        start_metrics_server(int(os.environ["METRICS_PORT"]))
+
+    # Streaming opcional de resultados y video: STREAM_PORT=8765 python src/app.py
+    if os.environ.get("STREAM_PORT"):
+        from monitoring.stream_server import start_stream_server
+        try:
+            start_stream_server(int(os.environ["STREAM_PORT"]),
+                                os.environ.get("STREAM_HOST", "127.0.0.1"))
+        except OSError as e:
+            print(f"⚠️ {e}; la app sigue sin streaming")
+
+    from gui.main_menu import run_app
     run_app()
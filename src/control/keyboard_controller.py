@@ -1,21 +1,40 @@
 """
 Controlador de Teclado - Gestos a Teclas
 Soporta teclas especiales como space, up, down, etc.
+Soporta combinaciones (ctrl+shift+x) y perfiles de mapeo guardados en JSON.
 """
 
-from typing import Dict, Optional
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
 from pynput.keyboard import Controller, Key
 
+from monitoring.metrics import KEY_PRESSES
+from monitoring.latency import LATENCY
+
+
+# Secuencia de teclas pynput ya resueltas: modificadores primero, tecla final al último
+CompiledChord = Tuple[Any, ...]
+
 
 class KeyboardController:
     """
     Envuelve pynput para mapear gestos -> teclas.
     Solo hace pulsaciones rápidas (press + release).
-    
+
     Soporta teclas especiales:
     - space, up, down, left, right
     - enter, esc, tab, backspace
     - shift, ctrl, alt
+
+    Y combinaciones separadas por '+': "ctrl+s", "ctrl+shift+x".
+
+    Los nombres se validan y se resuelven a objetos pynput UNA sola vez
+    (al configurar el mapeo); en cada frame solo se hace un lookup en dict.
+    Los mapeos se agrupan en perfiles que se pueden cambiar en O(1).
+
+    Cada mano puede tener su propio mapeo: se guarda como "Left:FIST" /
+    "Right:FIST". Si una mano no tiene mapeo propio se usa el de "FIST".
     """
 
     # Mapeo de nombres de teclas especiales
@@ -34,7 +53,9 @@ class KeyboardController:
         'delete': Key.delete,
         'shift': Key.shift,
         'ctrl': Key.ctrl,
+        'control': Key.ctrl,
         'alt': Key.alt,
+        'cmd': Key.cmd,
         'home': Key.home,
         'end': Key.end,
         'pageup': Key.page_up,
@@ -44,58 +65,233 @@ class KeyboardController:
         'f3': Key.f3,
         'f4': Key.f4,
         'f5': Key.f5,
+        'f6': Key.f6,
+        'f7': Key.f7,
+        'f8': Key.f8,
+        'f9': Key.f9,
+        'f10': Key.f10,
+        'f11': Key.f11,
+        'f12': Key.f12,
     }
 
+    DEFAULT_PROFILE = "default"
+    PROFILES_PATH = "src/control/key_profiles.json"
+
     def __init__(self, gesture_to_key: Optional[Dict[str, str]] = None):
         self.keyboard = Controller()
-        self.gesture_to_key: Dict[str, str] = gesture_to_key or {}
 
-    def set_mapping(self, gesture: str, key: str) -> None:
-        """Asigna una tecla (carácter o especial) a un gesto."""
+        # perfil -> {gesto: nombre de tecla} (lo que ve/edita el usuario)
+        self.profiles: Dict[str, Dict[str, str]] = {self.DEFAULT_PROFILE: {}}
+        # perfil -> {gesto: combinación ya resuelta} (lo que se usa por frame)
+        self._compiled: Dict[str, Dict[str, CompiledChord]] = {self.DEFAULT_PROFILE: {}}
+
+        self.active_profile = self.DEFAULT_PROFILE
+        self.gesture_to_key: Dict[str, str] = self.profiles[self.DEFAULT_PROFILE]
+        self._bindings: Dict[str, CompiledChord] = self._compiled[self.DEFAULT_PROFILE]
+
+        for gesture, key in (gesture_to_key or {}).items():
+            self.set_mapping(gesture, key)
+
+    # ------------------------------------------------------------------
+    # Compilación de teclas
+    # ------------------------------------------------------------------
+    def compile_key(self, key_name: str) -> CompiledChord:
+        """
+        Convierte un nombre de tecla o combinación al formato de pynput.
+        - "space" -> (Key.space,)
+        - "a" -> ('a',)
+        - "ctrl+shift+x" -> (Key.ctrl, Key.shift, 'x')
+
+        Lanza ValueError si algún nombre no se reconoce.
+        """
+        normalized = key_name.strip().lower()
+        if not normalized:
+            raise ValueError("Tecla vacía")
+
+        # "+" solo (o terminando en "++") se interpreta como la tecla '+'
+        if normalized == "+":
+            return ("+",)
+        if normalized.endswith("++"):
+            parts = normalized[:-2].split("+") + ["+"]
+        else:
+            parts = normalized.split("+")
+
+        chord = []
+        for part in parts:
+            part = part.strip()
+            if part in self.SPECIAL_KEYS:
+                chord.append(self.SPECIAL_KEYS[part])
+            elif len(part) == 1:
+                chord.append(part)
+            else:
+                raise ValueError(f"Tecla no reconocida: '{part}' en '{key_name}'")
+
+        if len(set(chord)) != len(chord):
+            raise ValueError(f"Tecla repetida en la combinación '{key_name}'")
+
+        return tuple(chord)
+
+    # ------------------------------------------------------------------
+    # Mapeos del perfil activo
+    # ------------------------------------------------------------------
+    @staticmethod
+    def binding_name(gesture: str, hand: Optional[str] = None) -> str:
+        """Nombre con el que se guarda el mapeo: "FIST" o "Left:FIST"."""
+        return f"{hand}:{gesture}" if hand else gesture
+
+    def set_mapping(self, gesture: str, key: str, profile: Optional[str] = None,
+                    hand: Optional[str] = None) -> None:
+        """
+        Asigna una tecla (carácter, especial o combinación) a un gesto.
+        Si se indica `hand`, el mapeo solo aplica a esa mano.
+        Lanza ValueError si la tecla no es válida; el mapeo anterior se conserva.
+        """
+        name = profile or self.active_profile
+        if name not in self.profiles:
+            self.create_profile(name)
+
         key = key.strip().lower()
         if key:
-            self.gesture_to_key[gesture] = key
+            binding = self.binding_name(gesture, hand)
+            self._compiled[name][binding] = self.compile_key(key)
+            self.profiles[name][binding] = key
 
-    def get_mapping(self, gesture: str) -> Optional[str]:
-        """Devuelve la tecla asociada a un gesto, o None si no hay."""
+    def remove_mapping(self, gesture: str, profile: Optional[str] = None,
+                       hand: Optional[str] = None) -> None:
+        """Elimina el mapeo de un gesto (si existe)."""
+        name = profile or self.active_profile
+        binding = self.binding_name(gesture, hand)
+        self.profiles.get(name, {}).pop(binding, None)
+        self._compiled.get(name, {}).pop(binding, None)
+
+    def get_mapping(self, gesture: str, hand: Optional[str] = None) -> Optional[str]:
+        """Devuelve la tecla asociada a un gesto (y mano), o None si no hay."""
+        if hand:
+            key = self.gesture_to_key.get(self.binding_name(gesture, hand))
+            if key:
+                return key
         return self.gesture_to_key.get(gesture)
 
-    def _resolve_key(self, key_name: str):
+    # ------------------------------------------------------------------
+    # Perfiles
+    # ------------------------------------------------------------------
+    def create_profile(self, name: str, mapping: Optional[Dict[str, str]] = None) -> None:
+        """
+        Crea (o reemplaza) un perfil. Todas las teclas se validan antes de
+        guardar nada: si alguna es inválida se lanza ValueError.
+        """
+        mapping = mapping or {}
+        compiled = {gesture: self.compile_key(key) for gesture, key in mapping.items()}
+
+        self.profiles[name] = {g: k.strip().lower() for g, k in mapping.items()}
+        self._compiled[name] = compiled
+
+        # Si reemplazamos el perfil activo, refrescar las referencias
+        if name == self.active_profile:
+            self.use_profile(name)
+
+    def use_profile(self, name: str) -> None:
+        """Activa un perfil existente (solo intercambia referencias, O(1))."""
+        if name not in self._compiled:
+            raise KeyError(f"Perfil no encontrado: '{name}'")
+
+        self.active_profile = name
+        self.gesture_to_key = self.profiles[name]
+        self._bindings = self._compiled[name]
+
+    def delete_profile(self, name: str) -> None:
+        """Elimina un perfil. El perfil por defecto no se puede eliminar."""
+        if name == self.DEFAULT_PROFILE:
+            raise ValueError("No se puede eliminar el perfil por defecto")
+
+        self.profiles.pop(name, None)
+        self._compiled.pop(name, None)
+        if name == self.active_profile:
+            self.use_profile(self.DEFAULT_PROFILE)
+
+    def list_profiles(self) -> list:
+        """Devuelve los nombres de los perfiles disponibles."""
+        return list(self.profiles.keys())
+
+    def load_profiles(self, path: Optional[str] = None) -> bool:
         """
-        Convierte el nombre de la tecla al formato de pynput.
-        - Si es una tecla especial (space, up, etc), retorna Key.xxx
-        - Si es un caracter normal (a, b, 1, etc), retorna el caracter
+        Carga perfiles desde un archivo JSON:
+            {"active": "juego", "profiles": {"juego": {"FIST": "ctrl+a"}}}
+
+        Se valida todo el archivo antes de aplicar cambios.
+        Devuelve False si el archivo no existe.
         """
-        key_lower = key_name.lower().strip()
-        
-        # Verificar si es una tecla especial
-        if key_lower in self.SPECIAL_KEYS:
-            return self.SPECIAL_KEYS[key_lower]
-        
-        # Si es un solo caracter, retornarlo tal cual
-        if len(key_name) == 1:
-            return key_name
-        
-        # Si no se reconoce, intentar como caracter
-        return key_name[0] if key_name else None
-
-    def press_for_gesture(self, gesture: str) -> None:
+        path = path or self.PROFILES_PATH
+        if not os.path.exists(path):
+            return False
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        raw_profiles = data.get("profiles", {})
+        compiled = {
+            name: {gesture: self.compile_key(key) for gesture, key in mapping.items()}
+            for name, mapping in raw_profiles.items()
+        }
+
+        for name, mapping in raw_profiles.items():
+            self.profiles[name] = {g: k.strip().lower() for g, k in mapping.items()}
+            self._compiled[name] = compiled[name]
+
+        active = data.get("active", self.active_profile)
+        self.use_profile(active if active in self._compiled else self.DEFAULT_PROFILE)
+        return True
+
+    def save_profiles(self, path: Optional[str] = None) -> str:
+        """Guarda todos los perfiles en un archivo JSON. Devuelve la ruta."""
+        path = path or self.PROFILES_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"active": self.active_profile, "profiles": self.profiles},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        return path
+
+    # ------------------------------------------------------------------
+    # Envío de teclas
+    # ------------------------------------------------------------------
+    def press_for_gesture(self, gesture: str, hand: Optional[str] = None,
+                          capture_ts: Optional[float] = None) -> None:
         """
         Si el gesto tiene una tecla asignada, simula una pulsación rápida.
         La tecla se envía a la ventana que tenga el foco en el sistema.
-        """
-        key_name = self.get_mapping(gesture)
-        if not key_name:
-            return
+        En combinaciones se presionan los modificadores en orden y se
+        sueltan en orden inverso.
 
-        # Resolver la tecla (especial o normal)
-        key = self._resolve_key(key_name)
-        if key is None:
+        capture_ts: instante de captura del frame del gesto, para medir la
+        latencia captura -> tecla.
+        """
+        chord = None
+        if hand:
+            chord = self._bindings.get(self.binding_name(gesture, hand))
+        if not chord:
+            chord = self._bindings.get(gesture)
+        if not chord:
             return
 
-        # Pulsación rápida: press + release
+        pressed = []
         try:
-            self.keyboard.press(key)
-            self.keyboard.release(key)
+            for key in chord:
+                self.keyboard.press(key)
+                pressed.append(key)
+            KEY_PRESSES.inc()
+            LATENCY.record("key_press", capture_ts)
         except Exception as e:
-            print(f"⚠️ Error al presionar tecla '{key_name}': {e}")
\ No newline at end of file
+            print(f"⚠️ Error al presionar tecla '{self.get_mapping(gesture, hand)}': {e}")
+        finally:
+            for key in reversed(pressed):
+                try:
+                    self.keyboard.release(key)
+                except Exception:
+                    pass
@@ -0,0 +1,115 @@
+"""
+Gráfico en vivo de la probabilidad de cada emoción en el tiempo.
+
+Dibuja directamente sobre un Canvas de Tk: las cinco líneas se crean una
+sola vez y en cada actualización solo se reemplazan sus coordenadas
+(`canvas.coords`), sin rehacer la figura. Los valores viven en un buffer
+circular de tamaño fijo y, si hay más muestras que píxeles útiles, se
+diezman antes de dibujar. Una actualización cuesta alrededor de 1 ms.
+"""
+
+import time
+import tkinter as tk
+from typing import Dict, Optional
+
+import numpy as np
+
+from vision.emotion_result import PROJECT_EMOTIONS
+
+
+class EmotionTimeline:
+    """
+    - parent: contenedor donde se crea el Canvas
+    - colors: color (hex) de la línea de cada emoción
+    - capacity: muestras visibles (el buffer circular)
+    - height: alto del gráfico en píxeles
+    - bg / grid_color: colores de fondo y de la línea de referencia (50%)
+    """
+
+    def __init__(self, parent, colors: Dict[str, str], capacity: int = 300,
+                 height: int = 110, bg: str = "#12121a", grid_color: str = "#1e1e2e"):
+        self.capacity = capacity
+        self.height = height
+        self.emotions = PROJECT_EMOTIONS
+
+        # Buffer circular (capacity, 5): una fila por muestra
+        self._values = np.zeros((capacity, len(self.emotions)), dtype=np.float32)
+        self._head = 0
+        self._count = 0
+
+        self.canvas = tk.Canvas(parent, height=height, bg=bg, highlightthickness=0)
+        self._grid = self.canvas.create_line(0, 0, 0, 0, fill=grid_color, dash=(2, 4))
+        self._lines = {
+            emotion: self.canvas.create_line(0, 0, 0, 0, fill=colors.get(emotion, "#f8fafc"),
+                                             width=2, state="hidden")
+            for emotion in self.emotions
+        }
+        self._width = 0
+        self._visible = False
+        self.last_render_ms = 0.0
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def push(self, emotions: Optional[Dict[str, float]]) -> None:
+        """Agrega una muestra (scores 0-1 por emoción; None = sin cara, todo en 0)."""
+        row = self._values[self._head]
+        if emotions:
+            row[:] = [emotions.get(emotion, 0.0) for emotion in self.emotions]
+        else:
+            row[:] = 0.0
+
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self._visible = False
+        for line in self._lines.values():
+            self.canvas.itemconfigure(line, state="hidden")
+
+    def render(self) -> float:
+        """Actualiza las líneas con el contenido del buffer. Devuelve el costo en ms."""
+        start = time.perf_counter()
+
+        width = self.canvas.winfo_width()
+        if width <= 1 or self._count < 2:
+            return 0.0
+        height = self.height
+        pad = 4
+
+        if width != self._width:
+            self._width = width
+            self.canvas.coords(self._grid, 0, height / 2, width, height / 2)
+
+        # Muestras en orden cronológico (la más nueva al final)
+        order = (self._head - self._count + np.arange(self._count)) % self.capacity
+
+        # Diezmado: no más de una muestra cada 2 px
+        max_points = max(2, width // 2)
+        if self._count > max_points:
+            stride = -(-self._count // max_points)
+            order = order[::-1][::stride][::-1]  # conservar siempre la más nueva
+
+        values = self._values[order]
+        # Eje x fijo por posición en el buffer: el gráfico se desplaza a la izquierda
+        step = (width - 1) / (self.capacity - 1)
+        offset = (self.capacity - self._count) * step
+        positions = (self._count - 1) - (order[-1] - order) % self.capacity
+        xs = offset + positions * step
+        ys = pad + (1.0 - values) * (height - 2 * pad)
+
+        coords = np.empty((len(order), 2), dtype=np.float32)
+        coords[:, 0] = xs
+        for i, emotion in enumerate(self.emotions):
+            coords[:, 1] = ys[:, i]
+            self.canvas.coords(self._lines[emotion], coords.ravel().tolist())
+
+        if not self._visible:
+            self._visible = True
+            for line in self._lines.values():
+                self.canvas.itemconfigure(line, state="normal")
+
+        self.last_render_ms = (time.perf_counter() - start) * 1000.0
+        return self.last_render_ms
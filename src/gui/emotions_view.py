@@ -4,14 +4,24 @@ Diseño profesional que combina con el menú principal
 """
 
 import customtkinter as ctk
-import cv2
-from PIL import Image, ImageTk
-from datetime import datetime
-
-from vision.camera import Camera
-from vision.emotion_recognizer import EmotionRecognizer
+from PIL import ImageTk
+
+from vision.frame_bus import acquire_frame_bus, default_camera_index, release_frame_bus
+from vision.emotion_backends import create_emotion_recognizer
+from vision.overlay import OverlayRenderer
+from vision.motion_gate import MotionGate
+from vision.idle_monitor import IdleMonitor
+from vision.video_export import attach_video_export
 from reports.emotion_report import generate_emotion_report
 from music.player import MusicPlayer
+from monitoring.latency import LATENCY
+from monitoring.stream_server import attach_stream
+from pipeline.emotions import build_emotion_pipeline
+from pipeline.render import RenderStage
+from pipeline.thread_budget import pinned_for
+from .result_bridge import ResultBridge
+from .ui_binding import UIBinder
+from .emotion_timeline import EmotionTimeline
 
 
 class EmotionsWindow(ctk.CTkToplevel):
@@ -37,21 +47,38 @@ class EmotionsWindow(ctk.CTkToplevel):
         # Configurar ventana
         self.title("Detector de emociones")
         self.configure(fg_color=self.colors["bg_dark"])
-        self._center_window(1000, 820)
+        self._center_window(1000, 940)
         self.resizable(True, True)
 
-        # Ventana modal
-        self.grab_set()
+        # No modal: ambas vistas pueden estar abiertas y compartir la cámara
 
         # --- Estado interno ---
-        self.camera = Camera(index=0)
-        self.emotion_recognizer = EmotionRecognizer()
+        # Captura compartida: una sola cámara publica frames para todas las vistas
+        self.frame_bus = acquire_frame_bus(default_camera_index())
+        # Backend según EMOTION_BACKEND (fer por defecto; dnn/onnx no cargan TensorFlow)
+        # Construido con la afinidad de la etapa: los pools de TF/ORT la heredan
+        with pinned_for("emotions", "emotion_analyze"):
+            self.emotion_recognizer = create_emotion_recognizer()
+        self.overlay = OverlayRenderer()
+        self.motion_gate = MotionGate(max_reuse_age=1.0)
+        self.idle_monitor = IdleMonitor(active_interval_ms=80, idle_interval_ms=500)
         self.music_player = MusicPlayer()
+        self.pipeline = None
+        self.result_bridge = None
+        # Textos y colores de la UI: solo lo que cambió, como mucho 10 veces/s
+        self.ui = UIBinder(self, max_rate_hz=10)
+        self.render_stage = RenderStage(
+            lambda frame, item: self.overlay.draw_emotion(frame, item.data["result"])
+        )
         self.running = False
+        self._was_idle = False
+        self._photo = None
 
         self.current_emotion: str | None = None
         self.emotion_counts: dict[str, int] = {}
-        self.emotion_history: list[dict] = []
+        self.emotion_tally = None
+        self.emotion_events = None
+        self._events_shown = 0  # closed_count del detector ya mostrado
 
         # Crear interfaz
         self._create_ui()
@@ -59,10 +86,26 @@ class EmotionsWindow(ctk.CTkToplevel):
         # Cerrar con la X
         self.protocol("WM_DELETE_WINDOW", self.close_window)
 
-        # Iniciar cámara
-        if self.camera.open():
+        # Iniciar el pipeline: análisis, conteo/música y dibujo en sus hilos
+        if self.frame_bus is not None:
+            pipeline = build_emotion_pipeline(
+                self.frame_bus,
+                self.emotion_recognizer,
+                self.motion_gate,
+                self.idle_monitor,
+                music_player=self.music_player,
+                render=self.render_stage,
+            )
+            # Exportación opcional a video (EXPORT_VIDEO), sin frenar la vista
+            attach_video_export(pipeline, draw=self.render_stage.draw)
+            # Streaming opcional (STREAM_PORT): etapa final que publica resultados y video
+            self.pipeline = attach_stream(pipeline, draw=self.render_stage.draw).start()
+            # Contadores, historial y eventos viven en la etapa de conteo
+            self.emotion_tally = self.pipeline.tally
+            self.emotion_events = self.pipeline.tally.events
             self.running = True
-            self.update_frame()
+            # Tk se despierta solo cuando hay un resultado nuevo
+            self.result_bridge = ResultBridge(self, self.pipeline.output, self._apply_result).start()
         else:
             self.video_label.configure(text="❌ No se pudo abrir la cámara")
 
@@ -141,7 +184,22 @@ class EmotionsWindow(ctk.CTkToplevel):
             font=("Segoe UI", 16),
             text_color=self.colors["text_secondary"],
         )
-        self.video_label.pack(expand=True, padx=15, pady=15)
+        self.video_label.pack(expand=True, padx=15, pady=(15, 5))
+
+        # Probabilidad de cada emoción en el tiempo (mismos colores que los contadores)
+        self.timeline = EmotionTimeline(
+            video_card,
+            colors={
+                "happy": self.colors["accent_green"],
+                "sad": self.colors["accent_blue"],
+                "angry": self.colors["accent_red"],
+                "surprise": self.colors["accent_yellow"],
+                "neutral": self.colors["text_secondary"],
+            },
+            bg=self.colors["bg_card"],
+            grid_color=self.colors["border"],
+        )
+        self.timeline.pack(fill="x", padx=15, pady=(0, 15))
 
         # --- STATS PANEL ---
         stats_card = ctk.CTkFrame(
@@ -279,6 +337,31 @@ class EmotionsWindow(ctk.CTkToplevel):
         )
         self.music_label.pack(anchor="w")
 
+        # Eventos destacados (tramos en que domina una emoción)
+        separator3 = ctk.CTkFrame(
+            stats_inner,
+            fg_color=self.colors["border"],
+            height=1,
+        )
+        separator3.pack(fill="x", pady=15)
+
+        events_title = ctk.CTkLabel(
+            stats_inner,
+            text="⭐ Eventos destacados",
+            font=("Segoe UI", 13, "bold"),
+            text_color=self.colors["text_primary"],
+        )
+        events_title.pack(anchor="w", pady=(0, 8))
+
+        self.events_label = ctk.CTkLabel(
+            stats_inner,
+            text="Sin eventos todavía",
+            font=("Segoe UI", 11),
+            text_color=self.colors["text_secondary"],
+            justify="left",
+        )
+        self.events_label.pack(anchor="w")
+
         # ═══════════════════════════════════════════
         # CONTROLES INFERIORES
         # ═══════════════════════════════════════════
@@ -411,69 +494,109 @@ class EmotionsWindow(ctk.CTkToplevel):
         }
         return emoji_map.get(emotion, "🤔")
 
-    def update_frame(self):
-        """Lee un frame, detecta emoción, anota y actualiza la UI."""
+    def _apply_result(self, item):
+        """Vuelca en la UI un resultado del pipeline (en el hilo de Tk)."""
         if not self.running:
             return
 
-        ret, frame = self.camera.read()
-        if not ret or frame is None:
-            self.after(50, self.update_frame)
-            return
-
-        frame_annotated, top_emotion, score, emotions = \
-            self.emotion_recognizer.analyze(frame)
-
-        if top_emotion is not None:
+        data = item.data
+        result = data["result"]
+        top_emotion, score = result.top_emotion, result.confidence
+
+        if data["idle"]:
+            if not self._was_idle:
+                self._show_idle_status()
+        elif self._was_idle:
+            # Alguien volvió: el análisis completo retoma en el siguiente frame
+            self.ui.set(self.emotion_label, text="---", text_color=self.colors["accent_cyan"])
+        self._was_idle = data["idle"]
+
+        # Los items pueden descartarse por el camino (colas LATEST_ONLY y el
+        # puente a Tk), así que no alcanza con mirar data["new_event"]
+        closed_count = self.emotion_events.closed_count
+        if closed_count != self._events_shown:
+            self._events_shown = closed_count
+            self._show_events()
+
+        if data["fresh"]:
+            self.timeline.push(result.emotions if top_emotion is not None else None)
+            if self._display_visible():
+                self.timeline.render()
+
+        if data["fresh"] and top_emotion is not None:
             self.current_emotion = top_emotion
-            self.emotion_counts[top_emotion] = (
-                self.emotion_counts.get(top_emotion, 0) + 1
-            )
+            self.emotion_counts = data["counts"]
 
             # Actualizar emoción actual con estilo
             emoji = self._get_emotion_emoji(top_emotion)
             color = self._get_emotion_color(top_emotion)
-            self.emotion_label.configure(
+            self.ui.set(
+                self.emotion_label,
                 text=f"{emoji} {top_emotion.upper()}",
                 text_color=color,
             )
-            self.confidence_label.configure(
+            self.ui.set(
+                self.confidence_label,
                 text=f"Confianza: {score*100:.1f}%"
             )
 
             # Actualizar contadores
             for emotion, label in self.emotion_counter_labels.items():
                 count = self.emotion_counts.get(emotion, 0)
-                label.configure(text=str(count))
+                self.ui.set(label, text=str(count))
 
-            # Actualizar música
-            self.music_player.update_emotion(top_emotion)
+            # Música (la actualiza la etapa de conteo)
             current_music_emotion = self.music_player.get_current_emotion()
             if current_music_emotion:
                 music_desc = self.music_player.emotion_mapper.get_description(current_music_emotion)
-                self.music_label.configure(
+                self.ui.set(
+                    self.music_label,
                     text=f"{current_music_emotion.upper()}\n{music_desc}"
                 )
 
-            # Historial
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.emotion_history.append({
-                "time": timestamp,
-                "emotion": top_emotion,
-                "score": float(score),
-            })
-
-        # Mostrar video
-        frame_rgb = cv2.cvtColor(frame_annotated, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(frame_rgb)
-        image = image.resize((640, 420), Image.LANCZOS)
-        photo = ImageTk.PhotoImage(image=image)
+        if "image" in data:
+            self._show_image(data["image"])
+
+        # Sin nadie mirando no se dibuja ni se escala el video
+        self.render_stage.enabled = self._display_visible()
+
+    def _show_events(self, last: int = 3):
+        """Muestra los últimos eventos destacados."""
+        lines = []
+        for event in reversed(self.emotion_events.events[-last:]):
+            info = event.to_dict()
+            emoji = self._get_emotion_emoji(event.emotion)
+            lines.append(f"{emoji} {info['start']} · {info['duration']:.0f}s · pico {event.peak * 100:.0f}%")
+        self.ui.set(self.events_label, text="\n".join(lines))
+
+    def _show_idle_status(self):
+        """Indica en la UI que la vista entró en modo espera."""
+        self.ui.set(
+            self.emotion_label,
+            text="💤 En espera",
+            text_color=self.colors["text_secondary"],
+        )
+        self.ui.set(self.confidence_label, text="Confianza: ---%")
+
+    def _display_visible(self) -> bool:
+        """True si hay alguien mirando el video (ventana no minimizada/oculta)."""
+        return bool(self.winfo_viewable())
+
+    def _show_image(self, image):
+        """
+        Muestra en el label de video una imagen ya escalada por el pipeline.
+        Reutiliza el mismo PhotoImage (paste) en lugar de crear una imagen
+        de Tk por frame.
+        """
+        photo = self._photo
+        if photo is not None and (photo.width(), photo.height()) == image.size:
+            photo.paste(image)
+            return
 
+        photo = self._photo = ImageTk.PhotoImage(image=image)
         self.video_label.configure(image=photo, text="")
         self.video_label.image = photo
 
-        self.after(80, self.update_frame)
-
     def toggle_music(self):
         """Pausa o reanuda la música"""
         if self.music_player.is_playing:
@@ -487,7 +610,7 @@ class EmotionsWindow(ctk.CTkToplevel):
         """Detiene completamente la música"""
         self.music_player.stop()
         self.btn_play_pause.configure(text="▶️ Reanudar")
-        self.music_label.configure(text="Detenida")
+        self.ui.set(self.music_label, text="Detenida")
 
     def on_volume_change(self, value):
         """Ajusta el volumen de la música"""
@@ -496,10 +619,12 @@ class EmotionsWindow(ctk.CTkToplevel):
 
     def on_generate_report(self):
         """Genera el reporte PDF."""
+        # Copia del historial: el hilo de conteo sigue agregando mientras se arma el PDF
+        history = self.emotion_tally.snapshot() if self.emotion_tally is not None else []
         try:
             pdf_path = generate_emotion_report(
                 self.emotion_counts,
-                self.emotion_history,
+                history,
             )
             self.report_status_label.configure(
                 text=f"✅ Reporte generado: {pdf_path}",
@@ -519,6 +644,17 @@ class EmotionsWindow(ctk.CTkToplevel):
     def close_window(self):
         """Detiene el loop, libera la cámara y cierra la ventana."""
         self.running = False
+        if self.result_bridge is not None:
+            self.result_bridge.stop()
+            self.result_bridge = None
+        self.ui.cancel()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            if self.pipeline.video_export is not None:
+                self.pipeline.video_export.stop()
+            self.pipeline = None
         self.music_player.stop()
-        self.camera.release()
+        LATENCY.print_summary()
+        release_frame_bus(self.frame_bus)
+        self.frame_bus = None
         self.destroy()
\ No newline at end of file
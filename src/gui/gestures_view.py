@@ -4,13 +4,24 @@ Diseño profesional que combina con el menú principal
 """
 
 import customtkinter as ctk
-import cv2
-from PIL import Image, ImageTk
+from PIL import ImageTk
 
-from vision.camera import Camera
+from vision.frame_bus import acquire_frame_bus, default_camera_index, release_frame_bus
 from vision.hand_tracker import HandTracker
 from vision.gesture_recognizer import GestureRecognizer
+from vision.gesture_templates import TemplateGestureRecognizer
+from vision.overlay import OverlayRenderer
+from vision.motion_gate import MotionGate
+from vision.idle_monitor import IdleMonitor
+from vision.video_export import attach_video_export
 from control.keyboard_controller import KeyboardController
+from monitoring.latency import LATENCY
+from monitoring.stream_server import attach_stream
+from pipeline.gestures import build_gesture_pipeline
+from pipeline.render import RenderStage
+from pipeline.thread_budget import pinned_for
+from .result_bridge import ResultBridge
+from .ui_binding import UIBinder
 
 
 class GesturesWindow(ctk.CTkToplevel):
@@ -37,20 +48,42 @@ class GesturesWindow(ctk.CTkToplevel):
         # Configurar ventana
         self.title("Detector de gestos")
         self.configure(fg_color=self.colors["bg_dark"])
-        self._center_window(1050, 750)
+        self._center_window(1150, 780)
         self.resizable(True, True)
 
-        # Ventana modal
-        self.grab_set()
+        # No modal: ambas vistas pueden estar abiertas y compartir la cámara
 
         # --- Estado interno ---
-        self.camera = Camera(index=0)
-        self.hand_tracker = HandTracker(max_num_hands=1)
-        self.gesture_recognizer = GestureRecognizer()
+        # Captura compartida: una sola cámara publica frames para todas las vistas
+        self.frame_bus = acquire_frame_bus(default_camera_index())
+        # Inferencia a 640 px de ancho: mismo resultado en webcams VGA, mucho menos costo en 1080p
+        # Landmarks suavizados (One Euro): los umbrales de los gestos no parpadean
+        # Construido con la afinidad de la etapa: los hilos de MediaPipe la heredan
+        with pinned_for("gestures", "hand_process"):
+            self.hand_tracker = HandTracker(max_num_hands=2, inference_width=640,
+                                            smooth_landmarks=True)
+        # Gestos personalizados grabados por el usuario (plantillas)
+        self.gesture_templates = TemplateGestureRecognizer()
+        self.gesture_templates.load()
+        self.gesture_recognizer = GestureRecognizer(templates=self.gesture_templates)
+        self.recording: dict | None = None
+        self.overlay = OverlayRenderer()
+        self.motion_gate = MotionGate(max_reuse_age=0.25)
+        self.idle_monitor = IdleMonitor(active_interval_ms=30, idle_interval_ms=400)
         self.keyboard_controller = KeyboardController()
+        self.pipeline = None
+        self.result_bridge = None
+        # Textos y colores de la UI: solo lo que cambió, como mucho 10 veces/s
+        self.ui = UIBinder(self, max_rate_hz=10)
+        self.render_stage = RenderStage(
+            lambda frame, item: self.overlay.draw_hands(frame, item.data["hand_result"])
+        )
         self.running = False
+        self._was_idle = False
+        self._photo = None
 
-        self.last_sent_gesture: str | None = None
+        # Un flujo de gestos independiente por mano
+        self.hands = HandTracker.HANDS
         self.control_enabled = ctk.BooleanVar(value=False)
 
         # Crear interfaz
@@ -59,13 +92,28 @@ class GesturesWindow(ctk.CTkToplevel):
         # Cerrar con la X
         self.protocol("WM_DELETE_WINDOW", self.close_window)
 
-        # Inicializar mapeo
+        # Inicializar mapeo (perfil guardado si existe, si no los valores por defecto)
+        self._load_saved_profiles()
         self.apply_mapping()
 
-        # Iniciar cámara
-        if self.camera.open():
+        # Iniciar el pipeline: detección, clasificación, teclas y dibujo en sus hilos
+        if self.frame_bus is not None:
+            pipeline = build_gesture_pipeline(
+                self.frame_bus,
+                self.hand_tracker,
+                self.gesture_recognizer,
+                self.keyboard_controller,
+                self.motion_gate,
+                self.idle_monitor,
+                render=self.render_stage,
+            )
+            # Exportación opcional a video (EXPORT_VIDEO), sin frenar la vista
+            attach_video_export(pipeline, draw=self.render_stage.draw)
+            # Streaming opcional (STREAM_PORT): etapa final que publica resultados y video
+            self.pipeline = attach_stream(pipeline, draw=self.render_stage.draw).start()
             self.running = True
-            self.update_frame()
+            # Tk se despierta solo cuando hay un resultado nuevo
+            self.result_bridge = ResultBridge(self, self.pipeline.output, self._apply_result).start()
         else:
             self.video_label.configure(text="❌ No se pudo abrir la cámara")
 
@@ -179,21 +227,25 @@ class GesturesWindow(ctk.CTkToplevel):
         gesture_inner = ctk.CTkFrame(gesture_card, fg_color="transparent")
         gesture_inner.pack(fill="x", padx=15, pady=15)
 
-        gesture_title = ctk.CTkLabel(
-            gesture_inner,
-            text="Gesto detectado",
-            font=("Segoe UI", 11),
-            text_color=self.colors["text_secondary"],
-        )
-        gesture_title.pack(anchor="w")
+        # Una línea por mano
+        self.gesture_labels: dict[str, ctk.CTkLabel] = {}
+        for hand, hand_text in (("Left", "Mano izquierda"), ("Right", "Mano derecha")):
+            gesture_title = ctk.CTkLabel(
+                gesture_inner,
+                text=hand_text,
+                font=("Segoe UI", 11),
+                text_color=self.colors["text_secondary"],
+            )
+            gesture_title.pack(anchor="w")
 
-        self.gesture_label = ctk.CTkLabel(
-            gesture_inner,
-            text="---",
-            font=("Segoe UI", 22, "bold"),
-            text_color=self.colors["accent_pink"],
-        )
-        self.gesture_label.pack(anchor="w", pady=(5, 0))
+            gesture_label = ctk.CTkLabel(
+                gesture_inner,
+                text="---",
+                font=("Segoe UI", 20, "bold"),
+                text_color=self.colors["accent_pink"],
+            )
+            gesture_label.pack(anchor="w", pady=(2, 4))
+            self.gesture_labels[hand] = gesture_label
 
         self.key_label = ctk.CTkLabel(
             gesture_inner,
@@ -254,22 +306,43 @@ class GesturesWindow(ctk.CTkToplevel):
         )
         mapping_title.pack(anchor="w", pady=(5, 10))
 
-        # Container para mapeos
-        self.mapping_entries: dict[str, ctk.CTkEntry] = {}
+        # Container para mapeos: (mano, gesto) -> entrada
+        self.mapping_entries: dict[tuple[str, str], ctk.CTkEntry] = {}
 
+        # Mano izquierda = movimiento, mano derecha = acciones
         gestures_config = [
-            ("OPEN_HAND", "🖐️ Mano abierta", "d", self.colors["accent_cyan"]),
-            ("FIST", "✊ Puño", "a", self.colors["accent_red"]),
-            ("PEACE", "✌️ Paz", "w", self.colors["accent_green"]),
-            ("INDEX", "☝️ Índice", "s", self.colors["accent_yellow"]),
-            ("LIKE", "👍 Like", "l", self.colors["accent_purple"]),
+            ("OPEN_HAND", "🖐️ Mano abierta", "d", "space", self.colors["accent_cyan"]),
+            ("FIST", "✊ Puño", "a", "e", self.colors["accent_red"]),
+            ("PEACE", "✌️ Paz", "w", "q", self.colors["accent_green"]),
+            ("INDEX", "☝️ Índice", "s", "f", self.colors["accent_yellow"]),
+            ("LIKE", "👍 Like", "l", "enter", self.colors["accent_purple"]),
         ]
 
-        for gesture_name, label_text, default_key, color in gestures_config:
+        header_row = ctk.CTkFrame(config_inner, fg_color="transparent")
+        header_row.pack(fill="x")
+        ctk.CTkLabel(header_row, text="", width=110).pack(side="left")
+        for hand_text in ("Izq", "Der"):
+            ctk.CTkLabel(
+                header_row,
+                text=hand_text,
+                width=70,
+                font=("Segoe UI", 11),
+                text_color=self.colors["text_secondary"],
+            ).pack(side="left", padx=(5, 0))
+
+        self.mapping_container = ctk.CTkFrame(config_inner, fg_color="transparent")
+        self.mapping_container.pack(fill="x")
+
+        for gesture_name, label_text, left_key, right_key, color in gestures_config:
             self._create_mapping_row(
-                config_inner, gesture_name, label_text, default_key, color
+                self.mapping_container, gesture_name, label_text,
+                {"Left": left_key, "Right": right_key}, color
             )
 
+        # Gestos personalizados ya grabados
+        for gesture_name in self.gesture_templates.gestures:
+            self._add_custom_mapping_row(gesture_name)
+
         # Botón aplicar
         btn_apply = ctk.CTkButton(
             config_inner,
@@ -284,6 +357,43 @@ class GesturesWindow(ctk.CTkToplevel):
         )
         btn_apply.pack(anchor="w", pady=(15, 0))
 
+        self.mapping_status_label = ctk.CTkLabel(
+            config_inner,
+            text="",
+            font=("Segoe UI", 11),
+            text_color=self.colors["text_secondary"],
+            wraplength=200,
+            justify="left",
+        )
+        self.mapping_status_label.pack(anchor="w", pady=(6, 0))
+
+        # Grabación de gestos personalizados
+        record_row = ctk.CTkFrame(config_inner, fg_color="transparent")
+        record_row.pack(fill="x", pady=(10, 0))
+
+        self.record_name_entry = ctk.CTkEntry(
+            record_row,
+            width=120,
+            height=30,
+            font=("Segoe UI", 12),
+            fg_color=self.colors["bg_card_light"],
+            border_color=self.colors["border"],
+            placeholder_text="Nombre del gesto",
+        )
+        self.record_name_entry.pack(side="left")
+
+        btn_record = ctk.CTkButton(
+            record_row,
+            text="⏺ Grabar",
+            command=self.start_recording,
+            width=90,
+            height=30,
+            font=("Segoe UI", 12, "bold"),
+            fg_color=self.colors["accent_orange"],
+            hover_color="#ea580c",
+        )
+        btn_record.pack(side="left", padx=(8, 0))
+
         # ═══════════════════════════════════════════
         # FOOTER
         # ═══════════════════════════════════════════
@@ -321,8 +431,8 @@ class GesturesWindow(ctk.CTkToplevel):
         )
         btn_close.pack(side="right")
 
-    def _create_mapping_row(self, parent, gesture_name, label_text, default_key, color):
-        """Crea una fila de mapeo gesto->tecla"""
+    def _create_mapping_row(self, parent, gesture_name, label_text, default_keys, color):
+        """Crea una fila de mapeo gesto->tecla con una entrada por mano"""
         row = ctk.CTkFrame(parent, fg_color="transparent")
         row.pack(fill="x", pady=4)
 
@@ -331,35 +441,30 @@ class GesturesWindow(ctk.CTkToplevel):
             text=label_text,
             font=("Segoe UI", 12),
             text_color=color,
-            width=130,
+            width=110,
             anchor="w",
         )
         label.pack(side="left")
 
-        arrow = ctk.CTkLabel(
-            row,
-            text="→",
-            font=("Segoe UI", 12),
-            text_color=self.colors["text_secondary"],
-        )
-        arrow.pack(side="left", padx=5)
-
-        entry = ctk.CTkEntry(
-            row,
-            width=50,
-            height=30,
-            font=("Segoe UI", 12),
-            fg_color=self.colors["bg_card_light"],
-            border_color=self.colors["border"],
-            justify="center",
-        )
-        entry.pack(side="left")
-        entry.insert(0, default_key)
+        for hand in self.hands:
+            entry = ctk.CTkEntry(
+                row,
+                width=70,
+                height=30,
+                font=("Segoe UI", 12),
+                fg_color=self.colors["bg_card_light"],
+                border_color=self.colors["border"],
+                justify="center",
+            )
+            entry.pack(side="left", padx=(5, 0))
+            entry.insert(0, default_keys[hand])
 
-        self.mapping_entries[gesture_name] = entry
+            self.mapping_entries[(hand, gesture_name)] = entry
 
     def _on_switch_change(self, *args):
         """Actualiza el label de estado cuando cambia el switch"""
+        if self.pipeline is not None:
+            self.pipeline.action.enabled = self.control_enabled.get()
         if self.control_enabled.get():
             self.status_label.configure(
                 text="🟢 Activado",
@@ -381,6 +486,8 @@ class GesturesWindow(ctk.CTkToplevel):
             "LIKE": "👍",
             "UNKNOWN": "❓",
         }
+        if gesture in self.gesture_templates.samples:
+            return "⭐"
         return emoji_map.get(gesture, "❓")
 
     def _get_gesture_color(self, gesture: str) -> str:
@@ -393,71 +500,210 @@ class GesturesWindow(ctk.CTkToplevel):
             "LIKE": self.colors["accent_purple"],
             "UNKNOWN": self.colors["text_secondary"],
         }
+        if gesture in self.gesture_templates.samples:
+            return self.colors["accent_orange"]
         return color_map.get(gesture, self.colors["accent_pink"])
 
-    def apply_mapping(self):
-        """Lee las entradas de texto y actualiza el mapeo gesto->tecla."""
-        for gesture, entry in self.mapping_entries.items():
-            key = entry.get().strip()
-            if key:
-                self.keyboard_controller.set_mapping(gesture, key)
+    def _add_custom_mapping_row(self, gesture_name: str):
+        """Agrega la fila de mapeo de un gesto personalizado (sin teclas por defecto)."""
+        self._create_mapping_row(
+            self.mapping_container,
+            gesture_name,
+            f"⭐ {gesture_name.capitalize()}",
+            {"Left": "", "Right": ""},
+            self.colors["accent_orange"],
+        )
 
-    def update_frame(self):
-        """Lee un frame, detecta mano, dibuja landmarks y muestra el gesto."""
-        if not self.running:
+    def start_recording(self, samples: int = 15):
+        """Empieza a grabar muestras de la pose actual para un gesto personalizado."""
+        name = self.record_name_entry.get().strip().upper().replace(" ", "_")
+        if not name or name == "UNKNOWN":
+            self.mapping_status_label.configure(
+                text="⚠️ Escribe un nombre para el gesto",
+                text_color=self.colors["accent_red"],
+            )
             return
 
-        ret, frame = self.camera.read()
-        if not ret or frame is None:
-            self.after(50, self.update_frame)
+        self.recording = {"name": name, "remaining": samples}
+        self.mapping_status_label.configure(
+            text=f"⏺ Grabando '{name}': mantén la pose frente a la cámara",
+            text_color=self.colors["accent_orange"],
+        )
+
+    def _record_sample(self, hand_result):
+        """Guarda una muestra de la primera mano visible mientras se graba."""
+        if self.recording is None or not hand_result.has_hands:
             return
 
-        frame_annotated, landmarks_list = self.hand_tracker.process(frame)
+        name = self.recording["name"]
+        self.gesture_templates.add_sample(
+            name, hand_result.landmarks_list[0], hand_result.handedness_list[0],
+            hand_result.aspect_ratio,
+        )
+        self.recording["remaining"] -= 1
+        if self.recording["remaining"] > 0:
+            return
 
-        gesture = "UNKNOWN"
-        if landmarks_list:
-            hand_landmarks = landmarks_list[0]
-            gesture = self.gesture_recognizer.classify(hand_landmarks)
+        # Grabación terminada: reconstruir el índice y guardarlo
+        self.recording = None
+        is_new = not any(g == name for (_, g) in self.mapping_entries)
+        self.gesture_templates.build()
+        try:
+            self.gesture_templates.save()
+        except OSError as e:
+            self.mapping_status_label.configure(
+                text=f"⚠️ No se pudieron guardar las plantillas: {e}",
+                text_color=self.colors["accent_red"],
+            )
+            return
 
-        # Actualizar UI del gesto
-        emoji = self._get_gesture_emoji(gesture)
-        color = self._get_gesture_color(gesture)
-        self.gesture_label.configure(
-            text=f"{emoji} {gesture}",
-            text_color=color,
+        if is_new:
+            self._add_custom_mapping_row(name)
+        self.mapping_status_label.configure(
+            text=f"✅ Gesto '{name}' grabado. Asígnale teclas y aplica el mapeo",
+            text_color=self.colors["accent_green"],
         )
 
-        mapped_key = "---"
-        if self.control_enabled.get():
-            if gesture != "UNKNOWN":
-                mapped_key = self.keyboard_controller.get_mapping(gesture)
+    def _load_saved_profiles(self):
+        """Carga los perfiles guardados y rellena las entradas con el perfil activo."""
+        try:
+            if not self.keyboard_controller.load_profiles():
+                return
+        except (ValueError, KeyError, OSError) as e:
+            self.mapping_status_label.configure(
+                text=f"⚠️ Perfiles inválidos: {e}",
+                text_color=self.colors["accent_red"],
+            )
+            return
 
-                if gesture != self.last_sent_gesture and mapped_key:
-                    self.keyboard_controller.press_for_gesture(gesture)
-                    self.last_sent_gesture = gesture
+        for (hand, gesture), entry in self.mapping_entries.items():
+            key = self.keyboard_controller.get_mapping(gesture, hand)
+            if key:
+                entry.delete(0, "end")
+                entry.insert(0, key)
 
-                if mapped_key:
-                    self.key_label.configure(text=f"Tecla: {mapped_key}")
-            else:
-                self.last_sent_gesture = None
-                self.key_label.configure(text="Tecla: ---")
+    def apply_mapping(self):
+        """Lee las entradas de texto, valida y actualiza el mapeo gesto->tecla."""
+        errors = []
+        for (hand, gesture), entry in self.mapping_entries.items():
+            key = entry.get().strip()
+            if not key:
+                # Entrada vacía: desasignar (si no, el mapeo viejo seguiría activo y guardado)
+                self.keyboard_controller.remove_mapping(gesture, hand=hand)
+                continue
+            try:
+                self.keyboard_controller.set_mapping(gesture, key, hand=hand)
+            except ValueError as e:
+                errors.append(str(e))
+
+        if errors:
+            self.mapping_status_label.configure(
+                text="⚠️ " + "\n".join(errors),
+                text_color=self.colors["accent_red"],
+            )
+            return
+
+        try:
+            self.keyboard_controller.save_profiles()
+        except OSError as e:
+            self.mapping_status_label.configure(
+                text=f"⚠️ No se pudo guardar el perfil: {e}",
+                text_color=self.colors["accent_red"],
+            )
+            return
+
+        self.mapping_status_label.configure(
+            text=f"✅ Perfil '{self.keyboard_controller.active_profile}' aplicado",
+            text_color=self.colors["accent_green"],
+        )
+
+    def _apply_result(self, item):
+        """Vuelca en la UI un resultado del pipeline (en el hilo de Tk)."""
+        if not self.running:
+            return
+
+        data = item.data
+        if data["fresh"]:
+            self._record_sample(data["hand_result"])
+
+        if data["idle"]:
+            if not self._was_idle:
+                self._show_idle_status()
         else:
-            self.last_sent_gesture = None
-            self.key_label.configure(text="Tecla: ---")
+            key_texts = []
+            for hand in self.hands:
+                mapped_key = self._update_hand(hand, data["gestures"][hand], data["keys"][hand])
+                if mapped_key:
+                    key_texts.append(f"{'Izq' if hand == 'Left' else 'Der'} {mapped_key}")
+
+            self.ui.set(
+                self.key_label,
+                text=f"Tecla: {' · '.join(key_texts)}" if key_texts else "Tecla: ---"
+            )
+        self._was_idle = data["idle"]
+
+        if "image" in data:
+            self._show_image(data["image"])
+
+        # Sin nadie mirando no se dibuja ni se escala el video
+        self.render_stage.enabled = self._display_visible()
 
-        # Mostrar frame
-        frame_rgb = cv2.cvtColor(frame_annotated, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(frame_rgb)
-        image = image.resize((640, 420), Image.LANCZOS)
-        photo = ImageTk.PhotoImage(image=image)
+    def _show_idle_status(self):
+        """Indica en la UI que la vista entró en modo espera."""
+        for hand in self.hands:
+            self.ui.set(
+                self.gesture_labels[hand],
+                text="💤 En espera",
+                text_color=self.colors["text_secondary"],
+            )
+        self.ui.set(self.key_label, text="Tecla: ---")
+
+    def _display_visible(self) -> bool:
+        """True si hay alguien mirando el video (ventana no minimizada/oculta)."""
+        return bool(self.winfo_viewable())
+
+    def _show_image(self, image):
+        """
+        Muestra en el label de video una imagen ya escalada por el pipeline.
+        Reutiliza el mismo PhotoImage (paste) en lugar de crear una imagen
+        de Tk por frame.
+        """
+        photo = self._photo
+        if photo is not None and (photo.width(), photo.height()) == image.size:
+            photo.paste(image)
+            return
 
+        photo = self._photo = ImageTk.PhotoImage(image=image)
         self.video_label.configure(image=photo, text="")
         self.video_label.image = photo
 
-        self.after(30, self.update_frame)
+    def _update_hand(self, hand: str, gesture: str, mapped_key: str | None) -> str | None:
+        """
+        Actualiza la UI del flujo de gestos de una mano (la tecla ya la
+        envió la etapa de acción). Devuelve la tecla mapeada activa (o None).
+        """
+        emoji = self._get_gesture_emoji(gesture)
+        color = self._get_gesture_color(gesture)
+        self.ui.set(
+            self.gesture_labels[hand],
+            text=f"{emoji} {gesture}",
+            text_color=color,
+        )
+        return mapped_key
 
     def close_window(self):
         """Detiene el loop, libera cámara y cierra ventana."""
         self.running = False
-        self.camera.release()
+        if self.result_bridge is not None:
+            self.result_bridge.stop()
+            self.result_bridge = None
+        self.ui.cancel()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            if self.pipeline.video_export is not None:
+                self.pipeline.video_export.stop()
+            self.pipeline = None
+        LATENCY.print_summary()
+        release_frame_bus(self.frame_bus)
+        self.frame_bus = None
         self.destroy()
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Entrega de resultados del pipeline al hilo de Tk, sin polling.
+
+Un hilo lector espera (bloqueado, sin gastar CPU) en la cola de salida del
+pipeline. Cada resultado se guarda en una única ranura y, si no hay ya un
+aviso pendiente, se despierta a Tk con un evento virtual. Cuando Tk
+atiende el evento toma solo el resultado más nuevo: varios resultados que
+llegaron entre dos atenciones se funden en una sola actualización de
+widgets.
+
+`event_generate` es seguro desde otro hilo con el Tcl multihilo que trae
+Python (tkinter lo reenvía al hilo del mainloop).
+"""
+
+import threading
+import tkinter as tk
+from typing import Any, Callable, Optional
+
+from monitoring.metrics import QUEUE_DROPPED
+from pipeline.queues import QueueClosed, StageQueue
+
+
+class ResultBridge:
+    """
+    - widget: ventana que recibe el evento (y en cuyo hilo corre on_result)
+    - source: cola de salida del pipeline
+    - on_result: callback con el resultado más nuevo, en el hilo de Tk
+    - event_name: evento virtual usado para despertar a Tk
+    """
+
+    def __init__(self, widget, source: StageQueue, on_result: Callable[[Any], None],
+                 event_name: str = "<<PipelineResult>>"):
+        self.widget = widget
+        self.source = source
+        self.on_result = on_result
+        self.event_name = event_name
+
+        self._latest: Optional[Any] = None
+        self._pending = False
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._bind_id = None
+
+        self.delivered = 0
+        self.coalesced = 0
+        self._coalesced_metric = QUEUE_DROPPED.labels(queue=f"{source.name}.ui")
+
+    def start(self) -> "ResultBridge":
+        self._bind_id = self.widget.bind(self.event_name, self._drain, add="+")
+        self._running = True
+        self._thread = threading.Thread(target=self._pump, name="ResultBridge", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Deja de entregar resultados. Llamar desde el hilo de Tk antes de
+        destruir el widget. No se espera al hilo lector: podría estar
+        bloqueado en event_generate esperando justamente al hilo de Tk; sale
+        solo al cerrarse la cola del pipeline o en el próximo timeout.
+        """
+        self._running = False
+        self._thread = None
+        if self._bind_id is not None:
+            self.widget.unbind(self.event_name, self._bind_id)
+            self._bind_id = None
+
+    def _pump(self):
+        """Hilo lector: espera resultados y avisa a Tk una vez por tanda."""
+        while self._running:
+            try:
+                item = self.source.get(timeout=0.2)
+            except QueueClosed:
+                return
+            if item is None:
+                continue
+
+            with self._lock:
+                if self._latest is not None:
+                    self.coalesced += 1
+                    self._coalesced_metric.inc()
+                self._latest = item
+                notify = not self._pending
+                self._pending = True
+
+            if notify:
+                try:
+                    self.widget.event_generate(self.event_name, when="tail")
+                except (tk.TclError, RuntimeError):
+                    # Ventana destruida o mainloop terminado
+                    return
+
+    def _drain(self, event=None):
+        """En el hilo de Tk: toma el resultado más nuevo y lo entrega."""
+        with self._lock:
+            item = self._latest
+            self._latest = None
+            self._pending = False
+
+        if item is not None and self._running:
+            self.delivered += 1
+            self.on_result(item)
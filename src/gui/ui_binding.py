@@ -0,0 +1,76 @@
+"""
+Actualizaciones de widgets con estado "sucio" y frecuencia limitada.
+
+`configure` en Tk es caro (reconfigura, recalcula tamaño y redibuja), y
+las vistas reciben un resultado por frame aunque el texto no cambie.
+UIBinder guarda el estado deseado de cada widget, compara contra lo último
+aplicado y solo llama a `configure` con las opciones que cambiaron, como
+mucho `max_rate_hz` veces por segundo. El video no pasa por aquí: sigue a
+la frecuencia completa.
+
+    ui = UIBinder(self, max_rate_hz=10)
+    ui.set(self.emotion_label, text="😊 HAPPY", text_color="#22c55e")
+"""
+
+import time
+from typing import Any, Dict
+
+
+class UIBinder:
+    """
+    - root: widget cuyo `after` programa los volcados (hilo de Tk)
+    - max_rate_hz: volcados por segundo como máximo
+    """
+
+    def __init__(self, root, max_rate_hz: float = 10.0):
+        self.root = root
+        self.period = 1.0 / max_rate_hz
+
+        self._applied: Dict[Any, Dict[str, Any]] = {}
+        self._dirty: Dict[Any, Dict[str, Any]] = {}
+        self._last_flush = 0.0
+        self._scheduled = None
+
+        self.configure_calls = 0
+        self.skipped = 0
+
+    def set(self, widget, **options) -> None:
+        """Pide que `widget` quede con estas opciones (se aplica en el próximo volcado)."""
+        applied = self._applied.get(widget, {})
+        pending = self._dirty.get(widget)
+
+        for name, value in options.items():
+            if applied.get(name) == value:
+                # Ya aplicado: descartar un cambio pendiente que lo revertiría
+                if pending is not None:
+                    pending.pop(name, None)
+                self.skipped += 1
+                continue
+            if pending is None:
+                pending = self._dirty[widget] = {}
+            pending[name] = value
+
+        if pending is not None and not pending:
+            del self._dirty[widget]
+
+        if self._dirty and self._scheduled is None:
+            delay = self._last_flush + self.period - time.perf_counter()
+            self._scheduled = self.root.after(max(0, int(delay * 1000)), self.flush)
+
+    def flush(self) -> None:
+        """Aplica los cambios pendientes, una llamada a configure por widget."""
+        self._scheduled = None
+        self._last_flush = time.perf_counter()
+
+        dirty, self._dirty = self._dirty, {}
+        for widget, options in dirty.items():
+            widget.configure(**options)
+            self._applied.setdefault(widget, {}).update(options)
+            self.configure_calls += 1
+
+    def cancel(self) -> None:
+        """Cancela el volcado programado (al cerrar la ventana)."""
+        if self._scheduled is not None:
+            self.root.after_cancel(self._scheduled)
+            self._scheduled = None
+        self._dirty.clear()
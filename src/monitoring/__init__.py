@@ -0,0 +1,7 @@
+"""
+Monitoreo del pipeline: métricas en formato Prometheus
+"""
+
+from .metrics import MetricsServer, REGISTRY, start_metrics_server
+
+__all__ = ['MetricsServer', 'REGISTRY', 'start_metrics_server']
@@ -0,0 +1,94 @@
+"""
+Latencia de extremo a extremo: captura del frame -> acción.
+
+Cada frame lleva el instante de captura (time.perf_counter) desde el
+FrameBus; los resultados de análisis lo conservan y, al ejecutar una acción
+(tecla enviada, cambio de música), se registra cuánto pasó desde esa
+captura. Se guardan las últimas muestras por acción para calcular
+percentiles y además se exportan como histograma de Prometheus.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import numpy as np
+
+from monitoring.metrics import REGISTRY
+
+
+# De 10 ms a 60 s: las teclas están en decenas de ms, la música en segundos
+END_TO_END_BUCKETS = (0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0,
+                      2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+END_TO_END_LATENCY = REGISTRY.histogram(
+    "app_end_to_end_latency_seconds",
+    "Latencia desde la captura del frame hasta la acción",
+    ["action"],
+    buckets=END_TO_END_BUCKETS,
+)
+
+
+class LatencyTracker:
+    """Distribuciones de latencia captura -> acción, por tipo de acción."""
+
+    def __init__(self, max_samples: int = 2000):
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, action: str, capture_ts: Optional[float],
+               now: Optional[float] = None) -> Optional[float]:
+        """
+        Registra una acción originada en el frame capturado en `capture_ts`.
+        Devuelve la latencia en segundos (o None si el frame no tenía timestamp).
+        """
+        if capture_ts is None:
+            return None
+
+        now = time.perf_counter() if now is None else now
+        latency = now - capture_ts
+
+        with self._lock:
+            samples = self._samples.get(action)
+            if samples is None:
+                samples = self._samples[action] = deque(maxlen=self.max_samples)
+                self._series[action] = END_TO_END_LATENCY.labels(action=action)
+            samples.append(latency)
+            series = self._series[action]
+
+        series.observe(latency)
+        return latency
+
+    def summary(self, action: str) -> Dict[str, float]:
+        """Percentiles (ms) de las últimas muestras de una acción."""
+        with self._lock:
+            samples = list(self._samples.get(action, ()))
+        if not samples:
+            return {}
+
+        ms = np.asarray(samples) * 1000.0
+        return {
+            "count": len(samples),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p90_ms": float(np.percentile(ms, 90)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "max_ms": float(ms.max()),
+        }
+
+    def actions(self):
+        with self._lock:
+            return list(self._samples.keys())
+
+    def print_summary(self) -> None:
+        """Muestra en consola la distribución de cada acción registrada."""
+        for action in self.actions():
+            s = self.summary(action)
+            print(f"⏱️ {action}: n={s['count']} | p50 {s['p50_ms']:.0f} ms | "
+                  f"p90 {s['p90_ms']:.0f} ms | p99 {s['p99_ms']:.0f} ms | máx {s['max_ms']:.0f} ms")
+
+
+# Tracker compartido por toda la aplicación
+LATENCY = LatencyTracker()
@@ -0,0 +1,253 @@
+"""
+Métricas del pipeline en formato de texto de Prometheus.
+
+Contadores e histogramas en memoria, actualizados desde el loop de frames,
+y un servidor HTTP opcional (solo localhost por defecto) que los expone en
+/metrics. El servidor corre en su propio hilo: el loop de frames solo hace
+una suma o un bisect bajo un lock, del orden de cientos de nanosegundos.
+"""
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Buckets de latencia (segundos): de 1 ms a 2 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base: una métrica con nombre, ayuda y una serie por combinación de labels."""
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[Tuple[str, str], ...], "_Metric"] = {}
+        self._labels: Tuple[Tuple[str, str], ...] = ()
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> "_Metric":
+        """
+        Devuelve la serie para esos labels. Conviene guardarla en una
+        variable fuera del loop para no repetir el lookup en cada frame.
+        """
+        key = tuple((name, str(labels[name])) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    child._labels = key
+                    self._children[key] = child
+        return child
+
+    def _new_child(self) -> "_Metric":
+        raise NotImplementedError
+
+    def _series(self) -> List["_Metric"]:
+        return list(self._children.values()) if self.labelnames else [self]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        for series in self._series():
+            lines.extend(series._render_samples(self.name))
+        return lines
+
+    def _render_samples(self, name: str) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def _render_samples(self, name: str) -> List[str]:
+        return [f"{name}{_format_labels(self._labels)} {self.value}"]
+
+
+class Histogram(_Metric):
+    """Histograma con buckets fijos (acumulados al exportar)."""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _render_samples(self, name: str) -> List[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self.sum, self.count
+
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = _format_labels(self._labels, f'le="{bound}"')
+            lines.append(f"{name}_bucket{le} {cumulative}")
+        le = _format_labels(self._labels, 'le="+Inf"')
+        lines.append(f"{name}_bucket{le} {count}")
+        lines.append(f"{name}_sum{_format_labels(self._labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(self._labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas exportadas juntas."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# Métricas de la aplicación
+# ----------------------------------------------------------------------
+REGISTRY = Registry()
+
+FRAMES_CAPTURED = REGISTRY.counter(
+    "app_frames_captured_total", "Frames leídos de la cámara", ["camera"]
+)
+FRAMES_ANALYZED = REGISTRY.counter(
+    "app_frames_analyzed_total", "Frames analizados por cada pipeline", ["pipeline"]
+)
+FRAMES_DROPPED = REGISTRY.counter(
+    "app_frames_dropped_total", "Frames capturados que un pipeline nunca procesó", ["pipeline"]
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "app_stage_latency_seconds", "Latencia por etapa del pipeline", ["stage"]
+)
+KEY_PRESSES = REGISTRY.counter(
+    "app_key_presses_total", "Pulsaciones de teclado enviadas por gestos"
+)
+MUSIC_SWITCHES = REGISTRY.counter(
+    "app_music_switches_total", "Cambios de música por emoción"
+)
+QUEUE_DROPPED = REGISTRY.counter(
+    "app_queue_dropped_total", "Elementos descartados por las colas entre etapas", ["queue"]
+)
+STREAM_DROPPED = REGISTRY.counter(
+    "app_stream_dropped_total", "Mensajes descartados por clientes de streaming lentos", ["stream"]
+)
+WORKER_RESTARTS = REGISTRY.counter(
+    "app_worker_restarts_total", "Reinicios de procesos de cámara por el supervisor", ["camera"]
+)
+
+# Series por etapa, resueltas una vez (sin lookups en el loop de frames)
+CAMERA_READ_LATENCY = STAGE_LATENCY.labels(stage="camera_read")
+
+
+# ----------------------------------------------------------------------
+# Servidor HTTP
+# ----------------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin logs por petición en la consola
+        pass
+
+
+class MetricsServer:
+    """Servidor HTTP de métricas en un hilo daemon."""
+
+    def __init__(self, port: int = 9100, host: str = "127.0.0.1",
+                 registry: Registry = REGISTRY):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, name="MetricsServer", daemon=True
+        )
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    def start(self) -> "MetricsServer":
+        self.thread.start()
+        host, port = self.address
+        print(f"📈 Métricas en http://{host}:{port}/metrics")
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_server: Optional[MetricsServer] = None
+
+
+def start_metrics_server(port: int = 9100, host: str = "127.0.0.1") -> MetricsServer:
+    """Arranca (una sola vez) el servidor de métricas del proceso."""
+    global _server
+    if _server is None:
+        _server = MetricsServer(port, host).start()
+    return _server
@@ -0,0 +1,200 @@
+"""
+Reproducción determinista de sesiones grabadas para depurar rendimiento.
+
+Pasa cada frame de una sesión (vision.recording) por los mismos
+analizadores que usan las vistas, guarda la salida de cada frame y mide
+la latencia por etapa. Dos reportes de versiones distintas del código se
+pueden comparar para encontrar regresiones de resultado o de tiempo.
+
+Uso (desde la raíz del repo):
+    python src/replay_session.py sesiones/s1 --pipeline gestures --output v1.json
+    python src/replay_session.py sesiones/s1 --pipeline gestures --compare v1.json
+
+Las vistas además usan MotionGate e IdleMonitor, que dependen del reloj;
+aquí se ejecutan solo los analizadores para que dos corridas sobre la
+misma sesión den exactamente las mismas salidas.
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from pipeline.thread_budget import apply_thread_budget
+from vision.recording import FrameReplayer
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Resumen en milisegundos de una lista de duraciones en segundos."""
+    if not samples:
+        return {}
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def build_gestures_pipeline() -> Callable:
+    """Analizadores de la vista de gestos. Devuelve f(frame, timestamp, timings) -> salida."""
+    from vision.hand_tracker import HandTracker
+    from vision.gesture_recognizer import GestureRecognizer
+    from vision.gesture_templates import TemplateGestureRecognizer
+
+    tracker = HandTracker(max_num_hands=2, inference_width=640, smooth_landmarks=True)
+    templates = TemplateGestureRecognizer()
+    templates.load()
+    recognizer = GestureRecognizer(templates=templates)
+
+    def run(frame, timestamp, timings):
+        start = time.perf_counter()
+        # Timestamp grabado: el suavizado da lo mismo en cada reproducción
+        hand_result = tracker.detect(frame, timestamp)
+        mid = time.perf_counter()
+        gestures = recognizer.classify_batch(
+            hand_result.landmarks_list, hand_result.handedness_list,
+            hand_result.aspect_ratio,
+        )
+        end = time.perf_counter()
+
+        timings["hand_process"].append(mid - start)
+        timings["gesture_classify"].append(end - mid)
+        return dict(zip(hand_result.handedness_list, gestures))
+
+    return run
+
+
+def build_emotions_pipeline() -> Callable:
+    """Analizador de la vista de emociones. Devuelve f(frame, timestamp, timings) -> salida."""
+    from vision.emotion_backends import create_emotion_recognizer
+
+    recognizer = create_emotion_recognizer()
+
+    def run(frame, timestamp, timings):
+        start = time.perf_counter()
+        result = recognizer.detect(frame, timestamp)
+        timings["emotion_analyze"].append(time.perf_counter() - start)
+
+        if result.top_emotion is None:
+            return None
+        return [result.top_emotion, round(result.confidence, 4)]
+
+    return run
+
+
+PIPELINES = {
+    "gestures": build_gestures_pipeline,
+    "emotions": build_emotions_pipeline,
+}
+
+
+def replay_session(path: str, pipeline: str = "gestures", realtime: bool = False,
+                   max_frames: Optional[int] = None) -> Dict:
+    """
+    Reproduce una sesión por un pipeline y devuelve el reporte:
+    salidas por frame, FPS y latencia por etapa.
+    """
+    replayer = FrameReplayer(path, realtime=realtime)
+    if not replayer.open():
+        raise FileNotFoundError(f"Sesión no encontrada o vacía: {path}")
+
+    run = PIPELINES[pipeline]()
+    timings: Dict[str, List[float]] = {
+        "frame_total": [], "hand_process": [], "gesture_classify": [], "emotion_analyze": [],
+    }
+    outputs = []
+
+    wall_start = time.perf_counter()
+    while max_frames is None or len(outputs) < max_frames:
+        ret, frame = replayer.read()
+        if not ret:
+            break
+
+        start = time.perf_counter()
+        outputs.append(run(frame, replayer.last_timestamp, timings))
+        timings["frame_total"].append(time.perf_counter() - start)
+    wall_time = time.perf_counter() - wall_start
+
+    replayer.release()
+
+    return {
+        "session": path,
+        "pipeline": pipeline,
+        "realtime": realtime,
+        "frames": len(outputs),
+        "wall_time_s": wall_time,
+        "fps": len(outputs) / wall_time if wall_time > 0 else 0.0,
+        "stages": {
+            name: _latency_summary(samples)
+            for name, samples in timings.items() if samples
+        },
+        "outputs": outputs,
+    }
+
+
+def compare_reports(current: Dict, baseline: Dict) -> Dict:
+    """Compara salidas frame a frame y tiempos entre dos reportes."""
+    pairs = list(zip(current["outputs"], baseline["outputs"]))
+    mismatches = [i for i, (a, b) in enumerate(pairs) if a != b]
+
+    stage_delta = {}
+    for name, summary in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base:
+            stage_delta[name] = {
+                key: summary[key] - base[key] for key in ("mean_ms", "p95_ms")
+            }
+
+    return {
+        "frames_compared": len(pairs),
+        "mismatches": len(mismatches),
+        "first_mismatches": mismatches[:10],
+        "fps_delta": current["fps"] - baseline["fps"],
+        "stage_delta_ms": stage_delta,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"📼 Sesión: {report['session']} | pipeline: {report['pipeline']}")
+    print(f"   Frames: {report['frames']} | {report['fps']:.1f} FPS")
+    for name, summary in report["stages"].items():
+        print(f"   {name:18s} media {summary['mean_ms']:7.2f} ms | "
+              f"p95 {summary['p95_ms']:7.2f} ms | máx {summary['max_ms']:7.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce una sesión grabada por un pipeline")
+    parser.add_argument("session", help="Carpeta de la sesión (frames.bin + meta.json)")
+    parser.add_argument("--pipeline", choices=sorted(PIPELINES), default="gestures")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Respetar los tiempos originales entre frames")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--output", help="Guardar el reporte en JSON")
+    parser.add_argument("--compare", help="Reporte JSON anterior para comparar")
+    args = parser.parse_args(argv)
+
+    apply_thread_budget()
+
+    report = replay_session(args.session, args.pipeline, args.realtime, args.max_frames)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Reporte guardado en {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        diff = compare_reports(report, baseline)
+        print(f"🔍 Diferencias: {diff['mismatches']} de {diff['frames_compared']} frames "
+              f"| ΔFPS {diff['fps_delta']:+.1f}")
+        for name, delta in diff["stage_delta_ms"].items():
+            print(f"   {name:18s} Δmedia {delta['mean_ms']:+.2f} ms | Δp95 {delta['p95_ms']:+.2f} ms")
+        return 1 if diff["mismatches"] else 0
+
+    return 0
@@ -0,0 +1,371 @@
+"""
+Prueba de resistencia (soak) para detectar fugas de memoria y caída de FPS.
+
+Corre los pipelines durante horas sobre una sesión grabada en bucle o un
+generador sintético (no hace falta cámara ni pantalla) y cada `interval`
+segundos toma una muestra de:
+
+  - RSS del proceso
+  - memoria trazada por tracemalloc (y al final, las líneas que más crecieron)
+  - cantidad de objetos vivos del GC (y los tipos que más crecieron)
+  - hilos vivos
+  - FPS de salida de cada pipeline
+
+Tras un calentamiento (modelos cargados, cachés llenas) compara el resto
+de la corrida contra su inicio y falla si la memoria crece o el
+rendimiento cae más allá de los umbrales.
+
+Uso (desde la raíz del repo):
+    python src/soak_test.py --session sesiones/s1 --hours 6 --output soak.json
+    python src/soak_test.py --synthetic --duration 900 --pipelines gestures
+"""
+
+import argparse
+import gc
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from pipeline.headless import BUILDERS
+from pipeline.thread_budget import apply_thread_budget
+from vision.frame_bus import FrameBus
+from vision.recording import FrameReplayer
+
+
+class SyntheticSource:
+    """
+    Fuente con la interfaz de Camera que genera frames (gradiente que se
+    desplaza más ruido) a `fps`. Sin caras ni manos: ejercita la captura,
+    las colas, el gate de movimiento y el modo espera, no los modelos.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0, seed: int = 0):
+        self.index = "synthetic"
+        self.fps = fps
+        self._rng = np.random.default_rng(seed)
+        gradient = np.linspace(0, 240, width, dtype=np.float32)  # + ruido sin desbordar uint8
+        self._base = np.repeat(gradient[None, :, None], height, axis=0).repeat(3, axis=2).astype(np.uint8)
+        self._next = 0.0
+        self._offset = 0
+        self._opened = False
+
+    def open(self) -> bool:
+        self._opened = True
+        self._next = time.perf_counter()
+        return True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self):
+        if not self._opened:
+            return False, None
+
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + 1.0 / self.fps, time.perf_counter())
+
+        self._offset = (self._offset + 4) % self._base.shape[1]
+        frame = np.roll(self._base, self._offset, axis=1)
+        noise = self._rng.integers(0, 12, size=frame.shape, dtype=np.uint8)
+        return True, frame + noise
+
+    def release(self):
+        self._opened = False
+
+
+def read_rss_mb() -> float:
+    """RSS actual en MB (Linux: /proc/self/statm; si no, el máximo de getrusage)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+@dataclass
+class SoakSample:
+    elapsed_s: float
+    rss_mb: float
+    traced_mb: float
+    objects: int
+    threads: int
+    fps: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class SoakThresholds:
+    """
+    - warmup_s: segundos iniciales que no cuentan (carga de modelos y cachés)
+    - max_rss_growth_mb / max_rss_slope_mb_h: crecimiento total y tendencia del RSS
+    - max_traced_growth_mb: crecimiento de la memoria de Python (tracemalloc)
+    - max_object_growth: crecimiento relativo de objetos vivos (0.2 = 20%)
+    - max_fps_drop: caída relativa de FPS entre el primer y el último tercio
+    - max_thread_growth: hilos nuevos tolerados
+    """
+    warmup_s: float = 300.0
+    max_rss_growth_mb: float = 64.0
+    max_rss_slope_mb_h: float = 16.0
+    max_traced_growth_mb: float = 32.0
+    max_object_growth: float = 0.2
+    max_fps_drop: float = 0.15
+    max_thread_growth: int = 2
+
+
+def _slope_per_hour(samples: Sequence[SoakSample]) -> float:
+    """Pendiente (MB/h) del RSS por mínimos cuadrados."""
+    xs = np.array([s.elapsed_s for s in samples]) / 3600.0
+    ys = np.array([s.rss_mb for s in samples])
+    if len(xs) < 2 or np.ptp(xs) == 0:
+        return 0.0
+    return float(np.polyfit(xs, ys, 1)[0])
+
+
+def evaluate(samples: Sequence[SoakSample], thresholds: SoakThresholds) -> List[str]:
+    """Fallas detectadas (lista vacía = la corrida pasó)."""
+    steady = [s for s in samples if s.elapsed_s >= thresholds.warmup_s]
+    if len(steady) < 3:
+        return [f"Muy pocas muestras después del calentamiento ({len(steady)})"]
+
+    first, last = steady[0], steady[-1]
+    failures = []
+
+    rss_growth = last.rss_mb - first.rss_mb
+    if rss_growth > thresholds.max_rss_growth_mb:
+        failures.append(f"RSS creció {rss_growth:.1f} MB (máx {thresholds.max_rss_growth_mb:.0f})")
+    slope = _slope_per_hour(steady)
+    if slope > thresholds.max_rss_slope_mb_h:
+        failures.append(f"RSS crece {slope:.1f} MB/h (máx {thresholds.max_rss_slope_mb_h:.0f})")
+
+    traced_growth = last.traced_mb - first.traced_mb
+    if traced_growth > thresholds.max_traced_growth_mb:
+        failures.append(f"Memoria de Python creció {traced_growth:.1f} MB "
+                        f"(máx {thresholds.max_traced_growth_mb:.0f})")
+
+    if first.objects and (last.objects - first.objects) / first.objects > thresholds.max_object_growth:
+        failures.append(f"Objetos vivos: {first.objects} → {last.objects}")
+
+    if last.threads - first.threads > thresholds.max_thread_growth:
+        failures.append(f"Hilos: {first.threads} → {last.threads}")
+
+    third = max(1, len(steady) // 3)
+    for name in first.fps:
+        start = np.mean([s.fps.get(name, 0.0) for s in steady[:third]])
+        end = np.mean([s.fps.get(name, 0.0) for s in steady[-third:]])
+        if start > 0 and end < start * (1.0 - thresholds.max_fps_drop):
+            failures.append(f"FPS de {name} cayó {start:.1f} → {end:.1f}")
+
+    return failures
+
+
+class SoakMonitor:
+    """
+    Toma las muestras y guarda las instantáneas de referencia al terminar
+    el calentamiento (tracemalloc y conteo de objetos por tipo).
+    """
+
+    def __init__(self, trace: bool = True, top: int = 15):
+        self.trace = trace
+        self.top = top
+        self.samples: List[SoakSample] = []
+        self._start = time.perf_counter()
+        self._baseline_snapshot = None
+        self._baseline_types: Optional[Counter] = None
+
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+
+    def sample(self, fps: Dict[str, float]) -> SoakSample:
+        gc.collect()
+        sample = SoakSample(
+            elapsed_s=time.perf_counter() - self._start,
+            rss_mb=read_rss_mb(),
+            traced_mb=tracemalloc.get_traced_memory()[0] / (1024 * 1024) if self.trace else 0.0,
+            objects=len(gc.get_objects()),
+            threads=threading.active_count(),
+            fps=dict(fps),
+        )
+        self.samples.append(sample)
+        return sample
+
+    def mark_baseline(self) -> None:
+        """Fin del calentamiento: referencia para el crecimiento por línea y por tipo."""
+        gc.collect()
+        self._baseline_types = self._count_types()
+        if self.trace:
+            self._baseline_snapshot = self._snapshot()
+
+    @staticmethod
+    def _count_types() -> Counter:
+        return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def growth(self) -> Dict[str, List]:
+        """Líneas y tipos de objeto que más crecieron desde la referencia."""
+        gc.collect()
+        report = {"allocations": [], "types": []}
+
+        if self._baseline_snapshot is not None:
+            stats = self._snapshot().compare_to(self._baseline_snapshot, "lineno")
+            report["allocations"] = [
+                {"where": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1),
+                 "count": stat.count_diff}
+                for stat in stats[:self.top] if stat.size_diff > 0
+            ]
+
+        if self._baseline_types is not None:
+            current = self._count_types()
+            current.subtract(self._baseline_types)
+            report["types"] = [
+                {"type": name, "count": count}
+                for name, count in current.most_common(self.top) if count > 0
+            ]
+        return report
+
+
+def _open_source(args):
+    if args.synthetic:
+        return SyntheticSource(fps=args.fps)
+    return FrameReplayer(args.session, realtime=True, loop=True)
+
+
+def _processed(pipeline) -> int:
+    """
+    Elementos que completó la última etapa del pipeline. Se cuenta en la
+    etapa y no leyendo la salida: leerla por sondeo limitaría la medición
+    al ritmo del sondeo y perdería los que la salida LATEST_ONLY reemplaza.
+    """
+    return pipeline.stats()[pipeline.stages[-1].name]["processed"]
+
+
+def run_soak(args, thresholds: SoakThresholds) -> Dict:
+    source = _open_source(args)
+    frame_bus = FrameBus(source)
+    if not frame_bus.start():
+        raise FileNotFoundError(f"No se pudo abrir la fuente: {args.session or 'sintética'}")
+
+    pipelines = {
+        name: BUILDERS[name](frame_bus, render=args.render).start()
+        for name in args.pipelines
+    }
+    monitor = SoakMonitor(trace=not args.no_tracemalloc)
+    last_processed = {name: _processed(pipeline) for name, pipeline in pipelines.items()}
+
+    start = last_sample = time.perf_counter()
+    baseline_marked = False
+    try:
+        while time.perf_counter() - start < args.duration:
+            # La salida es LATEST_ONLY: no hace falta vaciarla para que el pipeline avance
+            time.sleep(0.2)
+            now = time.perf_counter()
+            if now - last_sample < args.interval:
+                continue
+
+            elapsed = now - last_sample
+            processed = {name: _processed(pipeline) for name, pipeline in pipelines.items()}
+            fps = {name: (processed[name] - last_processed[name]) / elapsed for name in pipelines}
+            last_processed, last_sample = processed, now
+            sample = monitor.sample(fps)
+            print(f"🧪 {sample.elapsed_s / 60:6.1f} min | RSS {sample.rss_mb:7.1f} MB | "
+                  f"py {sample.traced_mb:6.1f} MB | objetos {sample.objects} | hilos {sample.threads} | "
+                  + " ".join(f"{name} {value:.1f} FPS" for name, value in fps.items()))
+
+            if not baseline_marked and sample.elapsed_s >= thresholds.warmup_s:
+                monitor.mark_baseline()
+                baseline_marked = True
+    except KeyboardInterrupt:
+        print("⏹️ Interrumpido: se evalúa lo medido hasta ahora")
+    finally:
+        for pipeline in pipelines.values():
+            pipeline.stop()
+        frame_bus.stop()
+
+    failures = evaluate(monitor.samples, thresholds)
+    return {
+        "source": args.session or "synthetic",
+        "pipelines": list(pipelines),
+        "duration_s": time.perf_counter() - start,
+        "thresholds": asdict(thresholds),
+        "samples": [asdict(s) for s in monitor.samples],
+        "growth": monitor.growth(),
+        "failures": failures,
+        "passed": not failures,
+    }
+
+
+def print_result(report: Dict) -> None:
+    growth = report["growth"]
+    if growth["allocations"]:
+        print("📈 Líneas con más memoria nueva:")
+        for entry in growth["allocations"][:10]:
+            print(f"   {entry['size_kb']:+9.1f} KB ({entry['count']:+d}) {entry['where']}")
+    if growth["types"]:
+        print("📈 Tipos con más objetos nuevos: " + ", ".join(
+            f"{entry['type']} {entry['count']:+d}" for entry in growth["types"][:10]))
+
+    if report["passed"]:
+        print("✅ Soak OK: sin crecimiento de memoria ni caída de FPS")
+    else:
+        print("❌ Soak falló:")
+        for failure in report["failures"]:
+            print(f"   - {failure}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de resistencia de los pipelines")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--session", help="Sesión grabada (se reproduce en bucle)")
+    source.add_argument("--synthetic", action="store_true", help="Frames sintéticos")
+    parser.add_argument("--fps", type=float, default=30.0, help="FPS de la fuente sintética")
+    parser.add_argument("--pipelines", nargs="+", choices=sorted(BUILDERS),
+                        default=sorted(BUILDERS))
+    parser.add_argument("--render", action="store_true",
+                        help="Incluir la etapa de dibujo (overlay + imagen), como en la GUI")
+    duration = parser.add_mutually_exclusive_group()
+    duration.add_argument("--duration", type=float, default=3600.0, help="Segundos de prueba")
+    duration.add_argument("--hours", type=float, help="Horas de prueba")
+    parser.add_argument("--interval", type=float, default=60.0, help="Segundos entre muestras")
+    parser.add_argument("--warmup", type=float, default=300.0, help="Segundos de calentamiento")
+    parser.add_argument("--max-rss-growth", type=float, default=64.0, help="MB")
+    parser.add_argument("--max-rss-slope", type=float, default=16.0, help="MB por hora")
+    parser.add_argument("--max-fps-drop", type=float, default=0.15, help="Fracción (0.15 = 15%%)")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="No trazar asignaciones (menos costo, sin detalle por línea)")
+    parser.add_argument("--output", help="Guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    if args.hours is not None:
+        args.duration = args.hours * 3600.0
+    thresholds = SoakThresholds(
+        warmup_s=args.warmup,
+        max_rss_growth_mb=args.max_rss_growth,
+        max_rss_slope_mb_h=args.max_rss_slope,
+        max_fps_drop=args.max_fps_drop,
+    )
+
+    apply_thread_budget()
+    report = run_soak(args, thresholds)
+    print_result(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Reporte guardado en {args.output}")
+
+    return 0 if report["passed"] else 1
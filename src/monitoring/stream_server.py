@@ -0,0 +1,365 @@
+"""
+Servidor de streaming local: resultados en vivo y vista previa MJPEG.
+
+Servidor asyncio (solo biblioteca estándar) en un hilo daemon, escuchando
+por defecto en 127.0.0.1:
+
+  - GET /events        resultados por frame como Server-Sent Events (JSON);
+                       ?pipeline=gestures filtra un pipeline
+  - GET /preview.mjpg  video anotado en MJPEG a `preview_fps`;
+                       ?pipeline=emotions elige el pipeline (por defecto el
+                       primero que publique)
+  - GET /latest        último resultado de cada pipeline (JSON)
+  - GET /              página mínima con la vista previa y los eventos
+
+El pipeline publica desde una etapa propia (StreamPublisher), nunca desde
+el hilo de Tk. Sin clientes conectados publicar no cuesta nada: no se
+serializa ni se codifica. Los JPEG se codifican en un hilo aparte, como
+mucho `preview_fps` por segundo y solo con algún cliente de video. Cada
+cliente tiene su propia cola corta: si un cliente lento no da abasto se
+descartan sus mensajes más viejos, sin frenar a nadie más.
+
+    METRICS_PORT=9100 STREAM_PORT=8765 python src/app.py
+    python src/run_headless.py --pipeline gestures --stream-port 8765
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+
+from monitoring.metrics import STREAM_DROPPED
+from pipeline.queues import LATEST_ONLY
+from pipeline.serialize import item_to_dict
+
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Vista en vivo</title>
+<style>body{background:#12121a;color:#f8fafc;font-family:sans-serif}
+pre{height:240px;overflow:auto;background:#1e1e2e;padding:8px}</style></head>
+<body><h3>Vista en vivo</h3><img src="/preview.mjpg"><pre id="log"></pre>
+<script>
+const log = document.getElementById("log");
+const events = new EventSource("/events");
+for (const name of ["gestures", "emotions"]) {
+  events.addEventListener(name, (e) => {
+    log.textContent = name + " " + e.data + "\\n" + log.textContent.slice(0, 4000);
+  });
+}
+</script></body></html>
+"""
+
+
+class _Client:
+    """Cola corta de un cliente: al llenarse se descarta lo más viejo."""
+
+    def __init__(self, maxsize: int, stream: str, pipeline: Optional[str] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.pipeline = pipeline
+        self.dropped = 0
+        self._dropped_metric = STREAM_DROPPED.labels(stream=stream)
+
+    def offer(self, message) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self._dropped_metric.inc()
+        self.queue.put_nowait(message)
+
+
+class StreamServer:
+    """
+    - host / port: dirección de escucha (127.0.0.1 = solo esta máquina)
+    - preview_fps: cuadros por segundo máximos de la vista previa
+    - preview_width: ancho del JPEG (alto proporcional)
+    - jpeg_quality: calidad JPEG (0-100)
+    """
+
+    def __init__(self, port: int = 8765, host: str = "127.0.0.1", preview_fps: float = 5.0,
+                 preview_width: int = 480, jpeg_quality: int = 70):
+        self.host = host
+        self.port = port
+        self.preview_interval = 1.0 / preview_fps
+        self.preview_width = preview_width
+        self.jpeg_quality = jpeg_quality
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._error: Optional[BaseException] = None  # fallo al arrancar (puerto ocupado...)
+
+        # Solo los toca el hilo del loop
+        self._event_clients: Set[_Client] = set()
+        self._preview_clients: Set[_Client] = set()
+        self._latest: Dict[str, Dict] = {}
+        self._watchers: Set[asyncio.Future] = set()
+
+        # Contadores leídos desde los hilos del pipeline (lectura atómica)
+        self.event_clients = 0
+        self.preview_clients = 0
+
+        # Vista previa: último frame pendiente de codificar, por pipeline
+        self._pending: Dict[str, Tuple[object, Optional[Callable]]] = {}
+        self._pending_ready = threading.Condition()
+        self._last_preview: Dict[str, float] = {}
+        self._encoder: Optional[threading.Thread] = None
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def start(self) -> "StreamServer":
+        """Arranca el servidor. OSError si no pudo escuchar (puerto ocupado, host inválido)."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run_loop, name="StreamServer", daemon=True)
+        self._thread.start()
+        self._encoder = threading.Thread(target=self._encode_loop, name="StreamEncoder", daemon=True)
+        self._encoder.start()
+        if not self._started.wait(5.0) or self._error is not None:
+            error = self._error or TimeoutError("el servidor no arrancó a tiempo")
+            self.stop()
+            raise OSError(f"No se pudo iniciar el streaming en {self.host}:{self.port}: {error}") \
+                from error
+        print(f"📡 Streaming en http://{self.host}:{self.port}/ (eventos en /events, video en /preview.mjpg)")
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        with self._pending_ready:
+            self._pending_ready.notify_all()
+        loop = self._loop
+        if loop is not None and not loop.is_closed() and self._stopping is not None:
+            loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(2.0)
+        if self._encoder is not None:
+            self._encoder.join(2.0)
+
+    def _run_loop(self):
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            # Sin esto la excepción muere en el hilo y start() no se entera
+            self._error = e
+            self._loop = None
+            self._started.set()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self._started.set()
+        async with server:
+            await self._stopping.wait()
+
+    # ------------------------------------------------------------------
+    # Publicación (desde hilos del pipeline)
+    # ------------------------------------------------------------------
+    @property
+    def has_clients(self) -> bool:
+        return bool(self.event_clients or self.preview_clients)
+
+    def publish(self, pipeline: str, item, draw: Optional[Callable] = None) -> None:
+        """
+        Entrega el resultado de un frame. Retorna enseguida: sin clientes no
+        hace nada, y el JPEG lo codifica el hilo del encoder.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+
+        if self.event_clients:
+            payload = item_to_dict(item)
+            loop.call_soon_threadsafe(self._broadcast_event, pipeline, payload)
+
+        if self.preview_clients:
+            now = time.perf_counter()
+            if now - self._last_preview.get(pipeline, 0.0) >= self.preview_interval:
+                self._last_preview[pipeline] = now
+                with self._pending_ready:
+                    # Si el anterior no se codificó todavía, se reemplaza
+                    self._pending[pipeline] = (item, draw)
+                    self._pending_ready.notify()
+
+    def _encode_loop(self):
+        """Hilo del encoder: JPEG del último frame pendiente."""
+        while self._running:
+            with self._pending_ready:
+                while not self._pending and self._running:
+                    self._pending_ready.wait(0.5)
+                pending, self._pending = self._pending, {}
+
+            for pipeline, (item, draw) in pending.items():
+                jpeg = self._encode(item, draw)
+                if jpeg is not None and self._loop is not None:
+                    self._loop.call_soon_threadsafe(self._broadcast_preview, pipeline, jpeg)
+
+    def _encode(self, item, draw: Optional[Callable]) -> Optional[bytes]:
+        frame = item.frame
+        # Si la etapa de dibujo no corrió (p. ej. sin GUI), dibujar aquí sobre una copia
+        if draw is not None and "image" not in item.data:
+            frame = draw(frame.copy(), item)
+
+        height, width = frame.shape[:2]
+        if width > self.preview_width:
+            size = (self.preview_width, int(height * self.preview_width / width))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buffer.tobytes() if ok else None
+
+    # ------------------------------------------------------------------
+    # Difusión (hilo del loop)
+    # ------------------------------------------------------------------
+    def _broadcast_event(self, pipeline: str, payload: Dict) -> None:
+        self._latest[pipeline] = payload
+        message = f"event: {pipeline}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+        for client in self._event_clients:
+            if client.pipeline in (None, pipeline):
+                client.offer(message)
+
+    def _broadcast_preview(self, pipeline: str, jpeg: bytes) -> None:
+        part = (b"--frame\r\nContent-Type: image/jpeg\r\n"
+                b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+        for client in self._preview_clients:
+            if client.pipeline is None:
+                client.pipeline = pipeline
+            if client.pipeline == pipeline:
+                client.offer(part)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5.0)
+            method, target = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ")[:2]
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+
+            if method != "GET":
+                await self._respond(writer, 405, "text/plain", b"Method Not Allowed")
+            elif url.path == "/events":
+                self._watch_disconnect(reader)
+                await self._stream_events(writer, query.get("pipeline", [None])[0])
+            elif url.path == "/preview.mjpg":
+                self._watch_disconnect(reader)
+                await self._stream_preview(writer, query.get("pipeline", [None])[0])
+            elif url.path == "/latest":
+                body = json.dumps(self._latest).encode("utf-8")
+                await self._respond(writer, 200, "application/json", body)
+            elif url.path == "/":
+                await self._respond(writer, 200, "text/html; charset=utf-8", _PAGE.encode("utf-8"))
+            else:
+                await self._respond(writer, 404, "text/plain", b"Not Found")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                asyncio.CancelledError, ConnectionError, ValueError):
+            # CancelledError: el cliente se desconectó o el servidor se está cerrando
+            pass
+        finally:
+            writer.close()
+
+    def _watch_disconnect(self, reader: asyncio.StreamReader) -> None:
+        """
+        Cancela el stream actual cuando el cliente cierra la conexión, aunque
+        no haya nada que enviarle (si no, seguiría contando como cliente).
+        """
+        stream = asyncio.current_task()
+
+        async def watch():
+            try:
+                while await reader.read(1024):
+                    pass
+            except ConnectionError:
+                pass
+            stream.cancel()
+
+        task = asyncio.ensure_future(watch())
+        self._watchers.add(task)
+        task.add_done_callback(self._watchers.discard)
+
+    @staticmethod
+    async def _respond(writer, status: int, content_type: str, body: bytes) -> None:
+        reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _stream_events(self, writer, pipeline: Optional[str]) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        client = _Client(maxsize=32, stream="events", pipeline=pipeline)
+        self._event_clients.add(client)
+        self.event_clients = len(self._event_clients)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(client.queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    message = b": ping\n\n"   # mantiene viva la conexión
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self._event_clients.discard(client)
+            self.event_clients = len(self._event_clients)
+
+    async def _stream_preview(self, writer, pipeline: Optional[str]) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: multipart/x-mixed-replace; boundary=frame\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        client = _Client(maxsize=1, stream="preview", pipeline=pipeline)
+        self._preview_clients.add(client)
+        self.preview_clients = len(self._preview_clients)
+        try:
+            while True:
+                writer.write(await client.queue.get())
+                await writer.drain()
+        finally:
+            self._preview_clients.discard(client)
+            self.preview_clients = len(self._preview_clients)
+
+
+class StreamPublisher:
+    """
+    Etapa final de un pipeline que publica cada resultado en el servidor
+    y lo deja pasar sin cambios. `draw` anota el frame de la vista previa
+    cuando el pipeline no tiene etapa de dibujo.
+    """
+
+    def __init__(self, server: StreamServer, pipeline: str, draw: Optional[Callable] = None):
+        self.server = server
+        self.pipeline = pipeline
+        self.draw = draw
+
+    def __call__(self, item):
+        self.server.publish(self.pipeline, item, self.draw)
+        return item
+
+
+_server: Optional[StreamServer] = None
+
+
+def start_stream_server(port: int = 8765, host: str = "127.0.0.1", **kwargs) -> StreamServer:
+    """Arranca (una sola vez) el servidor de streaming del proceso."""
+    global _server
+    if _server is None:
+        _server = StreamServer(port, host, **kwargs).start()
+    return _server
+
+
+def attach_stream(pipeline, draw: Optional[Callable] = None):
+    """
+    Agrega la etapa de publicación al final del pipeline si el servidor
+    está en marcha (llamar antes de pipeline.start()).
+    """
+    if _server is not None:
+        pipeline.add_stage("stream", StreamPublisher(_server, pipeline.name, draw),
+                           policy=LATEST_ONLY)
+    return pipeline
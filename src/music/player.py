@@ -7,6 +7,8 @@ import time
 from collections import Counter
 from typing import Optional
 from .emotion_mapper import EmotionMapper
+from monitoring.metrics import MUSIC_SWITCHES
+from monitoring.latency import LATENCY
 
 
 class MusicPlayer:
@@ -29,6 +31,7 @@ class MusicPlayer:
         
         # Sistema de estabilización
         self.emotion_history = []
+        self.emotion_timestamps = []  # Instante de captura de cada detección
         self.BUFFER_SIZE = 60  # Últimas 60 detecciones (~20 segundos a 3 FPS)
         self.MIN_PERCENTAGE = 0.6  # 60% para considerar estable
         self.MIN_SAMPLES = 30  # Mínimo 30 muestras antes de decidir
@@ -44,22 +47,26 @@ class MusicPlayer:
         print(f"📊 Buffer: {self.BUFFER_SIZE} detecciones")
         print(f"📈 Umbral de cambio: {self.MIN_PERCENTAGE*100}%")
     
-    def update_emotion(self, detected_emotion: str):
+    def update_emotion(self, detected_emotion: str, capture_ts: Optional[float] = None):
         """
         Actualiza el historial de emociones y decide si cambiar la música.
         
         Args:
             detected_emotion: Emoción detectada en el frame actual
+            capture_ts: Instante de captura del frame (time.perf_counter),
+                para medir la latencia captura -> cambio de música
         """
         if detected_emotion is None:
             return
         
         # Agregar a historial
         self.emotion_history.append(detected_emotion)
+        self.emotion_timestamps.append(capture_ts)
         
         # Mantener solo las últimas N detecciones
         if len(self.emotion_history) > self.BUFFER_SIZE:
             self.emotion_history.pop(0)
+            self.emotion_timestamps.pop(0)
         
         # Calcular emoción dominante solo si tenemos suficientes muestras
         if len(self.emotion_history) >= self.MIN_SAMPLES:
@@ -67,7 +74,7 @@ class MusicPlayer:
             
             # Cambiar música solo si la emoción dominante cambió
             if dominant_emotion != self.current_stable_emotion:
-                self._change_music(dominant_emotion)
+                self._change_music(dominant_emotion, capture_ts)
     
     def _get_dominant_emotion(self) -> Optional[str]:
         """
@@ -93,13 +100,14 @@ class MusicPlayer:
             # Si ninguna emoción es dominante, mantener la actual
             return self.current_stable_emotion
     
-    def _change_music(self, new_emotion: str):
+    def _change_music(self, new_emotion: str, capture_ts: Optional[float] = None):
         """
         Cambia la música a la correspondiente a la nueva emoción.
         Incluye fade out/in para transición suave.
         
         Args:
             new_emotion: Nueva emoción a reproducir
+            capture_ts: Instante de captura del frame que disparó el cambio
         """
         # Obtener ruta del archivo de música
         music_path = self.emotion_mapper.get_music_path(new_emotion)
@@ -129,12 +137,29 @@ class MusicPlayer:
             self.current_music_path = music_path
             self.current_stable_emotion = new_emotion
             self.is_playing = True
+            MUSIC_SWITCHES.inc()
+            self._record_latency(new_emotion, capture_ts)
             
             print(f"✅ Reproduciendo: {new_emotion}")
             
         except Exception as e:
             print(f"❌ Error al reproducir música: {e}")
     
+    def _record_latency(self, new_emotion: str, capture_ts: Optional[float]):
+        """
+        Registra dos latencias del cambio de música:
+        - music_trigger: desde el frame que inclinó la balanza
+        - music_onset: desde la primera detección de la nueva emoción en el buffer
+        """
+        LATENCY.record("music_trigger", capture_ts)
+
+        onset = next(
+            (ts for emotion, ts in zip(self.emotion_history, self.emotion_timestamps)
+             if emotion == new_emotion and ts is not None),
+            None,
+        )
+        LATENCY.record("music_onset", onset)
+
     def play(self):
         """Inicia la reproducción de música"""
         if self.current_music_path and not self.is_playing:
@@ -163,6 +188,7 @@ class MusicPlayer:
         self.current_music_path = None
         self.current_stable_emotion = None
         self.emotion_history.clear()
+        self.emotion_timestamps.clear()
         print("⏹️ Música detenida")
     
     def set_volume(self, volume: float):
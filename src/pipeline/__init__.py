@@ -0,0 +1,15 @@
+"""
+Pipeline por etapas: hilos conectados por colas acotadas con descarte
+"""
+
+from .queues import BLOCK, DROP_OLDEST, LATEST_ONLY, QueueClosed, StageQueue
+from .runtime import FrameItem, FrameSource, Pipeline, Stage
+from .supervisor import CameraSpec, CameraSupervisor
+from .thread_budget import ThreadBudget, apply_thread_budget, current_thread_budget
+
+__all__ = [
+    'BLOCK', 'DROP_OLDEST', 'LATEST_ONLY', 'QueueClosed', 'StageQueue',
+    'FrameItem', 'FrameSource', 'Pipeline', 'Stage',
+    'CameraSpec', 'CameraSupervisor',
+    'ThreadBudget', 'apply_thread_budget', 'current_thread_budget',
+]
@@ -0,0 +1,140 @@
+"""
+Etapas del pipeline de emociones.
+
+    captura -> emotion_analyze -> emotion_tally [-> render]
+
+- emotion_analyze: MotionGate + detector de emociones (o solo presencia en espera)
+- emotion_tally: contadores, historial, eventos destacados y música con
+  cada resultado nuevo
+- render (opcional): overlay + imagen lista para la GUI
+
+Los contadores se llevan en una etapa y no en la GUI: la salida del
+pipeline es LATEST_ONLY y la GUI puede no ver todos los resultados.
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List
+
+from monitoring.metrics import FRAMES_ANALYZED
+from pipeline.queues import BLOCK, LATEST_ONLY
+from pipeline.runtime import FrameItem, FrameSource, Pipeline
+from vision.emotion_events import EmotionEventDetector
+from vision.emotion_result import EmotionResult
+
+
+class EmotionAnalysisStage:
+    """Analiza emociones, reutilizando el último resultado si la escena no cambió."""
+
+    def __init__(self, emotion_recognizer, motion_gate, idle_monitor):
+        self.emotion_recognizer = emotion_recognizer
+        self.motion_gate = motion_gate
+        self.idle_monitor = idle_monitor
+        self._analyzed_metric = FRAMES_ANALYZED.labels(pipeline="emotions")
+
+    def __call__(self, item: FrameItem) -> FrameItem:
+        data = item.data
+        data["fresh"] = False
+
+        # Nadie frente a la cámara: solo comprobar presencia en un frame reducido
+        if self.idle_monitor.is_idle:
+            small = self.idle_monitor.downscale(item.frame)
+            present = self.emotion_recognizer.detect(small).top_emotion is not None
+            self.idle_monitor.update(present)
+            if present:
+                # Volver a análisis completo ya en el siguiente frame
+                self.motion_gate.reset()
+            data["result"] = EmotionResult(capture_ts=item.capture_ts)
+            data["idle"] = self.idle_monitor.is_idle
+            return item
+
+        if self.motion_gate.should_analyze(item.frame):
+            result = self.emotion_recognizer.detect(item.frame, item.capture_ts)
+            self._analyzed_metric.inc()
+            self.motion_gate.store(result)
+            self.idle_monitor.update(result.top_emotion is not None)
+            data["fresh"] = True
+        else:
+            result = self.motion_gate.last_result
+
+        data["result"] = result
+        data["idle"] = self.idle_monitor.is_idle
+        return item
+
+
+class EmotionTallyStage:
+    """
+    Cuenta emociones, guarda el historial, detecta eventos destacados y
+    actualiza la música, solo con resultados nuevos (no con los
+    reutilizados por el MotionGate). El historial conserva las últimas
+    `max_history` detecciones; los contadores cubren toda la sesión.
+    Otros hilos (la GUI) leen el historial con `snapshot`.
+    """
+
+    def __init__(self, music_player=None, max_history: int = 20000):
+        self.music_player = music_player
+        self.counts: Dict[str, int] = {}
+        # Acotado: en sesiones de días la lista crecería sin límite
+        self.history: Deque[dict] = deque(maxlen=max_history)
+        self._history_lock = threading.Lock()
+        self.events = EmotionEventDetector()
+
+    def __call__(self, item: FrameItem) -> FrameItem:
+        result = item.data["result"]
+        top_emotion = result.top_emotion
+        item.data["new_event"] = None
+
+        if item.data["idle"]:
+            # Sin nadie frente a la cámara se cierra el evento en curso
+            item.data["new_event"] = self.events.finish()
+        elif item.data["fresh"]:
+            item.data["new_event"] = self.events.update(
+                result.emotions if top_emotion is not None else None
+            )
+
+        if item.data["fresh"] and top_emotion is not None:
+            self.counts[top_emotion] = self.counts.get(top_emotion, 0) + 1
+            entry = {
+                "time": datetime.now().strftime("%H:%M:%S"),
+                "emotion": top_emotion,
+                "score": float(result.confidence),
+            }
+            with self._history_lock:
+                self.history.append(entry)
+            if self.music_player is not None:
+                self.music_player.update_emotion(top_emotion, result.capture_ts)
+
+        item.data["counts"] = dict(self.counts)
+        return item
+
+    def snapshot(self) -> List[dict]:
+        """Copia del historial, segura de iterar mientras el pipeline agrega."""
+        with self._history_lock:
+            return list(self.history)
+
+
+def build_emotion_pipeline(frame_bus, emotion_recognizer, motion_gate, idle_monitor,
+                           music_player=None, render=None) -> Pipeline:
+    """
+    Arma el pipeline de emociones. La etapa de conteo queda en
+    `pipeline.tally` (contadores, historial y eventos para la GUI y el reporte).
+    """
+    def min_interval():
+        return idle_monitor.idle_interval_ms / 1000.0 if idle_monitor.is_idle else 0.0
+
+    tally = EmotionTallyStage(music_player)
+
+    pipeline = Pipeline("emotions")
+    pipeline.add_source("capture", FrameSource(frame_bus, "emotions", min_interval))
+    # El análisis es lento (FER): siempre sobre el frame más nuevo
+    pipeline.add_stage("emotion_analyze",
+                       EmotionAnalysisStage(emotion_recognizer, motion_gate, idle_monitor),
+                       policy=LATEST_ONLY)
+    # Conteo barato; BLOCK para no perder resultados en los contadores
+    pipeline.add_stage("emotion_tally", tally, queue_size=4, policy=BLOCK)
+    if render is not None:
+        pipeline.add_stage("render", render, policy=LATEST_ONLY)
+
+    pipeline.tally = tally
+    return pipeline
@@ -0,0 +1,143 @@
+"""
+Etapas del pipeline de gestos.
+
+    captura -> hand_process -> gesture_classify -> gesture_action [-> render]
+
+- hand_process: MotionGate + HandTracker (o solo presencia en modo espera)
+- gesture_classify: GestureRecognizer con todas las manos en una llamada
+- gesture_action: envía la tecla cuando cambia el gesto de cada mano
+- render (opcional): overlay + imagen lista para la GUI
+
+La usan GesturesWindow y el runner sin GUI (pipeline.headless).
+"""
+
+from typing import Dict, Optional
+
+from monitoring.metrics import FRAMES_ANALYZED
+from pipeline.queues import DROP_OLDEST, LATEST_ONLY
+from pipeline.runtime import FrameItem, FrameSource, Pipeline
+from vision.hand_tracker import HandResult, HandTracker
+
+
+class HandAnalysisStage:
+    """Detecta manos, reutilizando el último resultado si la escena no cambió."""
+
+    def __init__(self, hand_tracker, motion_gate, idle_monitor):
+        self.hand_tracker = hand_tracker
+        self.motion_gate = motion_gate
+        self.idle_monitor = idle_monitor
+        self._analyzed_metric = FRAMES_ANALYZED.labels(pipeline="gestures")
+
+    def __call__(self, item: FrameItem) -> FrameItem:
+        data = item.data
+        data["fresh"] = False
+
+        # Nadie frente a la cámara: solo comprobar presencia en un frame reducido
+        if self.idle_monitor.is_idle:
+            small = self.idle_monitor.downscale(item.frame)
+            present = self.hand_tracker.detect(small).has_hands
+            self.idle_monitor.update(present)
+            if present:
+                # Volver a análisis completo ya en el siguiente frame
+                self.motion_gate.reset()
+                self.hand_tracker.reset_roi()
+            data["hand_result"] = HandResult(capture_ts=item.capture_ts)
+            data["idle"] = self.idle_monitor.is_idle
+            return item
+
+        if self.motion_gate.should_analyze(item.frame):
+            hand_result = self.hand_tracker.detect(item.frame, item.capture_ts)
+            self._analyzed_metric.inc()
+            self.motion_gate.store(hand_result)
+            self.idle_monitor.update(hand_result.has_hands)
+            data["fresh"] = True
+        else:
+            hand_result = self.motion_gate.last_result
+
+        data["hand_result"] = hand_result
+        data["idle"] = self.idle_monitor.is_idle
+        return item
+
+
+class GestureClassifyStage:
+    """Clasifica todas las manos del frame; deja {mano: gesto} en data["gestures"]."""
+
+    def __init__(self, gesture_recognizer, hands=HandTracker.HANDS):
+        self.gesture_recognizer = gesture_recognizer
+        self.hands = hands
+
+    def __call__(self, item: FrameItem) -> FrameItem:
+        hand_result = item.data["hand_result"]
+        gestures = self.gesture_recognizer.classify_batch(
+            hand_result.landmarks_list, hand_result.handedness_list,
+            hand_result.aspect_ratio,
+        )
+
+        hand_gestures = {hand: "UNKNOWN" for hand in self.hands}
+        for hand, gesture in zip(hand_result.handedness_list, gestures):
+            hand_gestures[hand] = gesture
+        item.data["gestures"] = hand_gestures
+        return item
+
+
+class GestureActionStage:
+    """
+    Envía la tecla de cada mano cuando su gesto cambia (flanco, no nivel).
+
+    `enabled` lo cambia la GUI (switch de control); un bool se puede
+    asignar desde otro hilo sin lock.
+    """
+
+    def __init__(self, keyboard_controller, hands=HandTracker.HANDS, enabled: bool = False):
+        self.keyboard_controller = keyboard_controller
+        self.hands = hands
+        self.enabled = enabled
+        self.last_sent: Dict[str, Optional[str]] = {hand: None for hand in hands}
+
+    def __call__(self, item: FrameItem) -> FrameItem:
+        gestures = item.data["gestures"]
+        capture_ts = item.data["hand_result"].capture_ts
+        keys = {}
+
+        for hand in self.hands:
+            gesture = gestures[hand]
+            if not self.enabled or gesture == "UNKNOWN" or item.data.get("idle"):
+                self.last_sent[hand] = None
+                keys[hand] = None
+                continue
+
+            mapped_key = self.keyboard_controller.get_mapping(gesture, hand)
+            if gesture != self.last_sent[hand] and mapped_key:
+                self.keyboard_controller.press_for_gesture(gesture, hand, capture_ts)
+                self.last_sent[hand] = gesture
+            keys[hand] = mapped_key
+
+        item.data["keys"] = keys
+        return item
+
+
+def build_gesture_pipeline(frame_bus, hand_tracker, gesture_recognizer, keyboard_controller,
+                           motion_gate, idle_monitor, render=None) -> Pipeline:
+    """
+    Arma el pipeline de gestos. La etapa de acción queda en
+    `pipeline.action` para que la GUI active/desactive el control.
+    `render` es una etapa opcional de dibujo (ver pipeline.render).
+    """
+    def min_interval():
+        return idle_monitor.idle_interval_ms / 1000.0 if idle_monitor.is_idle else 0.0
+
+    action = GestureActionStage(keyboard_controller)
+
+    pipeline = Pipeline("gestures")
+    pipeline.add_source("capture", FrameSource(frame_bus, "gestures", min_interval))
+    # La detección es la etapa lenta: solo debe ver el frame más nuevo
+    pipeline.add_stage("hand_process", HandAnalysisStage(hand_tracker, motion_gate, idle_monitor),
+                       policy=LATEST_ONLY)
+    pipeline.add_stage("gesture_classify", GestureClassifyStage(gesture_recognizer),
+                       queue_size=2, policy=DROP_OLDEST)
+    pipeline.add_stage("gesture_action", action, queue_size=2, policy=DROP_OLDEST)
+    if render is not None:
+        pipeline.add_stage("render", render, policy=LATEST_ONLY)
+
+    pipeline.action = action
+    return pipeline
@@ -0,0 +1,188 @@
+"""
+Runner sin GUI: ejecuta el pipeline de gestos o de emociones y muestra
+estadísticas periódicas (FPS de salida y descartes por etapa).
+
+Uso (desde la raíz del repo):
+    python src/run_headless.py --pipeline gestures --duration 60
+    python src/run_headless.py --pipeline gestures --control    # envía teclas
+    python src/run_headless.py --pipeline emotions --music
+    python src/run_headless.py --pipeline gestures --stream-port 8765
+    python src/run_headless.py --pipeline gestures --export-video videos
+"""
+
+import argparse
+import time
+
+from monitoring.latency import LATENCY
+from monitoring.stream_server import attach_stream, start_stream_server
+from pipeline.queues import QueueClosed
+from pipeline.thread_budget import apply_thread_budget, pinned_for
+from vision.frame_bus import acquire_frame_bus, release_frame_bus
+from vision.idle_monitor import IdleMonitor
+from vision.motion_gate import MotionGate
+from vision.video_export import VideoExportConfig, attach_video_export
+
+
+def _overlay_draw(pipeline: str):
+    """draw(frame, item) con el overlay de las vistas para ese pipeline."""
+    from vision.overlay import OverlayRenderer
+
+    overlay = OverlayRenderer()
+    if pipeline == "gestures":
+        return lambda frame, item: overlay.draw_hands(frame, item.data["hand_result"])
+    return lambda frame, item: overlay.draw_emotion(frame, item.data["result"])
+
+
+def _render_stage(pipeline: str):
+    """Etapa de dibujo como la de las vistas (overlay + imagen escalada), sin mostrarla."""
+    from pipeline.render import RenderStage
+
+    return RenderStage(_overlay_draw(pipeline))
+
+
+def build_gestures(frame_bus, control: bool = False, music: bool = False,
+                   render: bool = False):
+    from control.keyboard_controller import KeyboardController
+    from pipeline.gestures import build_gesture_pipeline
+    from vision.gesture_recognizer import GestureRecognizer
+    from vision.gesture_templates import TemplateGestureRecognizer
+    from vision.hand_tracker import HandTracker
+
+    keyboard_controller = KeyboardController()
+    keyboard_controller.load_profiles()
+    templates = TemplateGestureRecognizer()
+    templates.load()
+
+    with pinned_for("gestures", "hand_process"):
+        hand_tracker = HandTracker(max_num_hands=2, inference_width=640, smooth_landmarks=True)
+
+    pipeline = build_gesture_pipeline(
+        frame_bus,
+        hand_tracker,
+        GestureRecognizer(templates=templates),
+        keyboard_controller,
+        MotionGate(max_reuse_age=0.25),
+        IdleMonitor(active_interval_ms=30, idle_interval_ms=400),
+        render=_render_stage("gestures") if render else None,
+    )
+    pipeline.action.enabled = control
+    return pipeline
+
+
+def build_emotions(frame_bus, control: bool = False, music: bool = False,
+                   render: bool = False):
+    from pipeline.emotions import build_emotion_pipeline
+    from vision.emotion_backends import create_emotion_recognizer
+
+    music_player = None
+    if music:
+        from music.player import MusicPlayer
+        music_player = MusicPlayer()
+
+    with pinned_for("emotions", "emotion_analyze"):
+        emotion_recognizer = create_emotion_recognizer()
+
+    return build_emotion_pipeline(
+        frame_bus,
+        emotion_recognizer,
+        MotionGate(max_reuse_age=1.0),
+        IdleMonitor(active_interval_ms=80, idle_interval_ms=500),
+        music_player,
+        render=_render_stage("emotions") if render else None,
+    )
+
+
+BUILDERS = {
+    "gestures": build_gestures,
+    "emotions": build_emotions,
+}
+
+
+def describe(item) -> str:
+    """Resumen de una línea de la salida del pipeline."""
+    data = item.data
+    if data.get("idle"):
+        return "💤 en espera"
+    if "gestures" in data:
+        return " | ".join(f"{hand}: {gesture}" for hand, gesture in data["gestures"].items())
+    result = data["result"]
+    if result.top_emotion is None:
+        return "sin cara"
+    return f"{result.top_emotion} ({result.confidence * 100:.0f}%)"
+
+
+def print_stats(pipeline, outputs: int, elapsed: float, last_item) -> None:
+    fps = outputs / elapsed if elapsed > 0 else 0.0
+    print(f"📊 {pipeline.name}: {fps:.1f} FPS de salida | {describe(last_item) if last_item else '---'}")
+    for name, stats in pipeline.stats().items():
+        print(f"   {name:18s} procesados {stats['processed']:6d} | "
+              f"descartados {stats['dropped']:5d} | errores {stats['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta un pipeline sin interfaz gráfica")
+    parser.add_argument("--pipeline", choices=sorted(BUILDERS), default="gestures")
+    parser.add_argument("--camera", type=int, default=0, help="Índice de la cámara")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Segundos a ejecutar (por defecto hasta Ctrl+C)")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="Segundos entre estadísticas")
+    parser.add_argument("--control", action="store_true", help="Enviar teclas (gestos)")
+    parser.add_argument("--music", action="store_true", help="Reproducir música (emociones)")
+    parser.add_argument("--export-video", metavar="CARPETA", default=None,
+                        help="Exportar el video anotado (códec y ritmo: EXPORT_CODEC, EXPORT_FPS, EXPORT_EVERY...)")
+    parser.add_argument("--stream-port", type=int, default=None,
+                        help="Servir resultados (SSE) y video (MJPEG) en este puerto")
+    parser.add_argument("--stream-host", default="127.0.0.1",
+                        help="Dirección del streaming (127.0.0.1 = solo esta máquina)")
+    args = parser.parse_args(argv)
+
+    apply_thread_budget()
+    if args.stream_port:
+        try:
+            start_stream_server(args.stream_port, args.stream_host)
+        except OSError as e:
+            print(f"❌ {e}")
+            return 1
+
+    frame_bus = acquire_frame_bus(args.camera)
+    if frame_bus is None:
+        print("❌ No se pudo abrir la cámara")
+        return 1
+
+    pipeline = BUILDERS[args.pipeline](frame_bus, control=args.control, music=args.music)
+    attach_video_export(pipeline, draw=_overlay_draw(args.pipeline),
+                        config=VideoExportConfig.from_env(args.export_video))
+    if args.stream_port:
+        attach_stream(pipeline, draw=_overlay_draw(args.pipeline))
+    pipeline.start()
+    print(f"▶️ Pipeline '{args.pipeline}' en marcha (Ctrl+C para terminar)")
+
+    start = last_report = time.perf_counter()
+    outputs = 0
+    last_item = None
+    try:
+        while args.duration is None or time.perf_counter() - start < args.duration:
+            item = pipeline.output.get(timeout=0.2)
+            if item is not None:
+                outputs += 1
+                last_item = item
+
+            now = time.perf_counter()
+            if now - last_report >= args.interval:
+                print_stats(pipeline, outputs, now - start, last_item)
+                last_report = now
+    except (KeyboardInterrupt, QueueClosed):
+        pass
+    finally:
+        pipeline.stop()
+        if pipeline.video_export is not None:
+            pipeline.video_export.stop()
+        tally = getattr(pipeline, "tally", None)
+        if tally is not None and tally.music_player is not None:
+            tally.music_player.stop()
+        release_frame_bus(frame_bus)
+
+    print_stats(pipeline, outputs, time.perf_counter() - start, last_item)
+    LATENCY.print_summary()
+    return 0
@@ -0,0 +1,131 @@
+"""
+Colas acotadas entre etapas del pipeline, con política de descarte.
+
+Cuando una etapa no da abasto, la cola de entrada decide qué hacer con
+el trabajo que sobra en lugar de acumular latencia:
+
+  - BLOCK: el productor espera a que haya lugar (no se pierde nada)
+  - DROP_OLDEST: se descarta lo más viejo de la cola para meter lo nuevo
+  - LATEST_ONLY: solo se guarda el último elemento (tamaño 1, reemplaza)
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from monitoring.metrics import QUEUE_DROPPED
+
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+LATEST_ONLY = "latest_only"
+POLICIES = (BLOCK, DROP_OLDEST, LATEST_ONLY)
+
+
+class QueueClosed(Exception):
+    """La cola se cerró: el pipeline se está deteniendo."""
+
+
+class StageQueue:
+    """
+    Cola acotada y thread-safe con política de descarte.
+
+    - maxsize: elementos como máximo (LATEST_ONLY siempre usa 1)
+    - policy: BLOCK, DROP_OLDEST o LATEST_ONLY
+    - name: nombre para métricas y estadísticas
+    """
+
+    def __init__(self, maxsize: int = 2, policy: str = DROP_OLDEST, name: str = "queue"):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de cola desconocida: '{policy}'")
+
+        self.maxsize = 1 if policy == LATEST_ONLY else max(1, maxsize)
+        self.policy = policy
+        self.name = name
+
+        self._items: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        self.dropped = 0
+        self._dropped_metric = QUEUE_DROPPED.labels(queue=name)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> bool:
+        """
+        Encola un elemento según la política.
+        Devuelve False si hubo que descartar algo (o si BLOCK agotó el timeout).
+        """
+        with self._lock:
+            if self._closed:
+                raise QueueClosed(self.name)
+
+            if len(self._items) < self.maxsize:
+                self._items.append(item)
+                self._not_empty.notify()
+                return True
+
+            if self.policy == BLOCK:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while len(self._items) >= self.maxsize and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._not_full.wait(remaining)
+                if self._closed:
+                    raise QueueClosed(self.name)
+                self._items.append(item)
+                self._not_empty.notify()
+                return True
+
+            # DROP_OLDEST y LATEST_ONLY: sale el más viejo, entra el nuevo
+            self._items.popleft()
+            self._items.append(item)
+            self.dropped += 1
+            self._not_empty.notify()
+
+        self._dropped_metric.inc()
+        return False
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Saca el elemento más viejo, esperando hasta `timeout` segundos.
+        Devuelve None si no llegó nada; lanza QueueClosed si la cola se cerró vacía.
+        """
+        with self._lock:
+            if not self._items and not self._closed:
+                self._not_empty.wait(timeout)
+            if not self._items:
+                if self._closed:
+                    raise QueueClosed(self.name)
+                return None
+
+            item = self._items.popleft()
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self) -> Optional[Any]:
+        """Saca un elemento si hay, sin esperar (None si está vacía)."""
+        with self._lock:
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._not_full.notify()
+            return item
+
+    def close(self) -> None:
+        """Despierta a productores y consumidores bloqueados; no acepta más elementos."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
@@ -0,0 +1,35 @@
+"""
+Etapa de dibujo: overlay + conversión a imagen para la GUI.
+
+Dibujar, pasar a RGB y escalar cuesta varios ms por frame; hacerlo en una
+etapa propia deja al hilo de Tk solo el PhotoImage (que sí debe crearse
+en el hilo de la GUI).
+"""
+
+from typing import Callable, Tuple
+
+import cv2
+from PIL import Image
+
+from pipeline.runtime import FrameItem
+
+
+class RenderStage:
+    """
+    - draw: draw(frame_bgr, item) -> frame anotado (puede dibujar sobre el
+      frame, que es copia propia del pipeline)
+    - size: tamaño de la imagen para el label de video
+    - enabled: la GUI lo pone en False cuando la ventana no está visible
+    """
+
+    def __init__(self, draw: Callable, size: Tuple[int, int] = (640, 420)):
+        self.draw = draw
+        self.size = size
+        self.enabled = True
+
+    def __call__(self, item: FrameItem) -> FrameItem:
+        if self.enabled:
+            annotated = self.draw(item.frame, item)
+            frame_rgb = cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
+            item.data["image"] = Image.fromarray(frame_rgb).resize(self.size, Image.LANCZOS)
+        return item
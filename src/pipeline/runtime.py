@@ -0,0 +1,224 @@
+"""
+Runtime de pipeline por etapas.
+
+Cada etapa corre en su propio hilo y se conecta con la siguiente por una
+StageQueue acotada. Así, mientras una etapa analiza el frame N, la
+anterior ya puede estar trabajando en el N+1: el trabajo se reparte entre
+núcleos en lugar de hacerse en serie dentro del callback de la GUI.
+
+MediaPipe, TensorFlow y OpenCV liberan el GIL durante la inferencia, por
+lo que los hilos sí corren en paralelo en la parte costosa. La captura ya
+vive fuera (FrameBus, memoria compartida entre procesos).
+
+    pipeline = Pipeline("gestures")
+    pipeline.add_source("capture", FrameSource(bus, "gestures"))
+    pipeline.add_stage("hand_process", analyze, policy=LATEST_ONLY)
+    pipeline.add_stage("gesture_classify", classify)
+    pipeline.start()
+    item = pipeline.output.get(timeout=0.1)
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from monitoring.metrics import FRAMES_DROPPED, STAGE_LATENCY
+from pipeline.queues import DROP_OLDEST, LATEST_ONLY, QueueClosed, StageQueue
+from pipeline.thread_budget import current_thread_budget, pin_current_thread
+
+
+@dataclass
+class FrameItem:
+    """
+    Unidad de trabajo que recorre el pipeline.
+
+      - seq: número de secuencia del frame en el FrameBus
+      - capture_ts: instante de captura (time.perf_counter)
+      - frame: imagen BGR (copia propia del pipeline)
+      - data: resultados que cada etapa va agregando
+    """
+    seq: int
+    capture_ts: float
+    frame: np.ndarray
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class FrameSource:
+    """
+    Fuente de frames desde un FrameBus.
+
+    Copia cada frame (las etapas lo retienen más de lo que el anillo
+    garantiza una vista intacta) y cuenta los frames que el pipeline se
+    saltó. `min_interval` (callable, en segundos) permite bajar la
+    frecuencia, p. ej. en modo espera.
+    """
+
+    def __init__(self, frame_bus, pipeline_name: str,
+                 min_interval: Optional[Callable[[], float]] = None):
+        self.frame_bus = frame_bus
+        self.min_interval = min_interval
+        self.last_seq = -1
+        self._last_time = 0.0
+        self._dropped_metric = FRAMES_DROPPED.labels(pipeline=pipeline_name)
+
+    def __call__(self) -> Optional[FrameItem]:
+        if self.min_interval is not None:
+            wait = self._last_time + self.min_interval() - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+
+        packet = self.frame_bus.wait_for_frame(self.last_seq, timeout=0.2, copy=True)
+        if packet is None:
+            return None
+
+        seq, capture_ts, frame = packet
+        if self.last_seq >= 0 and seq > self.last_seq + 1:
+            self._dropped_metric.inc(seq - self.last_seq - 1)
+        self.last_seq = seq
+        self._last_time = time.perf_counter()
+        return FrameItem(seq, capture_ts, frame)
+
+
+class Stage:
+    """
+    Una etapa: toma elementos de `inbox`, aplica `fn` y deja el resultado
+    en `outbox`. Si `fn` devuelve None el elemento se filtra.
+
+    Con `inbox=None` la etapa es una fuente: `fn()` se llama sin argumentos
+    y debe devolver el siguiente elemento (o None si todavía no hay).
+
+    `cpus` (opcional) fija la afinidad del hilo de la etapa al arrancar.
+    Los pools de los modelos se crean al construirlos: para que hereden la
+    misma afinidad hay que construirlos dentro de thread_budget.pinned_for.
+    """
+
+    def __init__(self, name: str, fn: Callable, inbox: Optional[StageQueue],
+                 outbox: StageQueue):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+
+        self.processed = 0
+        self.errors = 0
+        self.cpus: Optional[List[int]] = None
+        self._latency = STAGE_LATENCY.labels(stage=name)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=f"Stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        pin_current_thread(self.cpus)
+        try:
+            while self._running:
+                if self.inbox is None:
+                    result = self._run(self.fn)
+                else:
+                    item = self.inbox.get(timeout=0.1)
+                    if item is None:
+                        continue
+                    result = self._run(self.fn, item)
+
+                if result is not None:
+                    self.outbox.put(result, timeout=0.5)
+        except QueueClosed:
+            pass
+
+    def _run(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Error en etapa '{self.name}': {e}")
+            return None
+
+        if args:
+            # En las fuentes el tiempo es espera, no trabajo
+            self._latency.observe(time.perf_counter() - start)
+        self.processed += 1
+        return result
+
+
+class Pipeline:
+    """
+    Cadena lineal de etapas conectadas por colas acotadas.
+
+    La salida de la última etapa queda en `output` (por defecto
+    LATEST_ONLY: quien consume, normalmente la GUI, ve solo lo más nuevo).
+    """
+
+    def __init__(self, name: str, output_size: int = 1, output_policy: str = LATEST_ONLY):
+        self.name = name
+        self.stages: List[Stage] = []
+        self.queues: List[StageQueue] = []
+        self.output = StageQueue(output_size, output_policy, name=f"{name}.output")
+        self._source_added = False
+
+    def add_source(self, name: str, produce: Callable[[], Optional[Any]]) -> "Pipeline":
+        """Primera etapa: produce elementos (p. ej. FrameSource)."""
+        if self._source_added:
+            raise RuntimeError("El pipeline ya tiene una fuente")
+        self._source_added = True
+        self.stages.append(Stage(name, produce, None, self.output))
+        return self
+
+    def add_stage(self, name: str, fn: Callable[[Any], Optional[Any]],
+                  queue_size: int = 2, policy: str = DROP_OLDEST) -> "Pipeline":
+        """
+        Agrega una etapa al final. `queue_size` y `policy` configuran su cola
+        de entrada: LATEST_ONLY para etapas lentas que solo deben ver lo
+        último, DROP_OLDEST para absorber picos cortos, BLOCK para no perder nada.
+        """
+        if not self._source_added:
+            raise RuntimeError("Agrega primero la fuente con add_source()")
+
+        inbox = StageQueue(queue_size, policy, name=f"{self.name}.{name}")
+        # La etapa anterior ahora entrega en la cola nueva
+        self.stages[-1].outbox = inbox
+        self.queues.append(inbox)
+        self.stages.append(Stage(name, fn, inbox, self.output))
+        return self
+
+    def start(self) -> "Pipeline":
+        budget = current_thread_budget()
+        for stage in self.stages:
+            if budget is not None:
+                stage.cpus = budget.cpus_for(self.name, stage.name)
+            stage.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Detiene las etapas, despierta a las que esperan y las une."""
+        for stage in self.stages:
+            stage.stop()
+        for queue in self.queues + [self.output]:
+            queue.close()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Procesados/errores por etapa y descartes en su cola de entrada."""
+        stats = {}
+        for stage in self.stages:
+            stats[stage.name] = {
+                "processed": stage.processed,
+                "errors": stage.errors,
+                "dropped": stage.inbox.dropped if stage.inbox is not None else 0,
+            }
+        return stats
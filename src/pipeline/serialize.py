@@ -0,0 +1,40 @@
+"""
+Salida del pipeline en formato JSON.
+
+Convierte un FrameItem terminado en un dict de tipos simples, sin el frame
+ni objetos internos, para enviarlo a otro proceso o a un cliente remoto.
+"""
+
+import time
+from typing import Dict
+
+from pipeline.runtime import FrameItem
+
+
+def item_to_dict(item: FrameItem) -> Dict:
+    """Resultado de un frame (gestos o emociones) como dict serializable."""
+    data = item.data
+    payload = {
+        "seq": item.seq,
+        "time": time.time(),
+        "latency_ms": round((time.perf_counter() - item.capture_ts) * 1000.0, 1),
+        "idle": bool(data.get("idle", False)),
+    }
+
+    if "gestures" in data:
+        payload["gestures"] = dict(data["gestures"])
+        keys = data.get("keys")
+        if keys and any(keys.values()):
+            payload["keys"] = dict(keys)
+
+    result = data.get("result")
+    if result is not None:
+        payload["emotion"] = result.top_emotion
+        payload["confidence"] = round(result.confidence, 4)
+        payload["emotions"] = {name: round(score, 4) for name, score in result.emotions.items()}
+        if "counts" in data:
+            payload["counts"] = dict(data["counts"])
+        if data.get("new_event") is not None:
+            payload["event"] = data["new_event"].to_dict()
+
+    return payload
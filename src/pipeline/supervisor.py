@@ -0,0 +1,449 @@
+"""
+Varias cámaras a la vez: un proceso por cámara y un supervisor.
+
+Cada proceso trabajador abre su cámara (su propio FrameBus), arma los
+pipelines pedidos (gestos, emociones o ambos sobre la misma captura) y
+envía cada resultado, ya en JSON simple (pipeline.serialize), por una cola
+propia. Así cada cámara usa su propio GIL y un fallo en un driver o en
+un modelo no tumba al resto.
+
+El supervisor junta los resultados por cámara y reinicia a los
+trabajadores que terminan, dejan de enviar latidos o no arrancan a tiempo,
+con espera exponencial entre reintentos. Matar un proceso con terminate()
+puede dejar corrupta la cola en la que escribía y su anillo de memoria
+compartida sin liberar: por eso cada trabajador tiene su cola (se crea una
+nueva en cada reinicio) y su FrameBus usa un nombre conocido que el
+supervisor libera después de matarlo.
+
+Uso (desde la raíz del repo):
+    python src/run_cameras.py 0:gestures 1:emotions 2:gestures,emotions
+    python src/run_cameras.py 0:gestures 1:gestures --pin --replay 1=sesiones/s1
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from monitoring.metrics import WORKER_RESTARTS
+
+
+@dataclass
+class CameraSpec:
+    """
+    Un trabajador.
+      - camera: índice de la cámara
+      - pipelines: pipelines sobre esa cámara ("gestures", "emotions")
+      - replay: sesión grabada en lugar de la cámara (pruebas sin hardware)
+      - cpus: afinidad del proceso (None = todas)
+      - control / music: enviar teclas / reproducir música
+    """
+    camera: int
+    pipelines: Tuple[str, ...] = ("gestures",)
+    replay: Optional[str] = None
+    cpus: Optional[List[int]] = None
+    control: bool = False
+    music: bool = False
+
+    @classmethod
+    def parse(cls, text: str) -> "CameraSpec":
+        """
+        "1:gestures,emotions" → CameraSpec(1, ("gestures", "emotions")).
+        ValueError si la cámara o algún pipeline no son válidos (antes de
+        lanzar el proceso, que si no moriría y se reiniciaría en bucle).
+        """
+        from pipeline.headless import BUILDERS
+
+        camera, _, pipelines = text.partition(":")
+        names = tuple(p for p in (pipelines or "gestures").split(",") if p)
+        unknown = [name for name in names if name not in BUILDERS]
+        if unknown:
+            raise ValueError(f"Pipeline desconocido en '{text}': {', '.join(unknown)} "
+                             f"(disponibles: {', '.join(sorted(BUILDERS))})")
+        return cls(camera=int(camera), pipelines=names)
+
+
+# ----------------------------------------------------------------------
+# Proceso trabajador
+# ----------------------------------------------------------------------
+def _send(results, camera: int, kind: str, pipeline: Optional[str] = None,
+          payload: Optional[Dict] = None) -> None:
+    """Envía sin bloquear: si el supervisor va atrasado, se descarta."""
+    try:
+        results.put_nowait((camera, kind, pipeline, payload))
+    except queue.Full:
+        pass
+
+
+def _worker_main(spec: CameraSpec, results, stop_event, stall_timeout: float,
+                 shm_name: Optional[str] = None) -> None:
+    """Entrada del proceso de una cámara. Termina con código != 0 si la cámara falla."""
+    from pipeline.headless import BUILDERS
+    from pipeline.queues import QueueClosed
+    from pipeline.serialize import item_to_dict
+    from pipeline.thread_budget import apply_thread_budget, pin_current_thread
+    from vision.frame_bus import acquire_frame_bus, release_frame_bus
+
+    if spec.replay:
+        os.environ["REPLAY_SESSION"] = spec.replay
+    # Antes de crear hilos y modelos: todos heredan la afinidad
+    pin_current_thread(spec.cpus)
+    apply_thread_budget(verbose=False)
+
+    frame_bus = acquire_frame_bus(spec.camera, shm_name=shm_name)
+    if frame_bus is None:
+        _send(results, spec.camera, "error", payload={"message": "No se pudo abrir la cámara"})
+        raise SystemExit(2)
+
+    pipelines = {
+        name: BUILDERS[name](frame_bus, control=spec.control, music=spec.music).start()
+        for name in spec.pipelines
+    }
+    _send(results, spec.camera, "ready")
+
+    exit_code = 0
+    last_beat = 0.0
+    last_captured, last_capture_time = frame_bus.frames_captured, time.perf_counter()
+    try:
+        while not stop_event.is_set():
+            for name, pipeline in pipelines.items():
+                item = pipeline.output.get(timeout=0.05)
+                if item is not None:
+                    _send(results, spec.camera, "result", name, item_to_dict(item))
+
+            now = time.perf_counter()
+            if frame_bus.frames_captured != last_captured:
+                last_captured, last_capture_time = frame_bus.frames_captured, now
+            elif now - last_capture_time > stall_timeout:
+                # Cámara desconectada o colgada: reiniciar el proceso la vuelve a abrir
+                _send(results, spec.camera, "error",
+                      payload={"message": f"Sin frames hace {stall_timeout:.0f} s"})
+                exit_code = 3
+                break
+
+            if now - last_beat >= 1.0:
+                last_beat = now
+                _send(results, spec.camera, "heartbeat", payload={
+                    name: pipeline.stats() for name, pipeline in pipelines.items()
+                })
+    except (KeyboardInterrupt, QueueClosed):
+        pass
+    finally:
+        for pipeline in pipelines.values():
+            pipeline.stop()
+            tally = getattr(pipeline, "tally", None)
+            if tally is not None and tally.music_player is not None:
+                tally.music_player.stop()
+        release_frame_bus(frame_bus)
+
+    if exit_code:
+        raise SystemExit(exit_code)
+
+
+# ----------------------------------------------------------------------
+# Supervisor
+# ----------------------------------------------------------------------
+class _Worker:
+    """Estado de un trabajador visto desde el supervisor."""
+
+    def __init__(self, spec: CameraSpec, shm_name: str):
+        self.spec = spec
+        self.shm_name = shm_name   # anillo del FrameBus del trabajador
+        self.process = None
+        self.inbox = None          # cola propia, nueva en cada arranque
+        self.started_at = 0.0
+        self.last_heartbeat = 0.0
+        self.ready = False
+        self.restarts = 0
+        self.failures = 0          # fallos seguidos (para la espera exponencial)
+        self.restart_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self.latest: Dict[str, Dict] = {}
+        self.results: Dict[str, int] = {name: 0 for name in spec.pipelines}
+        self.stage_stats: Dict[str, Dict] = {}
+
+
+class CameraSupervisor:
+    """
+    - specs: un CameraSpec por cámara
+    - restart_backoff / max_backoff: espera inicial y máxima entre reinicios
+    - heartbeat_timeout: segundos sin latido tras los que se reinicia
+    - startup_timeout: segundos para cargar modelos y abrir la cámara
+    - stall_timeout: segundos sin frames tras los que el trabajador se reinicia
+    - on_result: callback(camera, pipeline, payload) en el hilo colector
+    """
+
+    def __init__(self, specs: List[CameraSpec], restart_backoff: float = 2.0,
+                 max_backoff: float = 30.0, heartbeat_timeout: float = 10.0,
+                 startup_timeout: float = 120.0, stall_timeout: float = 10.0,
+                 on_result: Optional[Callable[[int, str, Dict], None]] = None):
+        cameras = [spec.camera for spec in specs]
+        if len(set(cameras)) != len(cameras):
+            raise ValueError("Cada cámara debe aparecer una sola vez")
+
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self.heartbeat_timeout = heartbeat_timeout
+        self.startup_timeout = startup_timeout
+        self.stall_timeout = stall_timeout
+        self.on_result = on_result
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = self._ctx.Event()
+        # Nombre corto (macOS limita a 31 caracteres) y único por supervisor
+        self._workers = {
+            spec.camera: _Worker(spec, f"vb{os.getpid()}c{spec.camera}") for spec in specs
+        }
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    # ------------------------------------------------------------------
+    def start(self) -> "CameraSupervisor":
+        self._running = True
+        for worker in self._workers.values():
+            self._spawn(worker)
+
+        for target, name in ((self._collect_loop, "SupervisorCollect"),
+                             (self._monitor_loop, "SupervisorMonitor")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Pide a los trabajadores que terminen; los que no respondan se matan."""
+        self._running = False
+        self._stop_event.set()
+        for worker in self._workers.values():
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join(1.0)
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads.clear()
+        for worker in self._workers.values():
+            self._release(worker)
+
+    def _spawn(self, worker: _Worker) -> None:
+        worker.inbox = self._ctx.Queue(maxsize=1024)
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.spec, worker.inbox, self._stop_event, self.stall_timeout,
+                  worker.shm_name),
+            name=f"Camera-{worker.spec.camera}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.started_at = time.perf_counter()
+        worker.ready = False
+        worker.restart_at = None
+
+    # ------------------------------------------------------------------
+    def _collect_loop(self):
+        """Junta lo que envían los trabajadores (una cola por trabajador)."""
+        while self._running:
+            received = 0
+            for worker in self._workers.values():
+                inbox = worker.inbox
+                for _ in range(64):
+                    try:
+                        message = inbox.get_nowait() if inbox is not None else None
+                    except (queue.Empty, OSError, ValueError):
+                        # Vacía, o cerrada por un reinicio mientras se leía
+                        message = None
+                    if message is None:
+                        break
+                    received += 1
+                    self._handle_message(worker, *message)
+            if not received:
+                time.sleep(0.01)
+
+    def _handle_message(self, worker: _Worker, camera: int, kind: str,
+                        pipeline: Optional[str], payload: Optional[Dict]) -> None:
+        with self._lock:
+            worker.last_heartbeat = time.perf_counter()
+            if kind == "result":
+                worker.latest[pipeline] = payload
+                worker.results[pipeline] += 1
+            elif kind == "heartbeat":
+                worker.stage_stats = payload
+            elif kind == "ready":
+                worker.ready = True
+                print(f"✅ Cámara {camera}: {', '.join(worker.spec.pipelines)} en marcha")
+            elif kind == "error":
+                worker.last_error = payload["message"]
+                print(f"⚠️ Cámara {camera}: {worker.last_error}")
+
+        if kind == "result" and self.on_result is not None:
+            self.on_result(camera, pipeline, payload)
+
+    def _monitor_loop(self):
+        """Reinicia a los trabajadores caídos, colgados o que no arrancan."""
+        while self._running:
+            now = time.perf_counter()
+            for worker in self._workers.values():
+                with self._lock:
+                    reason = self._check(worker, now)
+                if reason:
+                    self._schedule_restart(worker, reason, now)
+                elif worker.restart_at is not None and now >= worker.restart_at and self._running:
+                    worker.restarts += 1
+                    WORKER_RESTARTS.labels(camera=worker.spec.camera).inc()
+                    print(f"🔁 Reiniciando cámara {worker.spec.camera} (reinicio {worker.restarts})")
+                    self._spawn(worker)
+            time.sleep(0.5)
+
+    def _check(self, worker: _Worker, now: float) -> Optional[str]:
+        """Motivo para reiniciar al trabajador, o None si está sano (o ya en espera)."""
+        process = worker.process
+        if process is None or worker.restart_at is not None:
+            return None
+        if not process.is_alive():
+            return f"terminó con código {process.exitcode}"
+        if not worker.ready:
+            if now - worker.started_at > self.startup_timeout:
+                return "no arrancó a tiempo"
+            return None
+        if now - worker.last_heartbeat > self.heartbeat_timeout:
+            return "sin latidos"
+        # Estable un buen rato: olvidar los fallos anteriores
+        if worker.failures and now - worker.started_at > 60.0:
+            worker.failures = 0
+        return None
+
+    def _schedule_restart(self, worker: _Worker, reason: str, now: float) -> None:
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(1.0)
+        self._release(worker)
+
+        delay = min(self.max_backoff, self.restart_backoff * (2 ** worker.failures))
+        worker.failures += 1
+        worker.ready = False
+        worker.restart_at = now + delay
+        print(f"❌ Cámara {worker.spec.camera}: {reason}; reinicio en {delay:.0f} s")
+
+    def _release(self, worker: _Worker) -> None:
+        """
+        Descarta la cola del proceso terminado (pudo quedar a medio escribir)
+        y libera su anillo de memoria compartida si no llegó a cerrarlo.
+        """
+        from vision.frame_bus import unlink_shared_memory
+
+        inbox, worker.inbox = worker.inbox, None
+        if inbox is not None:
+            inbox.close()
+            inbox.cancel_join_thread()
+        if unlink_shared_memory(worker.shm_name):
+            print(f"🧹 Cámara {worker.spec.camera}: memoria compartida liberada")
+
+    # ------------------------------------------------------------------
+    def latest(self) -> Dict[int, Dict[str, Dict]]:
+        """Último resultado de cada pipeline, por cámara."""
+        with self._lock:
+            return {camera: dict(worker.latest) for camera, worker in self._workers.items()}
+
+    def stats(self) -> Dict[int, Dict]:
+        """Estado, reinicios y resultados recibidos por cámara."""
+        now = time.perf_counter()
+        with self._lock:
+            stats = {}
+            for camera, worker in self._workers.items():
+                if worker.restart_at is not None:
+                    state = "reiniciando"
+                elif worker.ready:
+                    state = "activa"
+                else:
+                    state = "arrancando"
+                stats[camera] = {
+                    "state": state,
+                    "restarts": worker.restarts,
+                    "uptime_s": now - worker.started_at if worker.ready else 0.0,
+                    "results": dict(worker.results),
+                    "stages": worker.stage_stats,
+                    "last_error": worker.last_error,
+                }
+            return stats
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def _describe(payload: Optional[Dict]) -> str:
+    if payload is None:
+        return "---"
+    if payload.get("idle"):
+        return "💤 en espera"
+    if "gestures" in payload:
+        return " | ".join(f"{hand}: {gesture}" for hand, gesture in payload["gestures"].items())
+    if payload.get("emotion") is None:
+        return "sin cara"
+    return f"{payload['emotion']} ({payload['confidence'] * 100:.0f}%)"
+
+
+def print_status(supervisor: CameraSupervisor, previous: Dict[int, Dict[str, int]],
+                 elapsed: float) -> Dict[int, Dict[str, int]]:
+    """Una línea por cámara y pipeline; devuelve los contadores para el próximo intervalo."""
+    latest = supervisor.latest()
+    counts = {}
+    for camera, stats in supervisor.stats().items():
+        print(f"📷 Cámara {camera}: {stats['state']} | reinicios {stats['restarts']}")
+        counts[camera] = stats["results"]
+        for name, total in stats["results"].items():
+            fps = (total - previous.get(camera, {}).get(name, 0)) / elapsed if elapsed > 0 else 0.0
+            print(f"   {name:9s} {fps:5.1f} FPS | {_describe(latest[camera].get(name))}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta un pipeline por cámara en procesos separados")
+    parser.add_argument("cameras", nargs="+", metavar="CAMARA[:PIPELINES]",
+                        help='p. ej. "0:gestures" "1:gestures,emotions"')
+    parser.add_argument("--replay", nargs="+", default=[], metavar="CAMARA=SESION",
+                        help="Usar una sesión grabada en lugar de esa cámara")
+    parser.add_argument("--pin", action="store_true",
+                        help="Repartir los núcleos entre las cámaras (afinidad por proceso)")
+    parser.add_argument("--control", action="store_true", help="Enviar teclas (gestos)")
+    parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre estados")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Segundos a ejecutar (por defecto hasta Ctrl+C)")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = [CameraSpec.parse(text) for text in args.cameras]
+    except ValueError as e:
+        parser.error(str(e))
+    replays = dict(item.split("=", 1) for item in args.replay)
+    cores = os.cpu_count() or 1
+    for i, spec in enumerate(specs):
+        spec.replay = replays.get(str(spec.camera))
+        spec.control = args.control
+        if args.pin and len(specs) <= cores:
+            share = cores // len(specs)
+            spec.cpus = list(range(i * share, (i + 1) * share))
+
+    supervisor = CameraSupervisor(specs).start()
+    print(f"▶️ {len(specs)} cámara(s) en marcha (Ctrl+C para terminar)")
+
+    start = last_report = time.perf_counter()
+    previous: Dict[int, Dict[str, int]] = {}
+    try:
+        while args.duration is None or time.perf_counter() - start < args.duration:
+            time.sleep(0.5)
+            now = time.perf_counter()
+            if now - last_report >= args.interval:
+                previous = print_status(supervisor, previous, now - last_report)
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+    return 0
@@ -0,0 +1,415 @@
+"""
+Presupuesto de hilos de CPU para TensorFlow, ONNX Runtime, OpenCV y MediaPipe.
+
+Cada librería arma su propio pool de hilos con un tamaño por defecto igual
+a la cantidad de núcleos. Con los pipelines de emociones y de gestos
+corriendo a la vez, en una máquina de 4 núcleos terminan compitiendo
+decenas de hilos por 4 CPUs. Aquí se fija un presupuesto central al
+arrancar:
+
+  - OpenCV: cv2.setNumThreads (también cubre cv2.dnn)
+  - TensorFlow (FER): hilos intra/inter-op, por variables de entorno antes
+    de cargarlo o con tf.config.threading si ya está cargado
+  - ONNX Runtime: intra_op_num_threads de la sesión (vision.emotion_dnn)
+  - BLAS/OpenMP: OMP_NUM_THREADS y similares (los leen TensorFlow y los
+    procesos hijos al cargar; NumPy ya cargado no cambia)
+  - MediaPipe Hands no expone el tamaño de su pool: se acota con la
+    afinidad de CPU de la etapa que lo ejecuta
+
+La afinidad es opcional y se define por pipeline ("gestures") o por etapa
+("gestures.hand_process"). Los hilos heredan la afinidad del hilo que los
+crea, y MediaPipe (grafo y XNNPACK) y TensorFlow arman sus pools al
+construir el modelo, no al procesar: por eso los detectores se construyen
+dentro de `pinned_for(pipeline, etapa)` (las vistas, el modo headless y el
+auto-ajuste lo hacen así). Fijar solo el hilo de la etapa no alcanza.
+
+El presupuesto sale de src/pipeline/thread_budget.json (lo escribe el modo
+de auto-ajuste) y se puede sobreescribir con variables de entorno:
+THREADS_OPENCV, THREADS_TF_INTRA, THREADS_TF_INTER, THREADS_ORT,
+THREADS_BLAS y CPU_AFFINITY ("gestures=0,1;emotions=2,3").
+
+Auto-ajuste sobre una sesión grabada (cada configuración en un proceso
+nuevo, porque TensorFlow fija sus hilos una sola vez por proceso):
+
+    python src/tune_threads.py sesiones/s1 --duration 15 --write
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+
+BUDGET_PATH = "src/pipeline/thread_budget.json"
+
+_BLAS_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+_current: Optional["ThreadBudget"] = None
+
+
+@dataclass
+class ThreadBudget:
+    """
+    Hilos por librería y afinidad opcional.
+      - opencv_threads: cv2.setNumThreads (0 = lo que elija OpenCV)
+      - tf_intra_op / tf_inter_op: pools de TensorFlow
+      - ort_intra_op: pool de ONNX Runtime
+      - blas_threads: OpenMP/BLAS
+      - affinity: CPUs por pipeline o por "pipeline.etapa"
+    """
+    opencv_threads: int = 1
+    tf_intra_op: int = 2
+    tf_inter_op: int = 1
+    ort_intra_op: int = 2
+    blas_threads: int = 1
+    affinity: Dict[str, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def for_cores(cls, cores: Optional[int] = None) -> "ThreadBudget":
+        """
+        Reparto por defecto: las etapas ya corren en paralelo entre sí, así
+        que OpenCV va con 1 hilo y los modelos con la mitad de los núcleos.
+        """
+        cores = cores or os.cpu_count() or 1
+        half = max(1, cores // 2)
+        return cls(opencv_threads=1, tf_intra_op=half, tf_inter_op=1,
+                   ort_intra_op=half, blas_threads=1)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "ThreadBudget":
+        """Por defecto según los núcleos, luego el archivo y luego el entorno."""
+        budget = cls.for_cores()
+
+        path = path or BUDGET_PATH
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            budget = cls(**dict(asdict(budget), **data.get("budget", {})))
+
+        env = {
+            "opencv_threads": "THREADS_OPENCV",
+            "tf_intra_op": "THREADS_TF_INTRA",
+            "tf_inter_op": "THREADS_TF_INTER",
+            "ort_intra_op": "THREADS_ORT",
+            "blas_threads": "THREADS_BLAS",
+        }
+        for name, var in env.items():
+            value = os.environ.get(var)
+            if value:
+                setattr(budget, name, int(value))
+
+        if os.environ.get("CPU_AFFINITY"):
+            budget.affinity = parse_affinity(os.environ["CPU_AFFINITY"])
+        return budget
+
+    def cpus_for(self, pipeline: str, stage: Optional[str] = None) -> Optional[List[int]]:
+        """CPUs de una etapa: primero "pipeline.etapa", luego "pipeline"."""
+        if stage is not None and f"{pipeline}.{stage}" in self.affinity:
+            return self.affinity[f"{pipeline}.{stage}"]
+        return self.affinity.get(pipeline)
+
+    def describe(self) -> str:
+        text = (f"OpenCV {self.opencv_threads} | TF {self.tf_intra_op}/{self.tf_inter_op} | "
+                f"ORT {self.ort_intra_op} | BLAS {self.blas_threads}")
+        if self.affinity:
+            text += " | " + " ".join(
+                f"{name}→{','.join(map(str, cpus))}" for name, cpus in self.affinity.items()
+            )
+        return text
+
+
+def parse_affinity(spec: str) -> Dict[str, List[int]]:
+    """"gestures=0,1;emotions=2-3" → {"gestures": [0, 1], "emotions": [2, 3]}."""
+    affinity = {}
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        name, cpus = part.split("=", 1)
+        values = []
+        for item in cpus.split(","):
+            if "-" in item:
+                low, high = item.split("-", 1)
+                values.extend(range(int(low), int(high) + 1))
+            else:
+                values.append(int(item))
+        affinity[name.strip()] = values
+    return affinity
+
+
+def current_thread_budget() -> Optional[ThreadBudget]:
+    """Presupuesto aplicado en este proceso (None si no se aplicó ninguno)."""
+    return _current
+
+
+def pin_current_thread(cpus: Optional[Sequence[int]]) -> bool:
+    """
+    Fija la afinidad del hilo que llama (en Linux sched_setaffinity(0)
+    afecta solo al hilo actual). Los hilos que cree después la heredan.
+    """
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, set(cpus))
+        return True
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo fijar la afinidad {list(cpus)}: {e}")
+        return False
+
+
+@contextmanager
+def pinned_for(pipeline: str, stage: Optional[str] = None):
+    """
+    Fija temporalmente el hilo actual a las CPUs de la etapa (o del
+    pipeline) mientras se construyen sus modelos, y después restaura la
+    afinidad anterior. Los pools que crea el modelo quedan con la afinidad
+    de la etapa aunque la construcción ocurra en otro hilo (p. ej. el de Tk).
+
+        with pinned_for("gestures", "hand_process"):
+            tracker = HandTracker(...)
+    """
+    budget = current_thread_budget()
+    cpus = budget.cpus_for(pipeline, stage) if budget is not None else None
+    previous = None
+    if cpus and hasattr(os, "sched_getaffinity"):
+        previous = os.sched_getaffinity(0)
+        if not pin_current_thread(cpus):
+            previous = None
+    try:
+        yield cpus
+    finally:
+        if previous is not None:
+            pin_current_thread(sorted(previous))
+
+
+def configure_tensorflow(budget: ThreadBudget) -> bool:
+    """Aplica los hilos de TensorFlow si ya está cargado. Devuelve True si se aplicaron."""
+    tf = sys.modules.get("tensorflow")
+    if tf is None:
+        return False
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(budget.tf_intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(budget.tf_inter_op)
+        return True
+    except RuntimeError:
+        # TensorFlow ya inicializó su runtime: los pools quedan como estaban
+        print("⚠️ TensorFlow ya estaba inicializado; aplica el presupuesto antes de cargar FER")
+        return False
+
+
+def apply_thread_budget(budget: Optional[ThreadBudget] = None,
+                        verbose: bool = True) -> ThreadBudget:
+    """
+    Aplica el presupuesto en este proceso. Conviene llamarlo al arrancar,
+    antes de crear los detectores.
+    """
+    global _current
+    budget = budget or ThreadBudget.load()
+    _current = budget
+
+    # TensorFlow y OpenMP leen su entorno al cargarse
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(budget.tf_intra_op)
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(budget.tf_inter_op)
+    for var in _BLAS_VARS:
+        os.environ[var] = str(budget.blas_threads)
+    configure_tensorflow(budget)
+
+    try:
+        import cv2
+        cv2.setNumThreads(budget.opencv_threads)
+    except ImportError:
+        pass
+
+    if verbose:
+        print(f"🧵 Presupuesto de hilos: {budget.describe()}")
+    return budget
+
+
+# ----------------------------------------------------------------------
+# Auto-ajuste
+# ----------------------------------------------------------------------
+def candidate_budgets(cores: Optional[int] = None,
+                      pipelines: Sequence[str] = ("gestures", "emotions")) -> List[ThreadBudget]:
+    """Configuraciones a medir: hilos de los modelos x hilos de OpenCV x afinidad."""
+    cores = cores or os.cpu_count() or 1
+    half = max(1, cores // 2)
+
+    model_threads = sorted({1, half, cores})
+    opencv_threads = sorted({1, half})
+    affinities = [{}]
+    if cores >= 2 and len(pipelines) == 2:
+        # Mitad de los núcleos para cada pipeline
+        affinities.append({
+            pipelines[0]: list(range(half)),
+            pipelines[1]: list(range(half, cores)),
+        })
+
+    return [
+        ThreadBudget(opencv_threads=cv_threads, tf_intra_op=threads, tf_inter_op=1,
+                     ort_intra_op=threads, blas_threads=1, affinity=affinity)
+        for threads in model_threads
+        for cv_threads in opencv_threads
+        for affinity in affinities
+    ]
+
+
+def _measure_worker(budget_dict: Dict, session: str, pipelines: Sequence[str],
+                    duration: float, results) -> None:
+    """Proceso hijo: aplica el presupuesto y corre los pipelines a la vez sobre la sesión."""
+    budget = apply_thread_budget(ThreadBudget(**budget_dict), verbose=False)
+
+    from monitoring.replay import PIPELINES
+    from vision.recording import FrameReplayer
+
+    barrier = threading.Barrier(len(pipelines))
+    frames: Dict[str, int] = {}
+    errors: List[str] = []
+
+    def run(name):
+        try:
+            pin_current_thread(budget.cpus_for(name))
+            replayer = FrameReplayer(session, realtime=False, loop=True)
+            if not replayer.open():
+                raise FileNotFoundError(f"Sesión no encontrada o vacía: {session}")
+            # Construir con la afinidad del pipeline, igual que la app (pinned_for)
+            process = PIPELINES[name]()
+            timings = {key: [] for key in
+                       ("hand_process", "gesture_classify", "emotion_analyze")}
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            barrier.abort()
+            return
+
+        try:
+            # Medir solo cuando todos cargaron sus modelos
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            return
+
+        count = 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            ret, frame = replayer.read()
+            if not ret:
+                break
+            # Reloj real: la sesión se repite y su timestamp vuelve atrás
+            process(frame, time.perf_counter(), timings)
+            count += 1
+        replayer.release()
+        frames[name] = count
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in pipelines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        results.put({"error": "; ".join(errors)})
+    else:
+        results.put({"fps": {name: frames[name] / duration for name in pipelines}})
+
+
+def measure_budget(budget: ThreadBudget, session: str, pipelines: Sequence[str],
+                   duration: float = 15.0) -> Dict:
+    """Mide un presupuesto en un proceso nuevo. Devuelve {"fps": {...}} o {"error": ...}."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(
+        target=_measure_worker,
+        args=(asdict(budget), session, list(pipelines), duration, results),
+        daemon=True,
+    )
+    process.start()
+    try:
+        # Margen para cargar los modelos
+        return results.get(timeout=duration + 120)
+    except Exception:
+        return {"error": "sin resultado (el proceso falló o tardó demasiado)"}
+    finally:
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+
+
+def _score(fps: Dict[str, float]) -> float:
+    """Media geométrica de los FPS: premia mejorar a ambos pipelines, no solo al rápido."""
+    values = list(fps.values())
+    if not values or min(values) <= 0:
+        return 0.0
+    product = 1.0
+    for value in values:
+        product *= value
+    return product ** (1.0 / len(values))
+
+
+def autotune(session: str, pipelines: Sequence[str] = ("gestures", "emotions"),
+             duration: float = 15.0, candidates: Optional[List[ThreadBudget]] = None):
+    """Mide cada candidato y devuelve [(puntaje, presupuesto, fps)] del mejor al peor."""
+    candidates = candidates or candidate_budgets(pipelines=pipelines)
+    results = []
+    for i, budget in enumerate(candidates, 1):
+        print(f"⏱️ [{i}/{len(candidates)}] {budget.describe()}")
+        measured = measure_budget(budget, session, pipelines, duration)
+        if "error" in measured:
+            print(f"   ⚠️ {measured['error']}")
+            continue
+        fps = measured["fps"]
+        score = _score(fps)
+        print("   " + " | ".join(f"{name} {value:.1f} FPS" for name, value in fps.items())
+              + f" → {score:.2f}")
+        results.append((score, budget, fps))
+
+    results.sort(key=lambda r: r[0], reverse=True)
+    return results
+
+
+def write_budget(budget: ThreadBudget, fps: Dict[str, float], session: str,
+                 path: Optional[str] = None) -> str:
+    path = path or BUDGET_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "budget": asdict(budget),
+            "fps": fps,
+            "session": session,
+            "cores": os.cpu_count(),
+        }, f, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mide el rendimiento de varios presupuestos de hilos sobre una sesión grabada"
+    )
+    parser.add_argument("session", nargs="?", help="Carpeta de la sesión (frames.bin + meta.json)")
+    parser.add_argument("--pipelines", nargs="+", choices=("gestures", "emotions"),
+                        default=["gestures", "emotions"], help="Pipelines a correr a la vez")
+    parser.add_argument("--duration", type=float, default=15.0,
+                        help="Segundos de medición por configuración")
+    parser.add_argument("--write", action="store_true",
+                        help=f"Guardar el mejor presupuesto en {BUDGET_PATH}")
+    parser.add_argument("--show", action="store_true", help="Mostrar el presupuesto actual y salir")
+    args = parser.parse_args(argv)
+
+    if args.show or not args.session:
+        print(f"🧵 Presupuesto actual ({os.cpu_count()} núcleos): {ThreadBudget.load().describe()}")
+        return 0
+
+    results = autotune(args.session, args.pipelines, args.duration)
+    if not results:
+        print("❌ Ninguna configuración terminó la medición")
+        return 1
+
+    score, best, fps = results[0]
+    print(f"🏆 Mejor: {best.describe()} ({score:.2f})")
+
+    if args.write:
+        path = write_budget(best, fps, args.session)
+        print(f"💾 Presupuesto guardado en {path}")
+    return 0
@@ -0,0 +1,25 @@
+import argparse
+import sys
+
+from vision.camera import PROBE_FOURCCS, print_probe, probe_modes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lista los modos de captura de una cámara con sus FPS reales")
+    parser.add_argument("--index", type=int, default=0, help="Índice de la cámara")
+    parser.add_argument("--backend", default=None, help="v4l2, dshow, msmf, avfoundation...")
+    parser.add_argument("--fourcc", nargs="+", default=list(PROBE_FOURCCS))
+    parser.add_argument("--frames", type=int, default=60, help="Frames cronometrados por modo")
+    args = parser.parse_args(argv)
+
+    results = probe_modes(args.index, backend=args.backend, fourccs=args.fourcc, frames=args.frames)
+    if not results:
+        print("❌ No se pudo abrir la cámara")
+        return 1
+
+    print_probe(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Prueba de paridad entre backends de emociones.
+
+Compara el clasificador de FER (TensorFlow) con el del backend liviano
+(OpenCV DNN / ONNX) sobre los mismos recortes de cara: las caras se detectan
+una sola vez (Haar, el detector del backend liviano) y ambos clasificadores
+reciben la misma caja. Así se compara el modelo y no los detectores.
+
+Falla (código de salida 1) si la coincidencia de la emoción dominante queda
+por debajo de --min-agreement o si la diferencia media absoluta de
+probabilidades supera --max-diff. También muestra tiempos de carga y de
+clasificación.
+
+Uso (desde la raíz del repo):
+    python src/tests/emotion_parity.py              # 100 frames de la cámara
+    python src/tests/emotion_parity.py carpeta/     # imágenes de una carpeta
+    python src/tests/emotion_parity.py carpeta/ onnx --min-agreement 0.9
+    python src/tests/emotion_parity.py carpeta/ onnx --int8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vision.emotion_dnn import DnnEmotionRecognizer
+from vision.emotion_recognizer import EmotionRecognizer
+from vision.emotion_result import PROJECT_EMOTIONS
+
+
+def load_frames(source=None, count=100):
+    """Frames de una carpeta de imágenes o de la cámara por defecto."""
+    if source:
+        names = sorted(os.listdir(source))
+        frames = [cv2.imread(os.path.join(source, n)) for n in names]
+        return [f for f in frames if f is not None]
+
+    cap = cv2.VideoCapture(0)
+    frames = []
+    while cap.isOpened() and len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def timed_load(factory):
+    start = time.perf_counter()
+    recognizer = factory()
+    return recognizer, time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Paridad FER vs backend liviano")
+    parser.add_argument("source", nargs="?", help="carpeta de imágenes (por defecto, la cámara)")
+    parser.add_argument("backend", nargs="?", default="dnn", choices=("dnn", "onnx"))
+    parser.add_argument("--min-agreement", type=float, default=0.85,
+                        help="coincidencia mínima de la emoción dominante (0-1)")
+    parser.add_argument("--max-diff", type=float, default=0.08,
+                        help="diferencia media absoluta máxima de probabilidades")
+    parser.add_argument("--min-faces", type=int, default=20,
+                        help="caras mínimas para que la prueba sea válida")
+    parser.add_argument("--int8", action="store_true",
+                        help="usar el modelo cuantizado (solo con onnx)")
+    args = parser.parse_args(argv)
+    if args.int8 and args.backend != "onnx":
+        parser.error("--int8 requiere el backend onnx")
+
+    frames = load_frames(args.source)
+    if not frames:
+        print("❌ No hay frames para comparar")
+        return 1
+
+    reference, ref_load = timed_load(EmotionRecognizer)
+    candidate, cand_load = timed_load(lambda: DnnEmotionRecognizer(
+        runtime="opencv" if args.backend == "dnn" else "onnxruntime", int8=args.int8
+    ))
+    if reference.detector is None or candidate.detector is None:
+        print("❌ No se pudieron cargar ambos backends")
+        return 1
+
+    agree = 0
+    faces = 0
+    diffs = []
+    ref_times = []
+    cand_times = []
+
+    for frame in frames:
+        boxes = candidate.detect_faces(frame)
+        if not boxes:
+            continue
+        # Misma cara (la más grande) para los dos clasificadores
+        box = max(boxes, key=lambda f: f[2] * f[3])
+
+        start = time.perf_counter()
+        ref = reference.classify_face(frame, box)
+        ref_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cand = candidate.classify_face(frame, box)
+        cand_times.append(time.perf_counter() - start)
+
+        if ref.top_emotion is None or cand.top_emotion is None:
+            continue
+
+        faces += 1
+        agree += ref.top_emotion == cand.top_emotion
+        diffs.append(np.mean([
+            abs(ref.emotions[e] - cand.emotions[e]) for e in PROJECT_EMOTIONS
+        ]))
+
+    print(f"Frames: {len(frames)} | caras clasificadas por ambos: {faces}")
+    label = args.backend + (" int8" if args.int8 else "")
+    print(f"Carga: fer {ref_load:.2f}s | {label} {cand_load:.2f}s")
+    if ref_times:
+        print(f"Clasificación media: fer {np.mean(ref_times)*1000:.1f} ms | "
+              f"{label} {np.mean(cand_times)*1000:.1f} ms")
+
+    if faces < args.min_faces:
+        print(f"❌ Solo {faces} caras (mínimo {args.min_faces}): la prueba no es concluyente")
+        return 1
+
+    agreement = agree / faces
+    mean_diff = float(np.mean(diffs))
+    print(f"Coincidencia emoción dominante: {agreement * 100:.1f}% "
+          f"(mínimo {args.min_agreement * 100:.1f}%)")
+    print(f"Diferencia media de probabilidades: {mean_diff:.3f} (máximo {args.max_diff:.3f})")
+
+    failures = []
+    if agreement < args.min_agreement:
+        failures.append("coincidencia por debajo del mínimo")
+    if mean_diff > args.max_diff:
+        failures.append("diferencia de probabilidades por encima del máximo")
+
+    if failures:
+        print("❌ Paridad fallida: " + "; ".join(failures))
+        return 1
+    print("✅ Paridad OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,150 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
 import cv2
 
 
+@dataclass
+class CameraConfig:
+    """
+    Formato de captura pedido al driver. None = dejar el valor por defecto.
+
+      - width, height: resolución
+      - fps: cuadros por segundo
+      - fourcc: formato de píxel, p. ej. "MJPG" (suele permitir más FPS que YUYV)
+      - buffer_size: frames en el buffer interno del driver (1 = mínima latencia)
+      - backend: "v4l2", "dshow", "msmf", "avfoundation", "gstreamer"... (None = automático)
+
+    El driver puede no conceder lo pedido: lo que realmente quedó
+    configurado se lee en Camera.granted después de abrir.
+    """
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    fourcc: Optional[str] = None
+    buffer_size: Optional[int] = 1
+    backend: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "CameraConfig":
+        """
+        Configuración desde variables de entorno:
+        CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, CAMERA_FOURCC,
+        CAMERA_BUFFERSIZE, CAMERA_BACKEND.
+        """
+        def env(name, cast):
+            value = os.environ.get(name)
+            return cast(value) if value else None
+
+        config = cls(
+            width=env("CAMERA_WIDTH", int),
+            height=env("CAMERA_HEIGHT", int),
+            fps=env("CAMERA_FPS", float),
+            fourcc=env("CAMERA_FOURCC", str),
+            backend=env("CAMERA_BACKEND", str),
+        )
+        buffer_size = env("CAMERA_BUFFERSIZE", int)
+        if buffer_size is not None:
+            config.buffer_size = buffer_size
+        return config
+
+
+def resolve_backend(name: Optional[str]) -> int:
+    """Traduce un nombre de backend ("v4l2") a la constante de OpenCV (cv2.CAP_V4L2)."""
+    if not name:
+        return cv2.CAP_ANY
+    backend = getattr(cv2, f"CAP_{name.upper()}", None)
+    if backend is None:
+        raise ValueError(f"Backend de cámara desconocido: '{name}'")
+    return backend
+
+
+def decode_fourcc(value: float) -> str:
+    """Convierte el valor de CAP_PROP_FOURCC a texto ("MJPG")."""
+    code = int(value)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
 class Camera:
     """Encapsula el manejo de la cámara con OpenCV."""
 
-    def __init__(self, index: int = 0):
+    def __init__(self, index: int = 0, config: Optional[CameraConfig] = None,
+                 verbose: bool = True):
         """
         index: índice de la cámara (0 = cámara web por defecto).
+        config: formato de captura pedido (None = valores del driver).
+        verbose: mostrar en consola el formato concedido al abrir.
         """
         self.index = index
+        self.config = config or CameraConfig()
+        self.verbose = verbose
         self.cap = None
+        self.granted: Dict[str, object] = {}  # Formato concedido por el driver
 
     def open(self) -> bool:
         """Abre la cámara si no está abierta. Devuelve True si se abrió bien."""
         if self.cap is None or not self.cap.isOpened():
-            self.cap = cv2.VideoCapture(self.index)
+            self.cap = cv2.VideoCapture(self.index, resolve_backend(self.config.backend))
+            if self.cap.isOpened():
+                self._apply_config()
 
         return self.cap.isOpened()
 
+    def _apply_config(self):
+        """Pide el formato configurado al driver y lee lo que concedió."""
+        config = self.config
+
+        # En V4L2 el FOURCC debe fijarse antes que la resolución
+        if config.fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+        if config.width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+        if config.height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+        if config.fps:
+            self.cap.set(cv2.CAP_PROP_FPS, config.fps)
+        if config.buffer_size is not None:
+            # No todos los backends lo soportan; set() devuelve False en ese caso
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+
+        self.granted = self.read_properties()
+        if self.verbose:
+            self._report_granted()
+
+    def read_properties(self) -> Dict[str, object]:
+        """Formato actual de la captura según el driver."""
+        if self.cap is None:
+            return {}
+        return {
+            "backend": self.cap.getBackendName(),
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": float(self.cap.get(cv2.CAP_PROP_FPS)),
+            "fourcc": decode_fourcc(self.cap.get(cv2.CAP_PROP_FOURCC)),
+            "buffer_size": int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+
+    def _report_granted(self):
+        """Muestra el formato concedido y avisa si difiere de lo pedido."""
+        g = self.granted
+        print(f"📷 Cámara {self.index} ({g['backend']}): {g['width']}x{g['height']} "
+              f"@ {g['fps']:.0f} FPS | {g['fourcc'] or '?'} | buffer {g['buffer_size']}")
+
+        config = self.config
+        requested = {
+            "width": config.width,
+            "height": config.height,
+            "fps": config.fps,
+            "fourcc": config.fourcc.upper() if config.fourcc else None,
+        }
+        for key, value in requested.items():
+            if value is not None and g[key] != value:
+                print(f"⚠️ El driver no concedió {key}={value} (quedó {g[key]})")
+
     def read(self):
         """
         Devuelve (ret, frame) como cv2.VideoCapture.read().
@@ -33,3 +160,63 @@ class Camera:
         if self.cap is not None and self.cap.isOpened():
             self.cap.release()
             self.cap = None
+
+
+# Modos habituales de webcams UVC
+PROBE_RESOLUTIONS = ((640, 480), (800, 600), (1280, 720), (1920, 1080))
+PROBE_FOURCCS = ("MJPG", "YUYV")
+
+
+def probe_modes(index: int = 0, backend: Optional[str] = None,
+                resolutions: Iterable[Tuple[int, int]] = PROBE_RESOLUTIONS,
+                fourccs: Iterable[str] = PROBE_FOURCCS,
+                fps: float = 60, frames: int = 60, warmup: int = 5) -> List[Dict]:
+    """
+    Prueba combinaciones de formato y resolución y mide los FPS reales.
+
+    Para cada modo se pide `fps` (el máximo que se quiere probar), se
+    descartan `warmup` frames y se cronometran `frames` lecturas. Los modos
+    que el driver no concede se reportan con lo que realmente quedó.
+    """
+    results = []
+    for fourcc in fourccs:
+        for width, height in resolutions:
+            camera = Camera(index, CameraConfig(
+                width=width, height=height, fps=fps, fourcc=fourcc, backend=backend
+            ), verbose=False)
+            if not camera.open():
+                camera.release()
+                continue
+
+            for _ in range(warmup):
+                camera.read()
+
+            count = 0
+            start = time.perf_counter()
+            for _ in range(frames):
+                ret, _ = camera.read()
+                if not ret:
+                    break
+                count += 1
+            elapsed = time.perf_counter() - start
+            camera.release()
+
+            granted = camera.granted
+            results.append({
+                "requested": f"{fourcc} {width}x{height}",
+                "granted": f"{granted['fourcc'] or '?'} {granted['width']}x{granted['height']}",
+                "driver_fps": granted["fps"],
+                "measured_fps": count / elapsed if elapsed > 0 else 0.0,
+                "exact": (granted["fourcc"] == fourcc and
+                          (granted["width"], granted["height"]) == (width, height)),
+            })
+    return results
+
+
+def print_probe(results: List[Dict]) -> None:
+    """Tabla de modos probados, de más a menos FPS medidos."""
+    print("📷 Modos de captura (FPS medidos):")
+    for r in sorted(results, key=lambda r: r["measured_fps"], reverse=True):
+        mark = "" if r["exact"] else "  (no concedido)"
+        print(f"   {r['requested']:16s} -> {r['granted']:16s} "
+              f"driver {r['driver_fps']:5.1f} | medido {r['measured_fps']:5.1f}{mark}")
@@ -0,0 +1,46 @@
+"""
+Selección del backend de emociones.
+
+- "fer": EmotionRecognizer (FER + MTCNN, requiere TensorFlow)
+- "dnn": DnnEmotionRecognizer con cv2.dnn (sin TensorFlow)
+- "onnx": DnnEmotionRecognizer con ONNX Runtime
+
+Los imports son perezosos para que elegir un backend liviano no cargue
+TensorFlow. El backend por defecto se puede cambiar con la variable de
+entorno EMOTION_BACKEND (y EMOTION_INT8=1 para el modelo cuantizado, solo
+con "onnx").
+"""
+
+import os
+from typing import Optional
+
+
+BACKENDS = ("fer", "dnn", "onnx")
+
+
+def create_emotion_recognizer(backend: Optional[str] = None, **kwargs):
+    """
+    Crea el detector de emociones del backend pedido.
+    Si un backend liviano no puede cargar su modelo, se usa FER.
+    """
+    backend = (backend or os.environ.get("EMOTION_BACKEND", "fer")).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de emociones desconocido: '{backend}'")
+
+    if backend in ("dnn", "onnx"):
+        from vision.emotion_dnn import DnnEmotionRecognizer
+
+        if backend == "onnx":
+            kwargs.setdefault("int8", os.environ.get("EMOTION_INT8") == "1")
+        elif kwargs.get("int8") or os.environ.get("EMOTION_INT8") == "1":
+            raise ValueError("EMOTION_INT8 requiere EMOTION_BACKEND=onnx (cv2.dnn no carga el modelo int8)")
+        recognizer = DnnEmotionRecognizer(
+            runtime="opencv" if backend == "dnn" else "onnxruntime", **kwargs
+        )
+        if recognizer.detector is not None:
+            return recognizer
+        print("⚠️ Backend liviano no disponible, usando FER")
+
+    from vision.emotion_recognizer import EmotionRecognizer
+
+    return EmotionRecognizer()
@@ -0,0 +1,201 @@
+"""
+Detector de emociones liviano para CPU (OpenCV DNN u ONNX Runtime).
+
+Ejecuta el mismo tipo de CNN que usa FER (entrada 64x64 en gris, 7 clases),
+exportada a ONNX, sin cargar TensorFlow. La cara se detecta con el
+clasificador Haar que trae opencv-python. La salida es la misma que la de
+EmotionRecognizer: 5 emociones consolidadas y normalizadas.
+
+Exportar el modelo de FER (una vez, en una máquina con TensorFlow):
+    python -m tf2onnx.convert --keras <fer>/data/emotion_model.hdf5 \
+        --output src/vision/models/emotion.onnx
+
+Versión int8 (opcional, requiere onnxruntime):
+    quantize_model("src/vision/models/emotion.onnx",
+                   "src/vision/models/emotion.int8.onnx")
+"""
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from pipeline.thread_budget import current_thread_budget
+from vision.emotion_result import EmotionResult, consolidate_emotions
+from vision.overlay import OverlayRenderer
+
+
+class DnnEmotionRecognizer:
+    """
+    Backend de emociones sin TensorFlow.
+
+    - model_path: modelo ONNX exportado desde FER
+    - runtime: "opencv" (cv2.dnn, sin dependencias extra) u "onnxruntime"
+    - int8: usar la versión cuantizada del modelo (<modelo>.int8.onnx);
+      solo con onnxruntime (cv2.dnn no carga operadores de cuantización dinámica)
+    - min_face_size: tamaño mínimo de cara (px) para el detector Haar
+    """
+
+    MODEL_PATH = "src/vision/models/emotion.onnx"
+
+    # Orden de salida del modelo de FER
+    FER_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+    # Preprocesamiento equivalente al de FER
+    INPUT_SIZE = (64, 64)
+    FACE_OFFSETS = (10, 10)
+
+    def __init__(self, model_path: Optional[str] = None, runtime: str = "opencv",
+                 int8: bool = False, min_face_size: int = 60):
+        if int8 and runtime != "onnxruntime":
+            raise ValueError("El modelo int8 requiere runtime='onnxruntime'")
+
+        self._renderer = None
+        self.runtime = runtime
+        self.min_face_size = min_face_size
+
+        model_path = model_path or self.MODEL_PATH
+        if int8:
+            model_path = os.path.splitext(model_path)[0] + ".int8.onnx"
+        self.model_path = model_path
+
+        print(f"🔄 Cargando modelo de emociones ({runtime}): {model_path}")
+        try:
+            cascade_path = os.path.join(
+                cv2.data.haarcascades, "haarcascade_frontalface_default.xml"
+            )
+            self.face_detector = cv2.CascadeClassifier(cascade_path)
+            self._load_model(model_path)
+            self.detector = True
+            print("✅ DnnEmotionRecognizer inicializado")
+        except Exception as e:
+            print(f"⚠️ Error inicializando backend DNN: {e}")
+            self.detector = None
+
+    def _load_model(self, model_path: str):
+        """Carga el modelo con el runtime elegido."""
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Modelo no encontrado: {model_path}")
+
+        if self.runtime == "onnxruntime":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            budget = current_thread_budget()
+            if budget is not None:
+                options.intra_op_num_threads = budget.ort_intra_op
+                options.inter_op_num_threads = 1
+            self._session = ort.InferenceSession(
+                model_path, options, providers=["CPUExecutionProvider"]
+            )
+            self._input_name = self._session.get_inputs()[0].name
+            self._predict = self._predict_onnxruntime
+        elif self.runtime == "opencv":
+            self._net = cv2.dnn.readNetFromONNX(model_path)
+            self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            self._predict = self._predict_opencv
+        else:
+            raise ValueError(f"Runtime no soportado: {self.runtime}")
+
+    def _predict_opencv(self, blob: np.ndarray) -> np.ndarray:
+        self._net.setInput(blob)
+        return self._net.forward().reshape(-1)
+
+    def _predict_onnxruntime(self, blob: np.ndarray) -> np.ndarray:
+        return self._session.run(None, {self._input_name: blob})[0].reshape(-1)
+
+    def _preprocess(self, gray, box) -> np.ndarray:
+        """Recorta la cara con margen, 64x64, escala a [-1, 1] (como FER)."""
+        x, y, w, h = box
+        off_x, off_y = self.FACE_OFFSETS
+        x1, y1 = max(0, x - off_x), max(0, y - off_y)
+        x2, y2 = min(gray.shape[1], x + w + off_x), min(gray.shape[0], y + h + off_y)
+
+        face = cv2.resize(gray[y1:y2, x1:x2], self.INPUT_SIZE)
+        face = face.astype(np.float32) / 255.0
+        face = (face - 0.5) * 2.0
+        # NHWC, como el modelo de Keras exportado
+        return face.reshape(1, self.INPUT_SIZE[1], self.INPUT_SIZE[0], 1)
+
+    def detect(self, frame_bgr, capture_ts: Optional[float] = None) -> EmotionResult:
+        """
+        Analiza emociones en un frame, sin copiar ni dibujar.
+        Devuelve un EmotionResult (mismo formato que EmotionRecognizer.detect).
+        `capture_ts` se copia al resultado para medir latencias.
+        """
+        if frame_bgr is None or self.detector is None:
+            return EmotionResult(capture_ts=capture_ts)
+
+        try:
+            gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+            faces = self._find_faces(gray)
+            if not faces:
+                return EmotionResult(capture_ts=capture_ts)
+
+            # La cara más grande
+            box = max(faces, key=lambda f: f[2] * f[3])
+            return self._classify_gray(gray, box, capture_ts)
+
+        except Exception as e:
+            # En caso de error, devolver resultado vacío
+            # print(f"⚠️ Error en análisis: {e}")  # Descomentar para debug
+            return EmotionResult(capture_ts=capture_ts)
+
+    def detect_faces(self, frame_bgr):
+        """Cajas (x, y, w, h) de las caras del frame según el detector Haar."""
+        return self._find_faces(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY))
+
+    def _find_faces(self, gray):
+        faces = self.face_detector.detectMultiScale(
+            gray,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(self.min_face_size, self.min_face_size),
+        )
+        return [tuple(int(v) for v in face) for face in faces]
+
+    def classify_face(self, frame_bgr, box, capture_ts: Optional[float] = None) -> EmotionResult:
+        """Clasifica una cara ya detectada (x, y, w, h), sin pasar por el detector."""
+        if frame_bgr is None or self.detector is None:
+            return EmotionResult(capture_ts=capture_ts)
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        return self._classify_gray(gray, tuple(int(v) for v in box), capture_ts)
+
+    def _classify_gray(self, gray, box, capture_ts: Optional[float]) -> EmotionResult:
+        scores = self._predict(self._preprocess(gray, box))
+        raw_emotions = {
+            label: float(score) for label, score in zip(self.FER_LABELS, scores)
+        }
+
+        top_emotion, confidence, emotions_normalized = consolidate_emotions(raw_emotions)
+        return EmotionResult(top_emotion, confidence, emotions_normalized, box,
+                             capture_ts)
+
+    def analyze(self, frame_bgr) -> Tuple[Any, Optional[str], float, Dict[str, float]]:
+        """
+        Igual que EmotionRecognizer.analyze: analiza y dibuja en una copia.
+        Devuelve (frame_annotated, top_emotion, confidence, emotions).
+        """
+        result = self.detect(frame_bgr)
+        if result.top_emotion is None:
+            return frame_bgr, None, 0.0, {}
+
+        if self._renderer is None:
+            self._renderer = OverlayRenderer()
+        frame_annotated = self._renderer.draw_emotion(frame_bgr.copy(), result)
+
+        return frame_annotated, result.top_emotion, result.confidence, result.emotions
+
+
+def quantize_model(model_path: str, output_path: str) -> str:
+    """
+    Genera una versión int8 (cuantización dinámica de pesos) del modelo.
+    Requiere onnxruntime. Devuelve la ruta del modelo cuantizado.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
@@ -0,0 +1,126 @@
+"""
+Detección en línea de eventos emocionales destacados.
+
+Un evento es un tramo en que una emoción domina con claridad: empieza
+cuando su probabilidad supera `enter_threshold`, sigue mientras no baje
+de `exit_threshold` (histéresis: no parpadea en el borde) y se cierra
+cuando queda por debajo más de `max_gap` segundos. Los tramos más cortos
+que `min_duration` se descartan como ruido.
+
+Cada resultado se procesa en O(1) y los eventos cerrados se guardan en
+una lista acotada, así el reporte y la UI leen pocos eventos en lugar de
+recorrer todo el historial por frame.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Sequence
+
+
+@dataclass
+class EmotionEvent:
+    """
+    Tramo en que domina una emoción.
+      - emotion: emoción dominante
+      - start / end: inicio y fin (time.time())
+      - peak: probabilidad máxima alcanzada y peak_time su instante
+    """
+    emotion: str
+    start: float
+    end: float
+    peak: float
+    peak_time: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def to_dict(self) -> Dict:
+        """Formato para reportes: horas legibles, duración en segundos."""
+        return {
+            "emotion": self.emotion,
+            "start": datetime.fromtimestamp(self.start).strftime("%H:%M:%S"),
+            "duration": round(self.duration, 1),
+            "peak": round(self.peak, 3),
+            "peak_time": datetime.fromtimestamp(self.peak_time).strftime("%H:%M:%S"),
+        }
+
+
+class EmotionEventDetector:
+    """
+    - enter_threshold: probabilidad para abrir un evento
+    - exit_threshold: probabilidad por debajo de la cual el evento se va cerrando
+    - min_duration: segundos mínimos para conservar un evento
+    - max_gap: segundos por debajo del umbral (o sin cara) tolerados dentro de un evento
+    - ignore: emociones que no generan eventos (neutral es el estado de base)
+    - max_events: eventos cerrados que se conservan
+    """
+
+    def __init__(self, enter_threshold: float = 0.55, exit_threshold: float = 0.35,
+                 min_duration: float = 1.5, max_gap: float = 0.75,
+                 ignore: Sequence[str] = ("neutral",), max_events: int = 500):
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+        self.ignore = set(ignore)
+
+        self._events: Deque[EmotionEvent] = deque(maxlen=max_events)
+        # Eventos cerrados desde el inicio (no se satura con max_events);
+        # la UI lo compara para saber si hay eventos nuevos que mostrar
+        self.closed_count = 0
+        self.active: Optional[EmotionEvent] = None
+        self._below_since: Optional[float] = None
+
+    @property
+    def events(self) -> List[EmotionEvent]:
+        """Eventos cerrados, del más viejo al más nuevo."""
+        return list(self._events)
+
+    def update(self, emotions: Optional[Dict[str, float]], now: Optional[float] = None
+               ) -> Optional[EmotionEvent]:
+        """
+        Procesa un resultado (scores 0-1 por emoción; None = sin cara).
+        Devuelve el evento que se cerró en este paso, si hubo uno.
+        """
+        now = time.time() if now is None else now
+        emotions = emotions or {}
+        closed = None
+
+        active = self.active
+        if active is not None:
+            score = emotions.get(active.emotion, 0.0)
+            if score >= self.exit_threshold:
+                self._below_since = None
+                active.end = now
+                if score > active.peak:
+                    active.peak, active.peak_time = score, now
+            else:
+                if self._below_since is None:
+                    self._below_since = now
+                if now - self._below_since > self.max_gap:
+                    closed = self._close()
+
+        if self.active is None and emotions:
+            top = max(emotions, key=emotions.get)
+            score = emotions[top]
+            if score >= self.enter_threshold and top not in self.ignore:
+                self.active = EmotionEvent(top, now, now, score, now)
+                self._below_since = None
+
+        return closed
+
+    def finish(self) -> Optional[EmotionEvent]:
+        """Cierra el evento en curso (fin de sesión)."""
+        return self._close() if self.active is not None else None
+
+    def _close(self) -> Optional[EmotionEvent]:
+        event, self.active = self.active, None
+        self._below_since = None
+        if event.duration >= self.min_duration:
+            self._events.append(event)
+            self.closed_count += 1
+            return event
+        return None
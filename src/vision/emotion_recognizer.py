@@ -6,13 +6,14 @@ Precisión: ~85-97%
 Contribución de Gustavo al proyecto de Arquitectura de Computadoras
 """
 
-import cv2
-import numpy as np
 from typing import Any, Dict, Optional, Tuple
 from fer.fer import FER
 import warnings
 import os
 
+from vision.emotion_result import EMOTION_MAP, EmotionResult, consolidate_emotions
+from vision.overlay import OverlayRenderer
+
 # Suprimir warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings('ignore')
@@ -30,21 +31,17 @@ class EmotionRecognizer:
     
     Mapeadas a 5 categorías del proyecto:
     - happy, sad, angry, surprise, neutral
+
+    `detect` devuelve un EmotionResult sin tocar el frame; el dibujo lo hace
+    vision.overlay.OverlayRenderer solo cuando hay alguien mirando.
     """
 
     # Mapeo de emociones FER → Proyecto
-    EMOTION_MAP = {
-        "happy": "happy",
-        "sad": "sad", 
-        "angry": "angry",
-        "surprise": "surprise",
-        "neutral": "neutral",
-        "fear": "sad",
-        "disgust": "angry"
-    }
+    EMOTION_MAP = EMOTION_MAP
 
     def __init__(self):
         """Inicializa el detector FER con MTCNN"""
+        self._renderer = None
         print("🔄 Cargando modelo FER + MTCNN...")
         try:
             self.detector = FER(mtcnn=True)
@@ -54,149 +51,113 @@ class EmotionRecognizer:
             print(f"⚠️ Error inicializando FER: {e}")
             self.detector = None
 
-    def analyze(self, frame_bgr) -> Tuple[Any, Optional[str], float, Dict[str, float]]:
+    def detect(self, frame_bgr, capture_ts: Optional[float] = None) -> EmotionResult:
         """
-        Analiza emociones en un frame usando FER
-        
+        Analiza emociones en un frame usando FER, sin copiar ni dibujar.
+
         Args:
             frame_bgr: Frame en formato BGR (OpenCV)
-            
+            capture_ts: Instante de captura del frame (se copia al resultado)
+
         Returns:
-            Tuple con:
-            - frame_annotated: Frame con anotaciones dibujadas
-            - top_emotion: Emoción dominante (o None si no detecta)
-            - confidence: Confianza de la predicción (0-1)
-            - emotions: Dict con todas las emociones y sus scores normalizados
+            EmotionResult con emoción dominante, confianza, scores
+            normalizados (5 emociones) y caja de la cara
         """
         if frame_bgr is None or self.detector is None:
-            return frame_bgr, None, 0.0, {}
+            return EmotionResult(capture_ts=capture_ts)
 
         try:
             # Detectar emociones con FER
             results = self.detector.detect_emotions(frame_bgr)
-            
+
             if not results or len(results) == 0:
-                return frame_bgr, None, 0.0, {}
-            
+                return EmotionResult(capture_ts=capture_ts)
+
             # Tomar primera cara detectada
             result = results[0]
-            
+
             # Obtener emociones (vienen en escala 0-1)
             raw_emotions = result.get('emotions', {})
-            
+
             if not raw_emotions:
-                return frame_bgr, None, 0.0, {}
-            
-            # Consolidar emociones al formato del proyecto (5 emociones)
-            emotions_consolidated = {
-                "happy": 0.0,
-                "sad": 0.0,
-                "angry": 0.0,
-                "surprise": 0.0,
-                "neutral": 0.0
-            }
-            
-            # Sumar emociones mapeadas
-            for fer_emo, project_emo in self.EMOTION_MAP.items():
-                if fer_emo in raw_emotions:
-                    emotions_consolidated[project_emo] += raw_emotions[fer_emo]
-            
-            # Normalizar a 0-1
-            total = sum(emotions_consolidated.values())
-            if total > 0:
-                emotions_normalized = {
-                    k: v / total for k, v in emotions_consolidated.items()
-                }
-            else:
-                emotions_normalized = emotions_consolidated
-            
-            # Obtener emoción dominante
-            top_emotion = max(emotions_normalized, key=emotions_normalized.get)
-            confidence = emotions_normalized[top_emotion]
-            
+                return EmotionResult(capture_ts=capture_ts)
+
+            top_emotion, confidence, emotions_normalized = \
+                self.consolidate(raw_emotions)
+
             # Obtener bounding box de la cara
-            box = result.get('box', [0, 0, 0, 0])
-            x, y, w, h = box
-            
-            # Dibujar resultados
-            frame_annotated = self._draw_results(
-                frame_bgr.copy(), 
-                top_emotion, 
-                confidence,
-                x, y, w, h,
-                emotions_normalized
-            )
-            
-            return frame_annotated, top_emotion, confidence, emotions_normalized
-            
+            box = tuple(result.get('box', [0, 0, 0, 0]))
+
+            return EmotionResult(top_emotion, confidence, emotions_normalized, box,
+                                 capture_ts)
+
         except Exception as e:
-            # En caso de error, retornar frame sin modificar
+            # En caso de error, devolver resultado vacío
             # print(f"⚠️ Error en análisis: {e}")  # Descomentar para debug
+            return EmotionResult(capture_ts=capture_ts)
+
+    def classify_face(self, frame_bgr, box, capture_ts: Optional[float] = None) -> EmotionResult:
+        """
+        Clasifica una cara ya detectada (x, y, w, h) sin correr MTCNN.
+        Sirve para comparar el clasificador con otro backend sobre el mismo recorte.
+        """
+        if frame_bgr is None or self.detector is None:
+            return EmotionResult(capture_ts=capture_ts)
+
+        box = tuple(int(v) for v in box)
+        results = self.detector.detect_emotions(frame_bgr, face_rectangles=[box])
+        if not results or not results[0].get('emotions'):
+            return EmotionResult(capture_ts=capture_ts)
+
+        top_emotion, confidence, emotions_normalized = \
+            self.consolidate(results[0]['emotions'])
+        return EmotionResult(top_emotion, confidence, emotions_normalized, box,
+                             capture_ts)
+
+    @classmethod
+    def consolidate(cls, raw_emotions: Dict[str, float]) -> Tuple[str, float, Dict[str, float]]:
+        """
+        Consolida las 7 emociones de FER en las 5 del proyecto y normaliza.
+        Devuelve (emoción dominante, confianza, scores normalizados).
+        """
+        return consolidate_emotions(raw_emotions, cls.EMOTION_MAP)
+
+    def analyze(self, frame_bgr) -> Tuple[Any, Optional[str], float, Dict[str, float]]:
+        """
+        Analiza emociones en un frame y dibuja los resultados en una copia.
+        (Compatibilidad: el camino rápido es detect + OverlayRenderer.)
+
+        Args:
+            frame_bgr: Frame en formato BGR (OpenCV)
+
+        Returns:
+            Tuple con:
+            - frame_annotated: Frame con anotaciones dibujadas
+            - top_emotion: Emoción dominante (o None si no detecta)
+            - confidence: Confianza de la predicción (0-1)
+            - emotions: Dict con todas las emociones y sus scores normalizados
+        """
+        result = self.detect(frame_bgr)
+        if result.top_emotion is None:
             return frame_bgr, None, 0.0, {}
 
-    def _draw_results(self, frame, emotion: str, confidence: float, 
+        x, y, w, h = result.box
+        frame_annotated = self._draw_results(
+            frame_bgr.copy(),
+            result.top_emotion,
+            result.confidence,
+            x, y, w, h,
+            result.emotions,
+        )
+
+        return frame_annotated, result.top_emotion, result.confidence, result.emotions
+
+    def _draw_results(self, frame, emotion: str, confidence: float,
                       x: int, y: int, w: int, h: int,
                       all_emotions: Dict[str, float]):
         """
         Dibuja los resultados en el frame
         """
-        # Colores según emoción (BGR)
-        color_map = {
-            "happy": (0, 255, 0),      # Verde
-            "sad": (255, 0, 0),        # Azul
-            "angry": (0, 0, 255),      # Rojo
-            "surprise": (0, 255, 255), # Amarillo
-            "neutral": (200, 200, 200) # Gris
-        }
-        
-        color = color_map.get(emotion, (255, 255, 255))
-        
-        if w > 0 and h > 0:
-            # Rectángulo alrededor de la cara
-            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-            
-            # Etiqueta con emoción y porcentaje
-            label = f"{emotion.upper()} {confidence*100:.1f}%"
-            
-            # Fondo para texto
-            (text_w, text_h), baseline = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
-            )
-            
-            cv2.rectangle(
-                frame,
-                (x, y - text_h - 15),
-                (x + text_w + 10, y),
-                color,
-                -1
-            )
-            
-            # Texto
-            cv2.putText(
-                frame,
-                label,
-                (x + 5, y - 5),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 0, 0),
-                2,
-            )
-            
-            # Barra de confianza
-            bar_width = int(w * confidence)
-            cv2.rectangle(
-                frame,
-                (x, y + h + 5),
-                (x + bar_width, y + h + 15),
-                color,
-                -1
-            )
-            cv2.rectangle(
-                frame,
-                (x, y + h + 5),
-                (x + w, y + h + 15),
-                color,
-                1
-            )
-        
-        return frame
\ No newline at end of file
+        if self._renderer is None:
+            self._renderer = OverlayRenderer()
+        return self._renderer.draw_emotion_box(frame, emotion, confidence, x, y, w, h)
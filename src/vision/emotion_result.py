@@ -0,0 +1,72 @@
+"""
+Tipos y utilidades comunes a todos los backends de emociones.
+
+Se mantienen fuera de emotion_recognizer.py para que los backends livianos
+(OpenCV DNN / ONNX) no tengan que importar FER ni TensorFlow.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+
+# Emociones del proyecto, en el orden en que se muestran
+PROJECT_EMOTIONS = ("happy", "sad", "angry", "surprise", "neutral")
+
+# Mapeo de emociones FER (7) → Proyecto (5)
+EMOTION_MAP = {
+    "happy": "happy",
+    "sad": "sad",
+    "angry": "angry",
+    "surprise": "surprise",
+    "neutral": "neutral",
+    "fear": "sad",
+    "disgust": "angry"
+}
+
+
+@dataclass
+class EmotionResult:
+    """
+    Resultado puro del análisis de emociones (sin dibujar nada).
+      - top_emotion: emoción dominante (o None si no hay cara)
+      - confidence: confianza de la emoción dominante (0-1)
+      - emotions: scores normalizados de las 5 emociones del proyecto
+      - box: (x, y, w, h) de la cara en píxeles
+      - capture_ts: instante de captura del frame analizado (perf_counter)
+    """
+    top_emotion: Optional[str] = None
+    confidence: float = 0.0
+    emotions: Dict[str, float] = field(default_factory=dict)
+    box: Optional[Tuple[int, int, int, int]] = None
+    capture_ts: Optional[float] = None
+
+
+def consolidate_emotions(raw_emotions: Dict[str, float],
+                         emotion_map: Dict[str, str] = EMOTION_MAP
+                         ) -> Tuple[str, float, Dict[str, float]]:
+    """
+    Consolida las 7 emociones de FER en las 5 del proyecto y normaliza.
+    Devuelve (emoción dominante, confianza, scores normalizados).
+    """
+    # Consolidar emociones al formato del proyecto (5 emociones)
+    emotions_consolidated = {emotion: 0.0 for emotion in PROJECT_EMOTIONS}
+
+    # Sumar emociones mapeadas
+    for fer_emo, project_emo in emotion_map.items():
+        if fer_emo in raw_emotions:
+            emotions_consolidated[project_emo] += raw_emotions[fer_emo]
+
+    # Normalizar a 0-1
+    total = sum(emotions_consolidated.values())
+    if total > 0:
+        emotions_normalized = {
+            k: v / total for k, v in emotions_consolidated.items()
+        }
+    else:
+        emotions_normalized = emotions_consolidated
+
+    # Obtener emoción dominante
+    top_emotion = max(emotions_normalized, key=emotions_normalized.get)
+    confidence = emotions_normalized[top_emotion]
+
+    return top_emotion, confidence, emotions_normalized
@@ -0,0 +1,333 @@
+"""
+Bus de frames en memoria compartida.
+
+Un único productor captura de la cámara y publica cada frame en un anillo
+de memoria compartida (multiprocessing.shared_memory). Varios consumidores
+(vista de emociones, vista de gestos, grabador) leen el
+último frame sin copiarlo, cada uno a su propio ritmo.
+
+Así las dos vistas pueden usar la misma webcam a la vez sin capturar ni
+decodificar dos veces.
+"""
+
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from monitoring.metrics import CAMERA_READ_LATENCY, FRAMES_CAPTURED
+from vision.camera import Camera, CameraConfig
+from vision.recording import FrameRecorder, FrameReplayer, new_session_path
+
+
+# (número de secuencia, timestamp de captura en perf_counter, frame BGR)
+FramePacket = Tuple[int, float, np.ndarray]
+
+
+class FrameBus:
+    """
+    Anillo de `slots` frames BGR en memoria compartida.
+
+    Cabecera (int64): [último seq publicado, seq de cada slot...]
+    Timestamps (float64): uno por slot
+    Frames (uint8): slots x alto x ancho x 3
+
+    Cada slot funciona como un seqlock: el productor marca el slot con -1
+    mientras escribe y luego con el nuevo seq. Un lector valida que el seq
+    del slot no cambió para saber que el frame sigue siendo el que pidió.
+
+    Las vistas devueltas por `read_latest` son de solo lectura y válidas
+    hasta que el productor da la vuelta al anillo (slots - 1 frames después);
+    quien necesite el frame por más tiempo debe pedir copy=True.
+
+    `shm_name` fija el nombre del segmento compartido (por defecto uno
+    aleatorio). Con un nombre conocido, quien supervisa al proceso puede
+    liberarlo con `unlink_shared_memory` si el proceso muere sin cerrar el bus.
+    """
+
+    def __init__(self, camera: Optional[Camera] = None, slots: int = 8,
+                 shm_name: Optional[str] = None):
+        self.camera = camera
+        self.slots = slots
+        self.shm_name = shm_name
+
+        self.shape: Optional[Tuple[int, int, int]] = None
+        self.name: Optional[str] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._owner = camera is not None
+
+        self._seqs = None
+        self._stamps = None
+        self._frames = None
+        self._frames_readonly = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._new_frame = threading.Condition()
+        self._ready = threading.Event()
+
+        # Estadísticas del productor
+        self.frames_captured = 0
+        self.capture_errors = 0
+
+    # ------------------------------------------------------------------
+    # Memoria compartida
+    # ------------------------------------------------------------------
+    def _layout(self, shape):
+        """Crea las vistas numpy sobre el buffer compartido."""
+        header_bytes = (1 + self.slots) * 8
+        stamps_bytes = self.slots * 8
+        buf = self._shm.buf
+
+        self._seqs = np.ndarray((1 + self.slots,), dtype=np.int64, buffer=buf, offset=0)
+        self._stamps = np.ndarray(
+            (self.slots,), dtype=np.float64, buffer=buf, offset=header_bytes
+        )
+        self._frames = np.ndarray(
+            (self.slots,) + tuple(shape), dtype=np.uint8, buffer=buf,
+            offset=header_bytes + stamps_bytes,
+        )
+        self._frames_readonly = self._frames.view()
+        self._frames_readonly.flags.writeable = False
+
+    def _allocate(self, shape):
+        """Reserva el anillo para frames de la forma dada."""
+        frame_bytes = int(np.prod(shape))
+        size = (1 + self.slots) * 8 + self.slots * 8 + self.slots * frame_bytes
+
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=size)
+        except FileExistsError:
+            # Resto de un proceso anterior que murió sin cerrar el bus
+            unlink_shared_memory(self.shm_name)
+            self._shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=size)
+        self.name = self._shm.name
+        self.shape = tuple(shape)
+        self._layout(shape)
+        self._seqs[:] = -1
+        self._stamps[:] = 0.0
+
+    # ------------------------------------------------------------------
+    # Productor
+    # ------------------------------------------------------------------
+    def start(self) -> bool:
+        """Abre la cámara y lanza el hilo de captura. False si no hay cámara."""
+        if self.camera is None:
+            raise RuntimeError("Un bus sin cámara no puede capturar")
+        if self._running:
+            return True
+        if not self.camera.open():
+            return False
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._capture_loop, name="FrameBusCapture", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def _capture_loop(self):
+        """Captura frames y los publica en el anillo."""
+        seq = -1
+        captured_metric = FRAMES_CAPTURED.labels(camera=self.camera.index)
+        while self._running:
+            start = time.perf_counter()
+            ret, frame = self.camera.read()
+            stamp = time.perf_counter()
+            CAMERA_READ_LATENCY.observe(stamp - start)
+
+            if not ret or frame is None:
+                self.capture_errors += 1
+                time.sleep(0.05)
+                continue
+
+            if self._shm is None:
+                self._allocate(frame.shape)
+                self._ready.set()
+            elif frame.shape != self.shape:
+                # El driver cambió de resolución: adaptar al tamaño del anillo
+                frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+
+            seq += 1
+            self.publish(seq, stamp, frame)
+            captured_metric.inc()
+
+    def publish(self, seq: int, stamp: float, frame: np.ndarray) -> None:
+        """Escribe un frame en su slot y lo marca como el último disponible."""
+        slot = seq % self.slots
+
+        self._seqs[1 + slot] = -1              # slot en escritura
+        np.copyto(self._frames[slot], frame)
+        self._stamps[slot] = stamp
+        self._seqs[1 + slot] = seq             # slot válido
+        self._seqs[0] = seq                    # último publicado
+        self.frames_captured += 1
+
+        with self._new_frame:
+            self._new_frame.notify_all()
+
+    # ------------------------------------------------------------------
+    # Consumidores
+    # ------------------------------------------------------------------
+    def read_latest(self, after_seq: int = -1, copy: bool = False) -> Optional[FramePacket]:
+        """
+        Devuelve (seq, timestamp, frame) del último frame publicado, o None si
+        no hay uno más nuevo que `after_seq`. Sin copy, el frame es una vista
+        de solo lectura sobre la memoria compartida.
+        """
+        if not self._ready.is_set():
+            return None
+
+        for _ in range(3):
+            seq = int(self._seqs[0])
+            if seq < 0 or seq <= after_seq:
+                return None
+
+            slot = seq % self.slots
+            frame = self._frames_readonly[slot]
+            stamp = float(self._stamps[slot])
+            if copy:
+                frame = frame.copy()
+
+            # Si el productor no sobrescribió el slot mientras leíamos, es válido
+            if int(self._seqs[1 + slot]) == seq:
+                return seq, stamp, frame
+
+        return None
+
+    def wait_for_frame(self, after_seq: int = -1, timeout: float = 0.5,
+                       copy: bool = False) -> Optional[FramePacket]:
+        """
+        Como read_latest, pero espera hasta `timeout` a que llegue un frame
+        nuevo. Con el productor en este proceso se espera su aviso; si no,
+        se consulta el anillo cada pocos milisegundos (sin girar en vacío).
+        """
+        packet = self.read_latest(after_seq, copy)
+        if packet is not None:
+            return packet
+
+        if self._owner:
+            with self._new_frame:
+                self._new_frame.wait(timeout)
+            return self.read_latest(after_seq, copy)
+
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            time.sleep(0.005)
+            packet = self.read_latest(after_seq, copy)
+            if packet is not None:
+                return packet
+        return None
+
+    # ------------------------------------------------------------------
+    # Cierre
+    # ------------------------------------------------------------------
+    def stop(self):
+        """Detiene la captura, libera la cámara y la memoria compartida."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+        if self.camera is not None:
+            self.camera.release()
+
+        # Soltar las vistas antes de cerrar el buffer
+        self._seqs = self._stamps = self._frames = self._frames_readonly = None
+        self._ready.clear()
+
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+
+def unlink_shared_memory(name: Optional[str]) -> bool:
+    """
+    Libera el segmento compartido `name` si todavía existe (p. ej. el de un
+    proceso terminado a la fuerza). Devuelve True si había algo que liberar.
+    """
+    if not name:
+        return False
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
+
+
+# ----------------------------------------------------------------------
+# Buses compartidos dentro del proceso (una captura por cámara)
+# ----------------------------------------------------------------------
+_shared_buses: Dict[int, FrameBus] = {}
+_shared_refs: Dict[int, int] = {}
+_shared_recorders: Dict[int, FrameRecorder] = {}
+_shared_lock = threading.Lock()
+
+
+def acquire_frame_bus(index: int = 0, shm_name: Optional[str] = None) -> Optional[FrameBus]:
+    """
+    Devuelve el bus de la cámara `index`, creándolo si es el primer usuario.
+    Devuelve None si la cámara no se pudo abrir. `shm_name` se usa solo al
+    crearlo (ver FrameBus).
+
+    Variables de entorno para depuración:
+      - REPLAY_SESSION=<carpeta>: usar una sesión grabada en lugar de la cámara
+      - RECORD_SESSION=<carpeta>: grabar todos los frames capturados en una
+        sesión nueva <carpeta>/cam<índice>-<fecha>-<hora> (reabrir la vista o
+        usar varias cámaras no pisa sesiones anteriores)
+      - CAMERA_WIDTH/HEIGHT/FPS/FOURCC/BUFFERSIZE/BACKEND: formato de captura
+        (ver CameraConfig.from_env)
+    """
+    with _shared_lock:
+        bus = _shared_buses.get(index)
+        if bus is None:
+            replay_path = os.environ.get("REPLAY_SESSION")
+            source = (FrameReplayer(replay_path) if replay_path
+                      else Camera(index=index, config=CameraConfig.from_env()))
+
+            bus = FrameBus(source, shm_name=shm_name)
+            if not bus.start():
+                return None
+            _shared_buses[index] = bus
+            _shared_refs[index] = 0
+
+            record_path = os.environ.get("RECORD_SESSION")
+            if record_path:
+                session_path = new_session_path(record_path, f"cam{index}")
+                _shared_recorders[index] = FrameRecorder(session_path).start().attach(bus)
+
+        _shared_refs[index] += 1
+        return bus
+
+
+def default_camera_index() -> int:
+    """Cámara de las vistas: CAMERA_INDEX o 0 (una instancia de la app por cámara)."""
+    return int(os.environ.get("CAMERA_INDEX", 0))
+
+
+def release_frame_bus(bus: Optional[FrameBus]) -> None:
+    """Libera una referencia al bus; el último usuario cierra la cámara."""
+    if bus is None:
+        return
+
+    with _shared_lock:
+        for index, shared in list(_shared_buses.items()):
+            if shared is not bus:
+                continue
+            _shared_refs[index] -= 1
+            if _shared_refs[index] <= 0:
+                del _shared_buses[index]
+                del _shared_refs[index]
+                recorder = _shared_recorders.pop(index, None)
+                if recorder is not None:
+                    recorder.stop()
+                bus.stop()
+            return
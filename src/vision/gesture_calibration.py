@@ -0,0 +1,385 @@
+"""
+Calibración y evaluación de los umbrales de GestureRecognizer.
+
+Las reglas de los gestos comparan distancias y márgenes contra umbrales
+fijos. Aquí esas mismas reglas se evalúan vectorizadas sobre un dataset
+etiquetado de landmarks: primero se calculan una vez las magnitudes que
+las reglas comparan (features por muestra) y luego se clasifican todas
+las muestras para miles de combinaciones de umbrales a la vez, con
+broadcasting (combinaciones x muestras). Evaluar 5000 combinaciones sobre
+unos miles de muestras toma segundos.
+
+Dataset (.npz): landmarks (N, 21, 3) crudos de MediaPipe y labels (N,).
+Se arma grabando una sesión por gesto (vision.recording) y etiquetándola:
+
+    python src/calibrate_gestures.py collect sesiones/puño --label FIST
+    python src/calibrate_gestures.py evaluate
+    python src/calibrate_gestures.py search --trials 5000 --write
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vision.gesture_recognizer import GestureRecognizer
+from vision.landmarks import NUM_LANDMARKS, array_to_landmarks, landmarks_to_array
+
+
+DATASET_PATH = "src/vision/gesture_dataset.npz"
+
+# Códigos de salida de las reglas (UNKNOWN al final)
+GESTURES = ("OPEN_HAND", "FIST", "LIKE", "INDEX", "PEACE", "UNKNOWN")
+_CODE = {name: code for code, name in enumerate(GESTURES)}
+UNKNOWN_CODE = _CODE["UNKNOWN"]
+
+PARAM_NAMES = tuple(GestureRecognizer.DEFAULT_THRESHOLDS)
+_P = {name: i for i, name in enumerate(PARAM_NAMES)}
+
+_TIPS, _PIPS, _MCPS = [8, 12, 16, 20], [6, 10, 14, 18], [5, 9, 13, 17]
+
+
+# ----------------------------------------------------------------------
+# Dataset
+# ----------------------------------------------------------------------
+def load_dataset(path: str = DATASET_PATH) -> Tuple[np.ndarray, np.ndarray]:
+    """Devuelve (landmarks (N, 21, 3) float64, labels (N,) str)."""
+    data = np.load(path, allow_pickle=False)
+    return data["landmarks"].astype(np.float64), data["labels"].astype(str)
+
+
+def save_dataset(path: str, landmarks: np.ndarray, labels: Sequence[str]) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.savez_compressed(
+        path,
+        landmarks=np.asarray(landmarks, dtype=np.float32),
+        labels=np.asarray(labels, dtype=str),
+    )
+    return path
+
+
+def collect_from_session(session_path: str, label: str, max_frames: Optional[int] = None
+                         ) -> np.ndarray:
+    """
+    Corre HandTracker sobre una sesión grabada y devuelve los landmarks de
+    la primera mano de cada frame con mano (todos con la etiqueta `label`).
+    """
+    from vision.hand_tracker import HandTracker
+    from vision.recording import FrameReplayer
+
+    replayer = FrameReplayer(session_path, realtime=False)
+    if not replayer.open():
+        raise FileNotFoundError(f"Sesión no encontrada o vacía: {session_path}")
+
+    tracker = HandTracker(max_num_hands=1)
+    samples = []
+    while max_frames is None or len(samples) < max_frames:
+        ret, frame = replayer.read()
+        if not ret:
+            break
+        result = tracker.detect(frame)
+        if result.has_hands:
+            samples.append(landmarks_to_array(result.landmarks_list[0]))
+    replayer.release()
+
+    print(f"✋ {label}: {len(samples)} muestras de {session_path}")
+    return np.asarray(samples, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+
+
+# ----------------------------------------------------------------------
+# Reglas vectorizadas
+# ----------------------------------------------------------------------
+def _dist(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distancia euclidiana en (x, y), como GestureRecognizer._dist."""
+    return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
+
+
+def compute_features(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Magnitudes que las reglas comparan contra cada umbral, por muestra.
+    No dependen de los umbrales: se calculan una sola vez por dataset.
+    """
+    X = np.asarray(landmarks, dtype=np.float64)
+    wrist = X[:, 0]
+    tips, pips, mcps = X[:, _TIPS], X[:, _PIPS], X[:, _MCPS]
+
+    return {
+        # Pulgar
+        "thumb_extension": _dist(X[:, 4], wrist) - _dist(X[:, 3], wrist),
+        "thumb_up": X[:, 2, 1] - X[:, 4, 1],
+        "thumb_side": np.abs(X[:, 4, 0] - X[:, 5, 0]),
+        "thumb_index": _dist(X[:, 4], X[:, 5]),
+        # Dedos índice..meñique (N, 4)
+        "finger_lift": pips[..., 1] - tips[..., 1],
+        "finger_palm": _dist(tips, wrist[:, None]) - _dist(mcps, wrist[:, None]),
+    }
+
+
+def classify_vectorized(features: Dict[str, np.ndarray], thresholds: np.ndarray) -> np.ndarray:
+    """
+    Aplica las reglas de GestureRecognizer._classify_rules.
+    thresholds: (K, P) en el orden de PARAM_NAMES. Devuelve códigos (K, N).
+    """
+    T = np.atleast_2d(thresholds)
+
+    def t(name):
+        return T[:, _P[name]][:, None]          # (K, 1)
+
+    def t4(name):
+        return T[:, _P[name]][:, None, None]    # (K, 1, 1)
+
+    lift = features["finger_lift"][None]        # (1, N, 4)
+    palm = features["finger_palm"][None]
+    thumb_ext = features["thumb_extension"][None]
+
+    extended = lift > t4("finger_extended_margin")                                  # (K, N, 4)
+    curled = (lift < t4("finger_curled_margin")) | (palm < t4("finger_near_palm"))
+    index_ext, middle_ext, ring_ext, pinky_ext = (extended[..., i] for i in range(4))
+
+    all_extended = extended.all(axis=-1)
+    all_curled = curled.all(axis=-1)
+    none_extended = ~extended.any(axis=-1)
+
+    thumb_clearly_up = (thumb_ext > t("thumb_like_extension")) & (
+        (features["thumb_up"][None] > t("thumb_up_margin")) |
+        (features["thumb_side"][None] > t("thumb_side_separation"))
+    )
+    thumb_relaxed = (thumb_ext < t("thumb_relaxed_extension")) | (
+        features["thumb_index"][None] < t("thumb_near_index")
+    )
+    thumb_extended = thumb_ext > t("thumb_open_extension")
+
+    # Mismo orden que las reglas: gana la primera que se cumple
+    rules = [
+        (thumb_extended & all_extended, "OPEN_HAND"),
+        (none_extended & thumb_relaxed & ~thumb_clearly_up, "FIST"),
+        (thumb_clearly_up & all_curled, "LIKE"),
+        (index_ext & ~middle_ext & ~ring_ext & ~pinky_ext, "INDEX"),
+        (index_ext & middle_ext & ~ring_ext & ~pinky_ext, "PEACE"),
+        (all_curled & ~thumb_clearly_up, "FIST"),
+    ]
+    codes = np.full(all_extended.shape, UNKNOWN_CODE, dtype=np.int8)
+    for condition, gesture in reversed(rules):
+        codes = np.where(condition, np.int8(_CODE[gesture]), codes)
+    return codes
+
+
+def encode_labels(labels: Sequence[str]) -> np.ndarray:
+    """Etiquetas a códigos; los gestos personalizados cuentan como UNKNOWN."""
+    return np.array([_CODE.get(label, UNKNOWN_CODE) for label in labels], dtype=np.int8)
+
+
+def thresholds_vector(thresholds: Dict[str, float]) -> np.ndarray:
+    return np.array([thresholds[name] for name in PARAM_NAMES], dtype=np.float64)
+
+
+# ----------------------------------------------------------------------
+# Evaluación y búsqueda
+# ----------------------------------------------------------------------
+def confusion_matrix(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    """Matriz (real, predicho) sobre GESTURES."""
+    n = len(GESTURES)
+    return np.bincount(y_true.astype(np.int64) * n + y_pred, minlength=n * n).reshape(n, n)
+
+
+def score_thresholds(features: Dict[str, np.ndarray], y: np.ndarray, candidates: np.ndarray,
+                     chunk_elements: int = 4_000_000) -> np.ndarray:
+    """Exactitud de cada combinación (K,), procesando K por bloques acotados en memoria."""
+    n = len(y)
+    chunk = max(1, chunk_elements // max(1, n * 4))
+    scores = np.empty(len(candidates))
+    for start in range(0, len(candidates), chunk):
+        codes = classify_vectorized(features, candidates[start:start + chunk])
+        scores[start:start + chunk] = (codes == y[None]).mean(axis=1)
+    return scores
+
+
+def random_candidates(base: np.ndarray, trials: int, spread: float = 0.5,
+                      seed: int = 0) -> np.ndarray:
+    """Combinaciones aleatorias en [base*(1-spread), base*(1+spread)]; la fila 0 es la base."""
+    rng = np.random.default_rng(seed)
+    factors = rng.uniform(1.0 - spread, 1.0 + spread, size=(trials, len(base)))
+    factors[0] = 1.0
+    return base[None] * factors
+
+
+def grid_candidates(base: np.ndarray, grid: Dict[str, Sequence[float]]) -> np.ndarray:
+    """Producto cartesiano de los valores dados; el resto de umbrales queda en la base."""
+    names = list(grid)
+    mesh = np.meshgrid(*[np.asarray(grid[name], dtype=np.float64) for name in names], indexing="ij")
+    candidates = np.repeat(base[None], mesh[0].size, axis=0)
+    for name, values in zip(names, mesh):
+        candidates[:, _P[name]] = values.ravel()
+    return candidates
+
+
+def measure_latency(landmarks: np.ndarray, thresholds: Dict[str, float],
+                    samples: int = 500) -> Dict[str, float]:
+    """Costo por mano del clasificador por reglas (camino normal, no vectorizado)."""
+    recognizer = GestureRecognizer(thresholds=thresholds)
+    hands = [array_to_landmarks(x) for x in landmarks[:samples]]
+    if not hands:
+        return {}
+
+    start = time.perf_counter()
+    for hand in hands:
+        recognizer._classify_rules(hand)
+    per_hand = (time.perf_counter() - start) / len(hands)
+    return {"rules_us": per_hand * 1e6}
+
+
+def print_confusion(matrix: np.ndarray) -> None:
+    labels = [g[:9] for g in GESTURES]
+    print("   real \\ pred " + " ".join(f"{g:>9s}" for g in labels))
+    for name, row in zip(labels, matrix):
+        if row.sum():
+            print(f"   {name:13s} " + " ".join(f"{v:9d}" for v in row))
+
+
+def evaluate(landmarks: np.ndarray, labels: np.ndarray, thresholds: Dict[str, float]) -> Dict:
+    """Exactitud, matriz de confusión y latencia para un juego de umbrales."""
+    y = encode_labels(labels)
+    codes = classify_vectorized(compute_features(landmarks), thresholds_vector(thresholds))[0]
+    return {
+        "accuracy": float((codes == y).mean()),
+        "confusion": confusion_matrix(y, codes),
+        "latency": measure_latency(landmarks, thresholds),
+    }
+
+
+def write_thresholds(thresholds: Dict[str, float], accuracy: float, baseline: float,
+                     samples: int, path: Optional[str] = None) -> str:
+    """Guarda los umbrales en el archivo que carga GestureRecognizer."""
+    path = path or GestureRecognizer.THRESHOLDS_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "thresholds": {name: round(value, 5) for name, value in thresholds.items()},
+            "accuracy": accuracy,
+            "baseline_accuracy": baseline,
+            "samples": samples,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }, f, indent=2)
+    return path
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def _current_thresholds() -> Dict[str, float]:
+    """Umbrales vigentes: los por defecto más el archivo calibrado si existe."""
+    return dict(GestureRecognizer.DEFAULT_THRESHOLDS, **_load_saved_thresholds())
+
+
+def _load_saved_thresholds() -> Dict[str, float]:
+    path = GestureRecognizer.THRESHOLDS_PATH
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("thresholds", {})
+
+
+def _cmd_collect(args) -> int:
+    samples = collect_from_session(args.session, args.label, args.max_frames)
+    if len(samples) == 0:
+        print("⚠️ No se detectaron manos en la sesión")
+        return 1
+
+    if os.path.exists(args.dataset):
+        landmarks, labels = load_dataset(args.dataset)
+        landmarks = np.concatenate([landmarks, samples])
+        labels = np.concatenate([labels, [args.label] * len(samples)])
+    else:
+        landmarks, labels = samples, [args.label] * len(samples)
+
+    save_dataset(args.dataset, landmarks, labels)
+    print(f"💾 Dataset: {len(labels)} muestras en {args.dataset}")
+    return 0
+
+
+def _print_evaluation(title: str, report: Dict) -> None:
+    print(f"{title}: exactitud {report['accuracy'] * 100:.1f}%"
+          + (f" | {report['latency']['rules_us']:.1f} µs/mano" if report["latency"] else ""))
+    print_confusion(report["confusion"])
+
+
+def _cmd_evaluate(args) -> int:
+    landmarks, labels = load_dataset(args.dataset)
+    _print_evaluation("📏 Umbrales actuales", evaluate(landmarks, labels, _current_thresholds()))
+    return 0
+
+
+def _cmd_search(args) -> int:
+    landmarks, labels = load_dataset(args.dataset)
+    y = encode_labels(labels)
+    features = compute_features(landmarks)
+    base = thresholds_vector(_current_thresholds())
+
+    if args.grid:
+        grid = {}
+        for spec in args.grid:
+            name, values = spec.split("=", 1)
+            if name not in _P:
+                raise ValueError(f"Umbral desconocido: '{name}'")
+            grid[name] = [float(v) for v in values.split(",")]
+        candidates = grid_candidates(base, grid)
+    else:
+        candidates = random_candidates(base, args.trials, args.spread, args.seed)
+
+    start = time.perf_counter()
+    scores = score_thresholds(features, y, candidates)
+    elapsed = time.perf_counter() - start
+
+    # Con empates gana la más cercana a los umbrales actuales
+    best_score = scores.max()
+    tied = np.flatnonzero(scores >= best_score - 1e-12)
+    closeness = np.abs(candidates[tied] / base[None] - 1.0).sum(axis=1)
+    best = int(tied[np.argmin(closeness)])
+
+    print(f"🔎 {len(candidates)} combinaciones x {len(y)} muestras en {elapsed:.2f} s")
+    print(f"   Base: {scores[0] * 100:.1f}% → mejor: {best_score * 100:.1f}%")
+    best_thresholds = dict(zip(PARAM_NAMES, candidates[best].tolist()))
+    for name in PARAM_NAMES:
+        print(f"   {name:24s} {base[_P[name]]:.4f} → {best_thresholds[name]:.4f}")
+
+    _print_evaluation("📏 Mejor combinación", evaluate(landmarks, labels, best_thresholds))
+
+    if args.write:
+        path = write_thresholds(best_thresholds, float(best_score), float(scores[0]), len(y))
+        print(f"💾 Umbrales guardados en {path}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibra los umbrales de los gestos")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset etiquetado (.npz)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect = commands.add_parser("collect", help="Agregar una sesión grabada al dataset")
+    collect.add_argument("session", help="Carpeta de la sesión")
+    collect.add_argument("--label", required=True, help="Gesto de toda la sesión (p. ej. FIST)")
+    collect.add_argument("--max-frames", type=int, default=None)
+
+    commands.add_parser("evaluate", help="Exactitud y confusión con los umbrales actuales")
+
+    search = commands.add_parser("search", help="Buscar mejores umbrales")
+    search.add_argument("--trials", type=int, default=5000, help="Combinaciones aleatorias")
+    search.add_argument("--spread", type=float, default=0.5,
+                        help="Variación relativa máxima alrededor de los umbrales actuales")
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--grid", nargs="+", metavar="NOMBRE=v1,v2,...",
+                        help="Búsqueda en grilla sobre estos umbrales (en vez de aleatoria)")
+    search.add_argument("--write", action="store_true",
+                        help=f"Guardar la mejor combinación en {GestureRecognizer.THRESHOLDS_PATH}")
+
+    args = parser.parse_args(argv)
+    handlers = {"collect": _cmd_collect, "evaluate": _cmd_evaluate, "search": _cmd_search}
+    return handlers[args.command](args)
@@ -3,9 +3,13 @@ Reconocedor de Gestos Mejorado v2
 Mejor diferenciación entre FIST y LIKE
 """
 
-from typing import List
+from typing import Dict, List, Optional
 from mediapipe.framework.formats import landmark_pb2
+import json
 import math
+import os
+
+from vision.gesture_templates import TemplateGestureRecognizer
 
 
 class GestureRecognizer:
@@ -21,13 +25,77 @@ class GestureRecognizer:
       - INDEX: solo índice extendido (☝️)
       - LIKE: pulgar MUY extendido hacia arriba, resto cerrado (👍)
       - UNKNOWN: cualquier otra cosa
+
+    Si se le pasa un TemplateGestureRecognizer, los gestos grabados por el
+    usuario se consultan primero y las reglas quedan como respaldo.
+
+    Los umbrales de las reglas (en coordenadas normalizadas) salen de
+    DEFAULT_THRESHOLDS y, si existe, de THRESHOLDS_PATH, que genera la
+    herramienta de calibración (vision.gesture_calibration).
     """
 
+    THRESHOLDS_PATH = "src/vision/gesture_thresholds.json"
+
+    DEFAULT_THRESHOLDS = {
+        "thumb_like_extension": 0.06,    # LIKE: punta del pulgar más lejos de la muñeca que la IP
+        "thumb_up_margin": 0.05,         # LIKE: punta del pulgar por encima del MCP
+        "thumb_side_separation": 0.12,   # LIKE: pulgar lateral separado del índice
+        "thumb_relaxed_extension": 0.05, # FIST: pulgar no extendido
+        "thumb_near_index": 0.10,        # FIST: pulgar cerca del nudillo del índice
+        "thumb_open_extension": 0.03,    # OPEN_HAND: pulgar extendido
+        "finger_extended_margin": 0.02,  # Dedo extendido: punta por encima del PIP
+        "finger_curled_margin": 0.02,    # Dedo cerrado: punta por debajo (o cerca) del PIP
+        "finger_near_palm": 0.06,        # Dedo cerrado: punta cerca de la palma
+    }
+
     # Índices estándar de MediaPipe Hands
     FINGER_TIPS = [4, 8, 12, 16, 20]   # [pulgar, índice, medio, anular, meñique]
     FINGER_PIPS = [3, 6, 10, 14, 18]
     FINGER_MCPS = [2, 5, 9, 13, 17]    # Nudillos
 
+    def __init__(self, templates: Optional[TemplateGestureRecognizer] = None,
+                 thresholds: Optional[Dict[str, float]] = None,
+                 thresholds_path: Optional[str] = None):
+        self.templates = templates
+        self.thresholds = dict(self.DEFAULT_THRESHOLDS)
+        if thresholds is None:
+            self.load_thresholds(thresholds_path)
+        else:
+            self.set_thresholds(thresholds)
+
+    def set_thresholds(self, thresholds: Dict[str, float]) -> None:
+        """Reemplaza umbrales; los nombres desconocidos son un error."""
+        unknown = set(thresholds) - set(self.DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Umbrales desconocidos: {sorted(unknown)}")
+        self.thresholds.update({name: float(value) for name, value in thresholds.items()})
+
+        t = self.thresholds
+        self._t_like = t["thumb_like_extension"]
+        self._t_up = t["thumb_up_margin"]
+        self._t_side = t["thumb_side_separation"]
+        self._t_relaxed = t["thumb_relaxed_extension"]
+        self._t_near_index = t["thumb_near_index"]
+        self._t_open = t["thumb_open_extension"]
+        self._t_ext = t["finger_extended_margin"]
+        self._t_curl = t["finger_curled_margin"]
+        self._t_palm = t["finger_near_palm"]
+
+    def load_thresholds(self, path: Optional[str] = None) -> bool:
+        """
+        Carga umbrales calibrados ({"thresholds": {...}}) si el archivo existe.
+        Devuelve True si se cargó algo.
+        """
+        path = path or self.THRESHOLDS_PATH
+        if not os.path.exists(path):
+            self.set_thresholds({})
+            return False
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.set_thresholds(data.get("thresholds", {}))
+        return True
+
     @staticmethod
     def _dist(a, b) -> float:
         """Distancia euclidiana en coordenadas normalizadas (x, y)."""
@@ -52,14 +120,14 @@ class GestureRecognizer:
         
         # Para LIKE: el pulgar debe estar MUY extendido
         # La punta debe estar significativamente más lejos que la IP
-        clearly_extended = d_tip_wrist > d_ip_wrist + 0.06  # Umbral más alto
+        clearly_extended = d_tip_wrist > d_ip_wrist + self._t_like  # Umbral más alto
         
         # Además, verificar que el pulgar apunta hacia ARRIBA
         # (no solo hacia el lado como en un puño natural)
-        thumb_points_up = thumb_tip.y < thumb_mcp.y - 0.05
+        thumb_points_up = thumb_tip.y < thumb_mcp.y - self._t_up
         
         # O que está muy separado horizontalmente (pulgar lateral)
-        thumb_very_separated = abs(thumb_tip.x - index_mcp.x) > 0.12
+        thumb_very_separated = abs(thumb_tip.x - index_mcp.x) > self._t_side
         
         return clearly_extended and (thumb_points_up or thumb_very_separated)
 
@@ -78,11 +146,11 @@ class GestureRecognizer:
         d_ip_wrist = self._dist(thumb_ip, wrist)
         
         # Pulgar relajado: punta NO está mucho más lejos que IP
-        not_extended = d_tip_wrist < d_ip_wrist + 0.05
+        not_extended = d_tip_wrist < d_ip_wrist + self._t_relaxed
         
         # O el pulgar está cerca del índice (posición de puño)
         d_tip_index = self._dist(thumb_tip, index_mcp)
-        near_index = d_tip_index < 0.10
+        near_index = d_tip_index < self._t_near_index
         
         return not_extended or near_index
 
@@ -97,7 +165,7 @@ class GestureRecognizer:
         d_tip_wrist = self._dist(thumb_tip, wrist)
         d_ip_wrist = self._dist(thumb_ip, wrist)
         
-        return d_tip_wrist > d_ip_wrist + 0.03
+        return d_tip_wrist > d_ip_wrist + self._t_open
 
     def _finger_extended(self, lm, finger_idx: int) -> bool:
         """
@@ -109,7 +177,7 @@ class GestureRecognizer:
         mcp = lm[self.FINGER_MCPS[finger_idx]]
         
         # Dedo extendido: punta más arriba que PIP
-        return tip.y < pip.y - 0.02
+        return tip.y < pip.y - self._t_ext
 
     def _finger_curled(self, lm, finger_idx: int) -> bool:
         """
@@ -122,19 +190,54 @@ class GestureRecognizer:
         wrist = lm[0]
         
         # Dedo cerrado: punta debajo o cerca del PIP
-        tip_below_pip = tip.y > pip.y - 0.02
+        tip_below_pip = tip.y > pip.y - self._t_curl
         
         # También: punta cerca de la palma
         d_tip_wrist = self._dist(tip, wrist)
         d_mcp_wrist = self._dist(mcp, wrist)
-        tip_near_palm = d_tip_wrist < d_mcp_wrist + 0.06
+        tip_near_palm = d_tip_wrist < d_mcp_wrist + self._t_palm
         
         return tip_below_pip or tip_near_palm
 
-    def classify(self, hand_landmarks) -> str:
+    def classify_batch(self, hands_landmarks: List,
+                       handedness: Optional[List[str]] = None,
+                       aspect_ratio: float = 1.0) -> List[str]:
+        """
+        Clasifica todas las manos de un frame en una sola llamada.
+        Devuelve un gesto por mano, en el mismo orden de entrada.
+        `aspect_ratio` (ancho / alto del frame) lo usan las plantillas.
+        """
+        handedness = handedness or [None] * len(hands_landmarks)
+        hands = [lm for lm in hands_landmarks if len(lm) == 21]
+        if len(hands) != len(hands_landmarks):
+            return [self.classify(lm, hand, aspect_ratio)
+                    for lm, hand in zip(hands_landmarks, handedness)]
+
+        gestures = ["UNKNOWN"] * len(hands)
+        if self.templates is not None and self.templates.is_ready:
+            gestures = self.templates.classify_batch(hands, handedness, aspect_ratio)
+
+        classify_rules = self._classify_rules
+        return [
+            gesture if gesture != "UNKNOWN" else classify_rules(lm)
+            for gesture, lm in zip(gestures, hands)
+        ]
+
+    def classify(self, hand_landmarks, hand: Optional[str] = None,
+                 aspect_ratio: float = 1.0) -> str:
         if len(hand_landmarks) != 21:
             return "UNKNOWN"
 
+        if self.templates is not None and self.templates.is_ready:
+            gesture = self.templates.classify(hand_landmarks, hand, aspect_ratio)
+            if gesture != "UNKNOWN":
+                return gesture
+
+        return self._classify_rules(hand_landmarks)
+
+    def _classify_rules(self, hand_landmarks) -> str:
+        """Clasificación por reglas de los 5 gestos incorporados."""
+
         lm = hand_landmarks
 
         # ----- Estado de los dedos -----
@@ -0,0 +1,231 @@
+"""
+Reconocedor de gestos por plantillas (vecino más cercano).
+
+El usuario graba algunas muestras de una pose; los landmarks se normalizan
+(traslación, escala y rotación) a un vector de características y la
+clasificación es una búsqueda del vecino más cercano contra un índice
+pre-construido, con umbral de rechazo.
+
+Las distancias a todas las plantillas se calculan con una sola
+multiplicación matriz-vector (||a||² - 2·a·b + ||b||²), lo que para
+cientos de plantillas toma microsegundos; no hace falta un KD-tree.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vision.landmarks import NUM_LANDMARKS, landmarks_to_array
+
+
+WRIST = 0
+MIDDLE_MCP = 9
+
+
+def normalize_landmarks(hands: np.ndarray, mirror: Optional[np.ndarray] = None,
+                        aspect_ratio: float = 1.0) -> np.ndarray:
+    """
+    Normaliza un lote de manos (N, 21, 3) y devuelve vectores (N, 63).
+
+    - Unidades: MediaPipe normaliza x por el ancho e y por el alto del frame;
+      x se multiplica por `aspect_ratio` (ancho / alto) para que ambos ejes
+      queden en la misma unidad antes de rotar y escalar
+    - Traslación: la muñeca pasa al origen
+    - Rotación: la dirección muñeca -> nudillo medio apunta hacia arriba (-y)
+    - Escala: el tamaño de la palma (muñeca -> nudillo medio) vale 1
+    - Espejo (opcional, por mano): se invierte x para que la mano izquierda
+      use las mismas plantillas que la derecha
+    """
+    hands = np.asarray(hands, dtype=np.float32)
+    if hands.ndim == 2:
+        hands = hands[None]
+
+    centered = hands - hands[:, WRIST:WRIST + 1, :]
+    # z de MediaPipe usa la escala de x: se corrige igual
+    centered[:, :, 0] *= aspect_ratio
+    centered[:, :, 2] *= aspect_ratio
+
+    if mirror is not None:
+        centered[np.asarray(mirror, dtype=bool), :, 0] *= -1.0
+
+    # Ángulo de la palma en el plano de la imagen
+    palm = centered[:, MIDDLE_MCP, :2]
+    angle = np.arctan2(palm[:, 0], -palm[:, 1])
+    cos, sin = np.cos(angle), np.sin(angle)
+
+    x = centered[:, :, 0]
+    y = centered[:, :, 1]
+    rotated_x = cos[:, None] * x + sin[:, None] * y
+    rotated_y = cos[:, None] * y - sin[:, None] * x
+
+    scale = np.linalg.norm(palm, axis=1)
+    scale[scale < 1e-6] = 1.0
+
+    normalized = np.stack([rotated_x, rotated_y, centered[:, :, 2]], axis=2)
+    normalized /= scale[:, None, None]
+    return normalized.reshape(len(normalized), NUM_LANDMARKS * 3)
+
+
+class TemplateGestureRecognizer:
+    """
+    Índice de plantillas de gestos definido por el usuario.
+
+    - max_distance: distancia RMS por landmark (en unidades de palma) por
+      encima de la cual se rechaza la coincidencia ("UNKNOWN")
+    - k: número de vecinos que votan (1 = vecino más cercano)
+
+    Los landmarks de las muestras y de las consultas se pasan con la
+    relación de aspecto (ancho / alto) del frame en que se detectaron
+    (HandResult.aspect_ratio); así una plantilla grabada a 640x480 sirve
+    también a 1280x720.
+    """
+
+    TEMPLATES_PATH = "src/vision/gesture_templates.npz"
+
+    def __init__(self, max_distance: float = 0.25, k: int = 1):
+        self.max_distance = max_distance
+        self.k = k
+
+        # Muestras crudas por gesto (vectores normalizados)
+        self.samples: Dict[str, List[np.ndarray]] = {}
+
+        # Índice construido
+        # Índice (nombres, features (M, 63), normas² (M,), etiquetas (M,)).
+        # Se reemplaza entero en build(): un hilo que clasifica nunca ve
+        # una mezcla de índice viejo y nuevo.
+        self._index: Optional[Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]] = None
+
+    # ------------------------------------------------------------------
+    # Muestras
+    # ------------------------------------------------------------------
+    def add_sample(self, gesture: str, hand_landmarks, hand: Optional[str] = None,
+                   aspect_ratio: float = 1.0) -> None:
+        """Agrega una muestra de un gesto. Hay que llamar a `build` después."""
+        mirror = [hand == "Left"]
+        vector = normalize_landmarks(landmarks_to_array(hand_landmarks), mirror, aspect_ratio)[0]
+        self.samples.setdefault(gesture, []).append(vector)
+
+    def remove_gesture(self, gesture: str) -> None:
+        """Elimina todas las muestras de un gesto. Hay que llamar a `build` después."""
+        self.samples.pop(gesture, None)
+
+    @property
+    def gestures(self) -> List[str]:
+        """Nombres de los gestos con plantillas."""
+        return list(self.samples.keys())
+
+    def __len__(self) -> int:
+        return sum(len(vectors) for vectors in self.samples.values())
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+    def build(self) -> None:
+        """Construye la matriz de plantillas usada por `classify`."""
+        names = list(self.samples.keys())
+        if not names:
+            self._index = None
+            return
+
+        vectors = []
+        labels = []
+        for label, name in enumerate(names):
+            vectors.extend(self.samples[name])
+            labels.extend([label] * len(self.samples[name]))
+
+        features = np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+        sq_norms = np.einsum("ij,ij->i", features, features)
+        self._index = (names, features, sq_norms, np.asarray(labels, dtype=np.int32))
+
+    @property
+    def is_ready(self) -> bool:
+        return self._index is not None
+
+    # ------------------------------------------------------------------
+    # Clasificación
+    # ------------------------------------------------------------------
+    def classify(self, hand_landmarks, hand: Optional[str] = None,
+                 aspect_ratio: float = 1.0) -> str:
+        """Devuelve el gesto más cercano, o "UNKNOWN" si ninguno es suficientemente cercano."""
+        return self.classify_batch([hand_landmarks], [hand], aspect_ratio)[0]
+
+    def classify_batch(self, hands_landmarks: List, handedness: Optional[List[str]] = None,
+                       aspect_ratio: float = 1.0) -> List[str]:
+        """Clasifica varias manos con una sola multiplicación de matrices."""
+        if not hands_landmarks:
+            return []
+        index = self._index
+        if index is None:
+            return ["UNKNOWN"] * len(hands_landmarks)
+        names, features, sq_norms, labels = index
+
+        handedness = handedness or [None] * len(hands_landmarks)
+        queries = normalize_landmarks(
+            np.stack([landmarks_to_array(lm) for lm in hands_landmarks]),
+            [hand == "Left" for hand in handedness],
+            aspect_ratio,
+        )
+
+        # Distancias al cuadrado (N, M)
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        sq_dist = q_norms[:, None] - 2.0 * queries @ features.T + sq_norms[None, :]
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+
+        # Umbral como distancia RMS por landmark
+        max_sq = (self.max_distance ** 2) * NUM_LANDMARKS
+
+        results = []
+        k = min(self.k, sq_dist.shape[1])
+        for row in sq_dist:
+            if k == 1:
+                nearest = np.array([int(np.argmin(row))])
+            else:
+                nearest = np.argpartition(row, k - 1)[:k]
+
+            nearest = nearest[row[nearest] <= max_sq]
+            if nearest.size == 0:
+                results.append("UNKNOWN")
+                continue
+
+            votes = np.bincount(labels[nearest], minlength=len(names))
+            results.append(names[int(np.argmax(votes))])
+
+        return results
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def save(self, path: Optional[str] = None) -> str:
+        """Guarda las muestras en un .npz. Devuelve la ruta."""
+        path = path or self.TEMPLATES_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        names = []
+        vectors = []
+        for name, samples in self.samples.items():
+            names.extend([name] * len(samples))
+            vectors.extend(samples)
+
+        np.savez_compressed(
+            path,
+            names=np.array(names, dtype=str),
+            features=np.stack(vectors) if vectors else np.zeros((0, NUM_LANDMARKS * 3), np.float32),
+        )
+        return path
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Carga muestras desde un .npz y construye el índice. False si no existe."""
+        path = path or self.TEMPLATES_PATH
+        if not os.path.exists(path):
+            return False
+
+        data = np.load(path)
+        self.samples = {}
+        for name, vector in zip(data["names"], data["features"]):
+            self.samples.setdefault(str(name), []).append(vector.astype(np.float32))
+
+        self.build()
+        return True
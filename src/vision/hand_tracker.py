@@ -1,18 +1,89 @@
 import cv2
 import mediapipe as mp
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from vision.landmark_filter import OneEuroLandmarkFilter
+from vision.overlay import OverlayRenderer
+
+
+@dataclass
+class HandResult:
+    """
+    Resultado puro de la detección de manos (sin dibujar nada).
+      - landmarks_list: landmarks de cada mano (x, y, z normalizados 0–1)
+      - handedness_list: "Left" / "Right" por mano, mismo orden
+      - hand_landmarks: mensajes originales de MediaPipe (para dibujar)
+      - capture_ts: instante de captura del frame analizado (perf_counter)
+      - aspect_ratio: ancho / alto del frame (x e y están normalizados por
+        lados distintos; hace falta para medir ángulos y distancias)
+    """
+    landmarks_list: List[Any] = field(default_factory=list)
+    handedness_list: List[str] = field(default_factory=list)
+    hand_landmarks: List[Any] = field(default_factory=list)
+    capture_ts: Optional[float] = None
+    aspect_ratio: float = 1.0
+
+    @property
+    def has_hands(self) -> bool:
+        return bool(self.landmarks_list)
 
 
 class HandTracker:
     """
     Encapsula MediaPipe Hands para detectar manos y dibujar landmarks.
+
+    `detect` solo analiza y devuelve un HandResult; el dibujo lo hace
+    vision.overlay.OverlayRenderer cuando alguien va a mostrar el frame.
+    `process` se mantiene por compatibilidad (detect + dibujo en una copia).
+
+    Devuelve también la lateralidad de cada mano ("Left" / "Right") desde
+    el punto de vista del usuario. MediaPipe asume imagen espejada (selfie);
+    como la cámara no se voltea, por defecto se intercambian las etiquetas.
+
+    Modos para reducir el costo por frame (útil con cámaras 1080p):
+      - inference_width: MediaPipe recibe el frame reducido a este ancho.
+      - use_roi: MediaPipe recibe solo un recorte alrededor de las manos del
+        frame anterior (ampliado por roi_expansion). Si en el recorte no hay
+        manos, se repite sobre el frame completo en el mismo frame, y cada
+        roi_refresh_frames se hace una pasada completa para detectar manos nuevas.
+        Los recortes cambian de origen y tamaño en cada frame, así que los
+        procesa una instancia aparte en static_image_mode: el seguimiento de
+        MediaPipe (que arrastra la región de la mano del frame anterior en
+        coordenadas de esa imagen) queda solo para los frames completos.
+    Los landmarks siempre se devuelven normalizados respecto al frame completo.
+
+    smooth_landmarks=True aplica un filtro One Euro por mano a landmarks_list
+    (vision.landmark_filter); los landmarks de MediaPipe para dibujar quedan crudos.
     """
 
+    HANDS = ("Left", "Right")
+
     def __init__(
         self,
-        max_num_hands: int = 1,
+        max_num_hands: int = 2,
         detection_confidence: float = 0.5,
         tracking_confidence: float = 0.5,
+        mirrored_input: bool = False,
+        inference_width: Optional[int] = None,
+        use_roi: bool = False,
+        roi_expansion: float = 0.6,
+        roi_min_size: int = 160,
+        roi_refresh_frames: int = 15,
+        smooth_landmarks: bool = False,
     ):
+        self.mirrored_input = mirrored_input
+        self.max_num_hands = max_num_hands
+
+        # Inferencia reducida / por región de interés
+        self.inference_width = inference_width
+        self.use_roi = use_roi
+        self.roi_expansion = roi_expansion
+        self.roi_min_size = roi_min_size
+        self.roi_refresh_frames = roi_refresh_frames
+        self._roi: Optional[Tuple[int, int, int, int]] = None  # (x0, y0, x1, y1) en píxeles
+        self._frames_since_full = 0
+        self.detection_confidence = detection_confidence
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
@@ -20,42 +91,192 @@ class HandTracker:
             min_detection_confidence=detection_confidence,
             min_tracking_confidence=tracking_confidence,
         )
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        self._roi_hands = None  # instancia para recortes (se crea al primer uso)
+        self._renderer = None
+        self.landmark_filter = OneEuroLandmarkFilter() if smooth_landmarks else None
+
+    def detect(self, frame_bgr, capture_ts: Optional[float] = None) -> HandResult:
+        """
+        Analiza un frame BGR de OpenCV sin modificarlo ni copiarlo.
+        Devuelve un HandResult con landmarks y lateralidad de cada mano.
+        `capture_ts` se copia al resultado para medir latencias.
+        """
+        result = HandResult(capture_ts=capture_ts)
+        if frame_bgr is None:
+            return result
+        result.aspect_ratio = frame_bgr.shape[1] / frame_bgr.shape[0]
+
+        results = self._detect(frame_bgr)
+
+        if results.multi_hand_landmarks:
+            handedness = results.multi_handedness or []
+            for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+                # Guardar la lista de landmarks (x, y, z normalizados 0–1)
+                result.hand_landmarks.append(hand_landmarks)
+                result.landmarks_list.append(hand_landmarks.landmark)
+                result.handedness_list.append(
+                    self._hand_label(handedness[i] if i < len(handedness) else None)
+                )
+
+        if len(result.handedness_list) == 2 and \
+                result.handedness_list[0] == result.handedness_list[1]:
+            result.handedness_list = self._split_handedness(result.landmarks_list)
+
+        if self.landmark_filter is not None and result.has_hands:
+            self.landmark_filter.apply(result, capture_ts)
+
+        return result
 
     def process(self, frame_bgr):
         """
-        Procesa un frame BGR de OpenCV.
+        Procesa un frame BGR de OpenCV (detección + dibujo en una copia).
         Devuelve:
           - frame_annotated_bgr: frame con landmarks dibujados
           - landmarks_list: lista de listas de landmarks (cada uno con x, y, z normalizados)
+          - handedness_list: "Left" / "Right" para cada mano, mismo orden que landmarks_list
         """
         if frame_bgr is None:
-            return frame_bgr, []
+            return frame_bgr, [], []
+
+        result = self.detect(frame_bgr)
+
+        if self._renderer is None:
+            self._renderer = OverlayRenderer()
+
+        frame_annotated = self._renderer.draw_hands(frame_bgr.copy(), result)
+        return frame_annotated, result.landmarks_list, result.handedness_list
+
+    def _detect(self, frame_bgr):
+        """
+        Ejecuta MediaPipe sobre el frame (o sobre el ROI reducido) y deja los
+        landmarks en coordenadas normalizadas del frame completo.
+        """
+        roi = None
+        if self.use_roi and self._roi is not None:
+            if self._frames_since_full < self.roi_refresh_frames:
+                roi = self._roi
+
+        results = self._run_mediapipe(frame_bgr, roi)
+
+        # Sin manos en el recorte: reintentar con el frame completo
+        if roi is not None and not results.multi_hand_landmarks:
+            roi = None
+            results = self._run_mediapipe(frame_bgr, None)
+
+        self._frames_since_full = 0 if roi is None else self._frames_since_full + 1
+
+        if self.use_roi:
+            self._roi = self._next_roi(frame_bgr.shape, results.multi_hand_landmarks)
+
+        return results
+
+    def _run_mediapipe(self, frame_bgr, roi):
+        """Recorta (opcional), reduce (opcional), convierte a RGB y procesa."""
+        frame_h, frame_w = frame_bgr.shape[:2]
+
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            source = frame_bgr[y0:y1, x0:x1]
+        else:
+            x0, y0, x1, y1 = 0, 0, frame_w, frame_h
+            source = frame_bgr
+
+        # Reducir antes de convertir: cvtColor trabaja sobre menos píxeles
+        if self.inference_width and source.shape[1] > self.inference_width:
+            scale = self.inference_width / source.shape[1]
+            source = cv2.resize(
+                source,
+                (self.inference_width, max(1, int(source.shape[0] * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
 
         # Convertimos BGR -> RGB para MediaPipe
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+        frame_rgb = cv2.cvtColor(source, cv2.COLOR_BGR2RGB)
         frame_rgb.flags.writeable = False
 
-        results = self.hands.process(frame_rgb)
+        hands = self.hands if roi is None else self._get_roi_hands()
+        results = hands.process(frame_rgb)
 
-        frame_bgr.flags.writeable = True
-        frame_annotated = frame_bgr.copy()
+        # Remapear landmarks del recorte al frame completo (normalizados 0–1).
+        # El reescalado no cambia coordenadas normalizadas, solo el recorte.
+        if roi is not None and results.multi_hand_landmarks:
+            crop_w = x1 - x0
+            crop_h = y1 - y0
+            for hand_landmarks in results.multi_hand_landmarks:
+                for lm in hand_landmarks.landmark:
+                    lm.x = (lm.x * crop_w + x0) / frame_w
+                    lm.y = (lm.y * crop_h + y0) / frame_h
+                    lm.z = lm.z * crop_w / frame_w
 
-        landmarks_list = []
+        return results
 
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Dibujar landmarks sobre la imagen
-                self.mp_drawing.draw_landmarks(
-                    frame_annotated,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    self.mp_drawing_styles.get_default_hand_connections_style(),
-                )
+    def _get_roi_hands(self):
+        """
+        Hands sin seguimiento para los recortes: cada recorte tiene su propio
+        sistema de coordenadas, no sirve la región del frame anterior.
+        """
+        if self._roi_hands is None:
+            self._roi_hands = self.mp_hands.Hands(
+                static_image_mode=True,
+                max_num_hands=self.max_num_hands,
+                min_detection_confidence=self.detection_confidence,
+            )
+        return self._roi_hands
 
-                # Guardar la lista de landmarks (x, y, z normalizados 0–1)
-                landmarks_list.append(hand_landmarks.landmark)
+    def _next_roi(self, frame_shape, multi_hand_landmarks):
+        """Calcula el recorte para el siguiente frame a partir de las manos actuales."""
+        if not multi_hand_landmarks:
+            return None
+
+        frame_h, frame_w = frame_shape[:2]
+        xs = [lm.x for hand in multi_hand_landmarks for lm in hand.landmark]
+        ys = [lm.y for hand in multi_hand_landmarks for lm in hand.landmark]
+
+        x0, x1 = min(xs) * frame_w, max(xs) * frame_w
+        y0, y1 = min(ys) * frame_h, max(ys) * frame_h
+
+        # Cuadrado ampliado alrededor de las manos
+        side = max(x1 - x0, y1 - y0) * (1.0 + 2 * self.roi_expansion)
+        side = max(side, self.roi_min_size)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+
+        rx0 = max(0, int(cx - side / 2))
+        ry0 = max(0, int(cy - side / 2))
+        rx1 = min(frame_w, int(cx + side / 2))
+        ry1 = min(frame_h, int(cy + side / 2))
+
+        # Si el recorte cubre casi todo el frame no aporta nada
+        if (rx1 - rx0) * (ry1 - ry0) > 0.8 * frame_w * frame_h:
+            return None
+        if rx1 - rx0 < 2 or ry1 - ry0 < 2:
+            return None
+        return rx0, ry0, rx1, ry1
+
+    def reset_roi(self):
+        """Olvida el recorte actual; el siguiente frame se procesa completo."""
+        self._roi = None
+        self._frames_since_full = 0
+
+    def _split_handedness(self, landmarks_list) -> List[str]:
+        """
+        MediaPipe a veces etiqueta las dos manos igual; entonces la segunda
+        pisaría a la primera en los flujos por mano. Se reparten por la x de
+        la muñeca: sin espejar, la mano derecha del usuario queda a la
+        izquierda de la imagen.
+        """
+        left_of_image = "Left" if self.mirrored_input else "Right"
+        right_of_image = "Right" if self.mirrored_input else "Left"
+        first_x, second_x = (lm[0].x for lm in landmarks_list)
+        if first_x <= second_x:
+            return [left_of_image, right_of_image]
+        return [right_of_image, left_of_image]
+
+    def _hand_label(self, classification_list) -> str:
+        """Convierte la clasificación de MediaPipe a "Left"/"Right" del usuario."""
+        if classification_list is None or not classification_list.classification:
+            return "Right"
 
-        return frame_annotated, landmarks_list
+        label = classification_list.classification[0].label
+        if self.mirrored_input:
+            return label
+        return "Left" if label == "Right" else "Right"
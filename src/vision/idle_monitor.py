@@ -0,0 +1,69 @@
+"""
+Modo de bajo consumo cuando no hay nadie frente a la cámara.
+
+Máquina de estados de dos estados:
+  - ACTIVE: análisis completo a la frecuencia normal de la vista
+  - IDLE: tras `idle_after` segundos sin cara/mano, solo se hace una
+    comprobación de presencia barata (frame reducido, frecuencia baja)
+
+En cuanto la comprobación de presencia detecta algo se vuelve a ACTIVE,
+y el siguiente frame ya se analiza completo.
+"""
+
+import time
+from typing import Optional
+
+import cv2
+
+
+class IdleMonitor:
+    """
+    Decide cada cuánto y a qué resolución analizar según haya alguien o no.
+
+    - active_interval_ms: intervalo de refresco en ACTIVE (el de la vista)
+    - idle_interval_ms: intervalo de refresco en IDLE
+    - idle_after: segundos sin detecciones antes de pasar a IDLE
+    - idle_scale: escala del frame para la comprobación de presencia
+    """
+
+    ACTIVE = "ACTIVE"
+    IDLE = "IDLE"
+
+    def __init__(self, active_interval_ms: int, idle_interval_ms: int = 500,
+                 idle_after: float = 10.0, idle_scale: float = 0.5):
+        self.active_interval_ms = active_interval_ms
+        self.idle_interval_ms = idle_interval_ms
+        self.idle_after = idle_after
+        self.idle_scale = idle_scale
+
+        self.state = self.ACTIVE
+        self._last_seen = time.perf_counter()
+
+    @property
+    def is_idle(self) -> bool:
+        return self.state == self.IDLE
+
+    def update(self, detected: bool, now: Optional[float] = None) -> bool:
+        """
+        Registra si en este frame hubo cara/mano.
+        Devuelve True si el estado cambió.
+        """
+        now = time.perf_counter() if now is None else now
+        previous = self.state
+
+        if detected:
+            self._last_seen = now
+            self.state = self.ACTIVE
+        elif now - self._last_seen >= self.idle_after:
+            self.state = self.IDLE
+
+        return self.state != previous
+
+    def downscale(self, frame_bgr):
+        """Frame reducido para la comprobación de presencia en IDLE."""
+        if frame_bgr is None or self.idle_scale >= 1.0:
+            return frame_bgr
+
+        h, w = frame_bgr.shape[:2]
+        size = (max(1, int(w * self.idle_scale)), max(1, int(h * self.idle_scale)))
+        return cv2.resize(frame_bgr, size, interpolation=cv2.INTER_AREA)
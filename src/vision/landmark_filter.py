@@ -0,0 +1,101 @@
+"""
+Suavizado adaptativo de landmarks (filtro One Euro).
+
+El filtro One Euro es un pasa-bajos cuya frecuencia de corte sube con la
+velocidad: con la mano quieta filtra fuerte (elimina el temblor de
+MediaPipe que hace parpadear los umbrales de GestureRecognizer) y con la
+mano en movimiento casi no agrega retraso.
+
+Aquí se aplica a las 21x3 coordenadas de una mano en una sola operación
+NumPy, con estado y timestamp propios por mano ("Left" / "Right").
+
+Referencia: Casiez, Roussel y Vogel, "1€ Filter" (CHI 2012).
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from vision.landmarks import array_to_landmarks, landmarks_to_array
+
+
+def _alpha(cutoff, dt: float):
+    """Factor de suavizado exponencial para una frecuencia de corte (Hz)."""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class _HandState:
+    __slots__ = ("x", "dx", "t")
+
+    def __init__(self, x: np.ndarray, t: float):
+        self.x = x
+        self.dx = np.zeros_like(x)
+        self.t = t
+
+
+class OneEuroLandmarkFilter:
+    """
+    - min_cutoff: corte (Hz) con la mano quieta; menor = más suave
+    - beta: cuánto sube el corte con la velocidad (coords normalizadas/s)
+    - d_cutoff: corte para estimar la velocidad
+    - reset_after: segundos sin ver una mano tras los que se olvida su estado
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 5.0,
+                 d_cutoff: float = 1.0, reset_after: float = 0.5):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset_after = reset_after
+        self._states: Dict[str, _HandState] = {}
+
+    def reset(self, hand: Optional[str] = None) -> None:
+        """Olvida el estado de una mano (o de todas)."""
+        if hand is None:
+            self._states.clear()
+        else:
+            self._states.pop(hand, None)
+
+    def filter(self, hand: str, points: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filtra un array (21, 3) de una mano. Devuelve un array nuevo."""
+        points = np.asarray(points, dtype=np.float32)
+        state = self._states.get(hand)
+
+        if state is None or timestamp - state.t > self.reset_after:
+            self._states[hand] = _HandState(points.copy(), timestamp)
+            return points
+
+        dt = timestamp - state.t
+        if dt <= 0:
+            return state.x.copy()
+
+        # Velocidad suavizada de cada coordenada
+        dx = (points - state.x) / dt
+        dx_hat = state.dx + _alpha(self.d_cutoff, dt) * (dx - state.dx)
+
+        # Corte adaptativo por landmark según su rapidez (norma de x, y, z)
+        speed = np.linalg.norm(dx_hat, axis=1, keepdims=True)   # (21, 1)
+        alpha = _alpha(self.min_cutoff + self.beta * speed, dt)  # (21, 1)
+        x_hat = state.x + alpha * (points - state.x)
+
+        state.x, state.dx, state.t = x_hat, dx_hat, timestamp
+        return x_hat.copy()
+
+    def apply(self, hand_result, timestamp: Optional[float] = None) -> None:
+        """
+        Reemplaza en el HandResult los landmarks de cada mano por los filtrados.
+        Las manos que no aparecen conservan su estado hasta `reset_after`.
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+
+        seen = set()
+        for i, hand in enumerate(hand_result.handedness_list):
+            # Dos manos con la misma etiqueta (raro): la segunda se filtra aparte
+            key = hand if hand not in seen else f"{hand}#{i}"
+            seen.add(key)
+
+            filtered = self.filter(key, landmarks_to_array(hand_result.landmarks_list[i]), timestamp)
+            hand_result.landmarks_list[i] = array_to_landmarks(filtered)
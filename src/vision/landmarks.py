@@ -0,0 +1,30 @@
+"""
+Conversión de landmarks de MediaPipe a arrays NumPy y viceversa.
+
+Los clasificadores y filtros vectorizados trabajan con arrays (21, 3);
+GestureRecognizer trabaja con objetos que tienen atributos x, y, z.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+NUM_LANDMARKS = 21
+
+# Landmark liviano con la misma interfaz (x, y, z) que el de MediaPipe
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+
+
+def landmarks_to_array(hand_landmarks) -> np.ndarray:
+    """Convierte una lista de 21 landmarks (x, y, z) en un array float32 (21, 3)."""
+    if isinstance(hand_landmarks, np.ndarray):
+        return hand_landmarks.astype(np.float32, copy=False)
+    return np.array(
+        [(lm.x, lm.y, lm.z) for lm in hand_landmarks], dtype=np.float32
+    )
+
+
+def array_to_landmarks(array: np.ndarray) -> list:
+    """Convierte un array (21, 3) en una lista de Landmark con atributos x, y, z."""
+    return [Landmark(float(x), float(y), float(z)) for x, y, z in array]
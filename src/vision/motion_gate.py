@@ -0,0 +1,95 @@
+"""
+Compuerta de movimiento: evita re-analizar frames casi idénticos.
+
+Compara una versión reducida en escala de grises del frame con la del
+último frame analizado. Si la fracción de píxeles que cambiaron (más de
+`pixel_threshold` niveles de gris) está por debajo de `min_changed_fraction`,
+el llamador puede reutilizar el resultado anterior en lugar de ejecutar
+FER o MediaPipe otra vez.
+"""
+
+import time
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Detector de cambios barato para poner delante de los analizadores.
+
+    Uso:
+        if gate.should_analyze(frame):
+            result = analyzer.detect(frame)
+            gate.store(result)
+        else:
+            result = gate.last_result
+
+    - pixel_threshold: diferencia (0-255) a partir de la cual un píxel de
+      la miniatura cuenta como cambiado (filtra el ruido del sensor)
+    - min_changed_fraction: fracción de píxeles cambiados a partir de la cual
+      hay movimiento. Se usa fracción y no la media de toda la imagen para
+      que un cambio pequeño y local (un dedo) no quede diluido
+    - max_reuse_age: segundos máximos que se reutiliza un resultado;
+      pasado ese tiempo se analiza aunque no haya movimiento
+    - size: tamaño (ancho, alto) de la miniatura usada para comparar
+    """
+
+    def __init__(self, pixel_threshold: int = 12, min_changed_fraction: float = 0.002,
+                 max_reuse_age: float = 1.0, size: tuple = (64, 48)):
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.max_reuse_age = max_reuse_age
+        self.size = size
+
+        self._reference: Optional[np.ndarray] = None
+        self._reference_time = 0.0
+        self._thumb: Optional[np.ndarray] = None
+        self.last_result: Any = None
+        self.last_change = 0.0
+
+        # Estadísticas
+        self.frames_analyzed = 0
+        self.frames_reused = 0
+
+    def _thumbnail(self, frame_bgr) -> np.ndarray:
+        """Miniatura en gris (int16 para restar sin desbordes)."""
+        small = cv2.resize(frame_bgr, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return gray.astype(np.int16)
+
+    def should_analyze(self, frame_bgr, now: Optional[float] = None) -> bool:
+        """
+        Decide si el frame debe analizarse. Si devuelve True, el llamador
+        debe guardar el nuevo resultado con `store`.
+        """
+        now = time.perf_counter() if now is None else now
+        self._thumb = self._thumbnail(frame_bgr)
+
+        if self._reference is None or self.last_result is None:
+            self.last_change = float("inf")
+            return True
+
+        changed = np.abs(self._thumb - self._reference) > self.pixel_threshold
+        self.last_change = float(changed.mean())
+
+        if self.last_change >= self.min_changed_fraction:
+            return True
+        if now - self._reference_time >= self.max_reuse_age:
+            return True
+
+        self.frames_reused += 1
+        return False
+
+    def store(self, result: Any, now: Optional[float] = None) -> None:
+        """Guarda el resultado recién calculado y el frame como referencia."""
+        self.last_result = result
+        self._reference = self._thumb
+        self._reference_time = time.perf_counter() if now is None else now
+        self.frames_analyzed += 1
+
+    def reset(self) -> None:
+        """Olvida la referencia; el siguiente frame siempre se analiza."""
+        self._reference = None
+        self.last_result = None
@@ -0,0 +1,139 @@
+"""
+Renderizado de overlays (landmarks de manos, caja de emoción).
+
+Separado de los analizadores: HandTracker.detect y EmotionRecognizer.detect
+devuelven resultados puros, y este módulo solo dibuja cuando hay alguien
+mirando (ventana visible, exportación de video, etc.).
+"""
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+
+class OverlayRenderer:
+    """
+    Dibuja resultados de análisis sobre frames BGR.
+
+    Por defecto dibuja en el mismo frame (sin copias). Si el frame no es
+    propio (p. ej. viene de un buffer compartido), `prepare(frame, copy=True)`
+    lo copia a un buffer reutilizable en vez de reservar memoria cada frame.
+    """
+
+    # Colores según emoción (BGR)
+    EMOTION_COLORS = {
+        "happy": (0, 255, 0),      # Verde
+        "sad": (255, 0, 0),        # Azul
+        "angry": (0, 0, 255),      # Rojo
+        "surprise": (0, 255, 255), # Amarillo
+        "neutral": (200, 200, 200) # Gris
+    }
+
+    def __init__(self):
+        self._buffer = None
+
+        self.mp_hands = mp.solutions.hands
+        self.mp_drawing = mp.solutions.drawing_utils
+        # Los estilos se crean una sola vez (MediaPipe los reconstruye en cada llamada)
+        styles = mp.solutions.drawing_styles
+        self._landmark_style = styles.get_default_hand_landmarks_style()
+        self._connection_style = styles.get_default_hand_connections_style()
+
+    def prepare(self, frame_bgr, copy: bool = False):
+        """
+        Devuelve el frame sobre el que se va a dibujar.
+        - copy=False: el propio frame (se dibuja en el lugar)
+        - copy=True: copia en un buffer reutilizable del mismo tamaño
+        """
+        if frame_bgr is None or not copy:
+            return frame_bgr
+
+        if self._buffer is None or self._buffer.shape != frame_bgr.shape:
+            self._buffer = np.empty_like(frame_bgr)
+        np.copyto(self._buffer, frame_bgr)
+        return self._buffer
+
+    def draw_hands(self, frame, hand_result):
+        """Dibuja los landmarks de todas las manos de un HandResult."""
+        if frame is None:
+            return frame
+
+        for hand_landmarks in hand_result.hand_landmarks:
+            self.mp_drawing.draw_landmarks(
+                frame,
+                hand_landmarks,
+                self.mp_hands.HAND_CONNECTIONS,
+                self._landmark_style,
+                self._connection_style,
+            )
+        return frame
+
+    def draw_emotion(self, frame, emotion_result):
+        """Dibuja la caja, etiqueta y barra de confianza de un EmotionResult."""
+        if frame is None or emotion_result.top_emotion is None or emotion_result.box is None:
+            return frame
+
+        x, y, w, h = emotion_result.box
+        return self.draw_emotion_box(
+            frame,
+            emotion_result.top_emotion,
+            emotion_result.confidence,
+            x, y, w, h,
+        )
+
+    def draw_emotion_box(self, frame, emotion: str, confidence: float,
+                         x: int, y: int, w: int, h: int):
+        """
+        Dibuja los resultados de emoción en el frame
+        """
+        color = self.EMOTION_COLORS.get(emotion, (255, 255, 255))
+
+        if w > 0 and h > 0:
+            # Rectángulo alrededor de la cara
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+
+            # Etiqueta con emoción y porcentaje
+            label = f"{emotion.upper()} {confidence*100:.1f}%"
+
+            # Fondo para texto
+            (text_w, text_h), baseline = cv2.getTextSize(
+                label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
+            )
+
+            cv2.rectangle(
+                frame,
+                (x, y - text_h - 15),
+                (x + text_w + 10, y),
+                color,
+                -1
+            )
+
+            # Texto
+            cv2.putText(
+                frame,
+                label,
+                (x + 5, y - 5),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.7,
+                (0, 0, 0),
+                2,
+            )
+
+            # Barra de confianza
+            bar_width = int(w * confidence)
+            cv2.rectangle(
+                frame,
+                (x, y + h + 5),
+                (x + bar_width, y + h + 15),
+                color,
+                -1
+            )
+            cv2.rectangle(
+                frame,
+                (x, y + h + 5),
+                (x + w, y + h + 15),
+                color,
+                1
+            )
+
+        return frame
@@ -0,0 +1,231 @@
+"""
+Grabación y reproducción de sesiones de cámara.
+
+FrameRecorder guarda frames crudos (sin compresión, para que la
+reproducción dé exactamente los mismos píxeles) con su timestamp de
+captura. La escritura a disco se hace en un hilo aparte: el loop de
+captura solo encola el frame.
+
+FrameReplayer tiene la misma interfaz que Camera (open/read/release), así
+que puede alimentar al FrameBus y a las vistas igual que una webcam, al
+ritmo original o tan rápido como se pueda.
+
+Formato de una sesión (carpeta):
+    frames.bin   frames BGR uint8 concatenados
+    meta.json    {"shape": [alto, ancho, 3], "count": N, "timestamps": [...]}
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+def new_session_path(base: str, name: str) -> str:
+    """
+    Carpeta nueva para una sesión: <base>/<nombre>-<fecha>-<hora>.
+    Si ya existe (dos sesiones en el mismo segundo) se agrega un sufijo.
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(base, f"{name}-{stamp}")
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = os.path.join(base, f"{name}-{stamp}-{suffix}")
+    return path
+
+
+class FrameRecorder:
+    """
+    Graba frames en una carpeta de sesión desde un hilo de escritura.
+
+    Si el disco no da abasto y la cola se llena, el frame se descarta
+    (se cuenta en `dropped`) en lugar de bloquear la captura.
+    """
+
+    def __init__(self, path: str, max_queue: int = 120):
+        self.path = path
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._reader: Optional[threading.Thread] = None
+        self._running = False
+
+        self.shape = None
+        self.timestamps: List[float] = []
+        self.written = 0
+        self.dropped = 0
+
+    def start(self) -> "FrameRecorder":
+        """Crea la carpeta y lanza el hilo de escritura. No pisa una sesión existente."""
+        if os.path.exists(os.path.join(self.path, "frames.bin")):
+            raise FileExistsError(f"Ya hay una sesión grabada en: {self.path}")
+        os.makedirs(self.path, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="FrameRecorder", daemon=True
+        )
+        self._thread.start()
+        print(f"⏺ Grabando sesión en: {self.path}")
+        return self
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """Encola un frame (se copia). Devuelve False si se descartó."""
+        if not self._running:
+            return False
+
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        try:
+            self._queue.put_nowait((timestamp, frame.copy()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def attach(self, bus) -> "FrameRecorder":
+        """Graba todos los frames publicados en un FrameBus (hilo lector propio)."""
+        self._reader = threading.Thread(
+            target=self._bus_loop, args=(bus,), name="FrameRecorderReader", daemon=True
+        )
+        self._reader.start()
+        return self
+
+    def _bus_loop(self, bus):
+        last_seq = -1
+        while self._running:
+            packet = bus.wait_for_frame(last_seq, timeout=0.2)
+            if packet is None:
+                continue
+            seq, stamp, frame = packet
+            if last_seq >= 0 and seq > last_seq + 1:
+                self.dropped += seq - last_seq - 1
+            last_seq = seq
+            self.write(frame, stamp)
+
+    def _writer_loop(self):
+        frames_path = os.path.join(self.path, "frames.bin")
+        with open(frames_path, "wb") as f:
+            while self._running or not self._queue.empty():
+                try:
+                    timestamp, frame = self._queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+
+                if self.shape is None:
+                    self.shape = frame.shape
+                elif frame.shape != self.shape:
+                    frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+
+                f.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+                self.timestamps.append(timestamp)
+                self.written += 1
+
+    def stop(self) -> str:
+        """Termina de escribir lo encolado y guarda meta.json. Devuelve la carpeta."""
+        self._running = False
+        if self._reader is not None:
+            self._reader.join(timeout=2.0)
+        if self._thread is not None:
+            self._thread.join()
+
+        start = self.timestamps[0] if self.timestamps else 0.0
+        meta = {
+            "shape": list(self.shape) if self.shape is not None else None,
+            "count": self.written,
+            "dropped": self.dropped,
+            "timestamps": [t - start for t in self.timestamps],
+        }
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        print(f"⏹ Sesión grabada: {self.written} frames ({self.dropped} descartados)")
+        return self.path
+
+
+class FrameReplayer:
+    """
+    Reproduce una sesión grabada con la interfaz de Camera.
+
+    - realtime=True: respeta los tiempos originales entre frames
+    - realtime=False: entrega frames tan rápido como se pidan
+    - loop=True: vuelve al inicio al terminar (útil para pruebas largas)
+
+    Los frames se leen con np.memmap, sin cargar la sesión en memoria.
+    """
+
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+        self.path = path
+        self.index = f"replay:{os.path.basename(os.path.normpath(path))}"
+        self.realtime = realtime
+        self.loop = loop
+
+        self.frames = None
+        self.timestamps: List[float] = []
+        self.position = 0
+        self.last_timestamp: Optional[float] = None
+        self._start_wall: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def open(self) -> bool:
+        """Abre la sesión. Devuelve False si no existe o está vacía."""
+        if self.frames is not None:
+            return True
+
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if not meta.get("count"):
+            return False
+
+        self.timestamps = meta["timestamps"][:meta["count"]]
+        self.frames = np.memmap(
+            os.path.join(self.path, "frames.bin"),
+            dtype=np.uint8,
+            mode="r",
+            shape=(meta["count"],) + tuple(meta["shape"]),
+        )
+        self.position = 0
+        self._start_wall = None
+        return True
+
+    def isOpened(self) -> bool:
+        return self.frames is not None
+
+    def read(self):
+        """Devuelve (ret, frame) como Camera.read(); ret=False al terminar la sesión."""
+        if self.frames is None:
+            return False, None
+
+        if self.position >= len(self.timestamps):
+            if not self.loop:
+                return False, None
+            self.position = 0
+            self._start_wall = None
+
+        recorded = self.timestamps[self.position]
+        if self.realtime:
+            now = time.perf_counter()
+            if self._start_wall is None:
+                self._start_wall = now - recorded
+            delay = self._start_wall + recorded - now
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = np.array(self.frames[self.position])
+        self.last_timestamp = recorded
+        self.position += 1
+        return True, frame
+
+    def release(self):
+        """Cierra la sesión."""
+        self.frames = None
@@ -0,0 +1,266 @@
+"""
+Exportación de la sesión a video con las anotaciones (manos, emociones).
+
+Una etapa al final del pipeline entrega cada frame ya dibujado a un hilo
+codificador (cv2.VideoWriter) por una cola acotada. Si el codificador no
+da abasto, la cola descarta frames (se cuentan en `dropped`) en lugar de
+frenar el pipeline: la vista en vivo no pierde FPS por grabar.
+
+El pipeline entrega frames a ritmo variable (las colas LATEST_ONLY
+descartan, y en espera IdleMonitor analiza cada 400-500 ms), pero el
+archivo tiene FPS fijo. Para que el video no quede acelerado en esos
+tramos, cada frame se ubica en una línea de tiempo de ritmo constante según
+su instante de captura (`capture_ts`): si se saltearon casilleros se repite
+el frame anterior, y si llegan frames de más se descartan.
+
+A diferencia de vision.recording (frames crudos para reproducir y
+depurar), aquí el resultado es un video comprimido para revisar a ojo.
+
+Se activa con variables de entorno (ver VideoExportConfig.from_env):
+
+    EXPORT_VIDEO=videos EXPORT_CODEC=mp4v EXPORT_EVERY=2 python src/app.py
+"""
+
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from pipeline.queues import DROP_OLDEST
+
+
+# Extensión de archivo para cada códec
+_CODEC_EXTENSIONS = {"mp4v": "mp4", "avc1": "mp4", "h264": "mp4", "MJPG": "avi", "XVID": "avi"}
+
+
+@dataclass
+class VideoExportConfig:
+    """
+    - directory: carpeta de los videos (uno por pipeline y sesión)
+    - codec: FOURCC del códec ("mp4v", "MJPG", "XVID", "avc1")
+    - size: (ancho, alto) del video; None = tamaño del frame
+    - fps: ritmo de la línea de tiempo (casilleros por segundo de sesión)
+    - every_n: guardar 1 de cada N casilleros; el archivo se escribe a
+      fps / every_n para que se reproduzca a velocidad real
+    - max_queue: frames en espera del codificador antes de descartar
+    - max_hold_s: segundos máximos que se repite un frame para rellenar un
+      hueco (p. ej. el pipeline detenido); más allá el video salta
+    """
+    directory: str = "videos"
+    codec: str = "mp4v"
+    size: Optional[Tuple[int, int]] = None
+    fps: float = 15.0
+    every_n: int = 1
+    max_queue: int = 30
+    max_hold_s: float = 10.0
+
+    @property
+    def slot_interval(self) -> float:
+        """Segundos de sesión entre dos frames del archivo."""
+        return self.every_n / self.fps
+
+    @property
+    def file_fps(self) -> float:
+        return self.fps / self.every_n
+
+    @classmethod
+    def from_env(cls, directory: Optional[str] = None) -> Optional["VideoExportConfig"]:
+        """
+        Configuración desde EXPORT_VIDEO (carpeta; sin ella ni `directory`
+        no se exporta), EXPORT_CODEC, EXPORT_WIDTH, EXPORT_HEIGHT,
+        EXPORT_FPS y EXPORT_EVERY.
+        """
+        directory = directory or os.environ.get("EXPORT_VIDEO")
+        if not directory:
+            return None
+
+        config = cls(directory=directory)
+        if os.environ.get("EXPORT_CODEC"):
+            config.codec = os.environ["EXPORT_CODEC"]
+        if os.environ.get("EXPORT_WIDTH") and os.environ.get("EXPORT_HEIGHT"):
+            config.size = (int(os.environ["EXPORT_WIDTH"]), int(os.environ["EXPORT_HEIGHT"]))
+        if os.environ.get("EXPORT_FPS"):
+            config.fps = float(os.environ["EXPORT_FPS"])
+        if os.environ.get("EXPORT_EVERY"):
+            config.every_n = max(1, int(os.environ["EXPORT_EVERY"]))
+        return config
+
+    def path_for(self, name: str) -> str:
+        """Archivo para un pipeline: <carpeta>/<nombre>-<fecha>.<ext>."""
+        extension = _CODEC_EXTENSIONS.get(self.codec, "avi")
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{name}-{stamp}.{extension}")
+
+
+class SessionVideoExporter:
+    """
+    Escribe frames anotados a un video desde un hilo codificador.
+    El VideoWriter se abre con el primer frame (así se conoce el tamaño).
+
+    Cada frame ocupa el casillero de la línea de tiempo más cercano a su
+    instante de captura; el codificador repite el frame anterior en los
+    casilleros vacíos que quedan antes de él.
+    """
+
+    def __init__(self, path: str, config: Optional[VideoExportConfig] = None):
+        self.path = path
+        self.config = config or VideoExportConfig()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.config.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._writer = None
+        self._start_ts: Optional[float] = None   # capture_ts del casillero 0
+        self._next_slot = 0                      # primer casillero sin frame
+        self._last = None                        # último frame escrito (hilo codificador)
+
+        self.written = 0     # frames escritos en el archivo (incluye repetidos)
+        self.repeated = 0    # repeticiones para rellenar huecos de la línea de tiempo
+        self.skipped = 0     # descartados por caer en un casillero ya ocupado
+        self.dropped = 0     # descartados porque el codificador no daba abasto
+        self.failed = False
+
+    def start(self) -> "SessionVideoExporter":
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._encode_loop, name="VideoExporter", daemon=True
+        )
+        self._thread.start()
+        print(f"🎬 Exportando video a: {self.path}")
+        return self
+
+    def slot_for(self, capture_ts: float) -> Optional[int]:
+        """
+        Casillero de la línea de tiempo para un frame capturado en
+        `capture_ts`, o None si no hace falta (su casillero ya tiene frame).
+        Se consulta antes de dibujar para no anotar frames que se descartan.
+        """
+        if not self._running or self.failed:
+            return None
+        if self._start_ts is None:
+            self._start_ts = capture_ts
+        slot = int(round((capture_ts - self._start_ts) / self.config.slot_interval))
+        if slot < self._next_slot:
+            self.skipped += 1
+            return None
+        return slot
+
+    def enqueue(self, frame: np.ndarray, slot: int, copy: bool = True) -> bool:
+        """
+        Encola sin bloquear el frame de un casillero (ver slot_for). Devuelve
+        False si la cola estaba llena; el hueco lo rellena el frame siguiente.
+        """
+        # Casilleros vacíos antes de este: el codificador repite el frame anterior
+        hold = min(slot - self._next_slot,
+                   int(self.config.max_hold_s * self.config.file_fps))
+        try:
+            self._queue.put_nowait((frame.copy() if copy else frame, hold))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self._next_slot = slot + 1
+        return True
+
+    def write(self, frame: np.ndarray, capture_ts: float, copy: bool = True) -> bool:
+        """Ubica y encola un frame. Devuelve False si se salteó o descartó."""
+        slot = self.slot_for(capture_ts)
+        return slot is not None and self.enqueue(frame, slot, copy)
+
+    def _open(self, shape) -> bool:
+        size = self.config.size or (shape[1], shape[0])
+        fourcc = cv2.VideoWriter_fourcc(*self.config.codec[:4].ljust(4))
+        writer = cv2.VideoWriter(self.path, fourcc, self.config.file_fps, size)
+        if not writer.isOpened():
+            print(f"⚠️ No se pudo abrir el video con el códec '{self.config.codec}': {self.path}")
+            self.failed = True
+            return False
+        self._writer = writer
+        return True
+
+    def _encode_loop(self):
+        while self._running or not self._queue.empty():
+            try:
+                frame, hold = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            if self.failed or (self._writer is None and not self._open(frame.shape)):
+                continue
+
+            size = self.config.size or (frame.shape[1], frame.shape[0])
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+            if self._last is not None:
+                for _ in range(hold):
+                    self._writer.write(self._last)
+                self.repeated += hold
+                self.written += hold
+            self._writer.write(frame)
+            self._last = frame
+            self.written += 1
+
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+    def stop(self) -> str:
+        """Codifica lo encolado y cierra el archivo. Devuelve la ruta."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if not self.failed:
+            print(f"🎬 Video guardado: {self.path} ({self.written} frames, "
+                  f"{self.repeated} repetidos, {self.dropped} descartados)")
+        return self.path
+
+
+class VideoExportStage:
+    """
+    Etapa final del pipeline que entrega el frame anotado al exportador.
+    Si la etapa de dibujo no corrió (ventana oculta o sin GUI), `draw`
+    anota aquí una copia.
+    """
+
+    def __init__(self, exporter: SessionVideoExporter, draw: Optional[Callable] = None):
+        self.exporter = exporter
+        self.draw = draw
+
+    def __call__(self, item):
+        slot = self.exporter.slot_for(item.capture_ts)
+        if slot is None:
+            return item
+        if self.draw is not None and "image" not in item.data:
+            self.exporter.enqueue(self.draw(item.frame.copy(), item), slot, copy=False)
+        else:
+            # El frame es copia propia del pipeline y nadie lo modifica después
+            self.exporter.enqueue(item.frame, slot, copy=False)
+        return item
+
+
+def attach_video_export(pipeline, draw: Optional[Callable] = None,
+                        config: Optional[VideoExportConfig] = None):
+    """
+    Agrega la exportación al final del pipeline si está configurada
+    (argumento o EXPORT_VIDEO). Deja el exportador en
+    `pipeline.video_export` (None si no se exporta) para detenerlo al
+    cerrar. Llamar antes de pipeline.start().
+    """
+    config = config or VideoExportConfig.from_env()
+    pipeline.video_export = None
+    if config is None:
+        return pipeline
+
+    exporter = SessionVideoExporter(config.path_for(pipeline.name), config).start()
+    pipeline.add_stage("video_export", VideoExportStage(exporter, draw),
+                       queue_size=2, policy=DROP_OLDEST)
+    pipeline.video_export = exporter
+    return pipeline